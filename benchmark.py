@@ -0,0 +1,300 @@
+"""
+Benchmark harness for the Enhanced Mario Game
+
+Runs each subsystem scenario at a range of entity counts, with warmup and
+repeated timed samples, and reports median, IQR and tail percentiles per step.
+Results are written as JSON so runs on the same machine can be compared: the
+compare mode flags scenarios whose median regressed past a threshold against a
+stored baseline.
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # Benchmarks never open a window
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from enhanced_mario_game import (Player, Enemy, ParticleSystem, SpatialGrid, TileWorld, EnemySwarm, Game, GameState,
+                                 InputState, ScriptedInput, LevelManager, SCREEN_WIDTH, SCREEN_HEIGHT)
+from timer_wheel import TimerWheel
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+DEFAULT_REPEAT = 20
+DEFAULT_WARMUP = 3
+MIN_SAMPLE_SECONDS = 0.002  # Steps per sample are batched up to at least this long
+REGRESSION_THRESHOLD = 0.10  # Median slowdown flagged by compare mode
+SEGMENT_ENTITIES = 8  # Platforms, enemies and coins per generated level segment
+
+
+def level_platforms(segments, seed=0):
+    """Spatial index of a generated level's platforms, as bare rect holders"""
+    index = SpatialGrid()
+    for record in LevelManager.generate_level(segments, seed)['platforms']:
+        platform_sprite = pygame.sprite.Sprite()
+        platform_sprite.rect = pygame.Rect(record)
+        index.insert(platform_sprite)
+    return index
+
+
+def level_tiles(segments, seed=0):
+    """Tile collision world of a generated level's platforms"""
+    tiles = TileWorld()
+    for record in LevelManager.generate_level(segments, seed)['platforms']:
+        tiles.add(pygame.Rect(record))
+    return tiles
+
+
+def soak_script(tick):
+    return InputState(right=True, jump=tick % 45 < 10)
+
+
+# Each scenario builds its world for an entity count and returns the step to time
+
+def player_collisions(size, world):
+    player = Player(100, 400)
+    player.level_width = None
+    controls = [InputState(right=True, jump=tick % 45 < 10) for tick in range(90)]
+    state = {'tick': 0}
+
+    def step():
+        tick = state['tick'] = state['tick'] + 1
+        player.update(world, (), 1, controls[tick % 90])
+        if player.rect.x > size * 130:
+            player.rect.topleft = (100, 400)
+    return step
+
+
+def scenario_player_collisions(size):
+    """Player physics and collisions against size platforms"""
+    return player_collisions(size, level_platforms(max(1, size // 3)))
+
+
+def scenario_player_collisions_tiles(size):
+    """Player physics and collisions against size platforms converted to a tile world"""
+    return player_collisions(size, level_tiles(max(1, size // 3)))
+
+
+def scenario_spatial_query(size):
+    """Viewport query against size indexed items"""
+    index = SpatialGrid()
+    rng = np.random.default_rng(0)
+    width = max(SCREEN_WIDTH, size * 50)
+    for x, y in zip(rng.integers(0, width, size).tolist(), rng.integers(0, SCREEN_HEIGHT, size).tolist()):
+        item = pygame.sprite.Sprite()
+        item.rect = pygame.Rect(x, y, 30, 30)
+        index.insert(item)
+    views = [pygame.Rect(x, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+             for x in rng.integers(0, max(1, width - SCREEN_WIDTH), 64).tolist()]
+    state = {'tick': 0}
+
+    def step():
+        state['tick'] += 1
+        index.query(views[state['tick'] % 64])
+    return step
+
+
+def scenario_particles(size):
+    """Update and draw size long-lived particles spread over ten screens"""
+    particles = ParticleSystem(capacity=size)
+    rng = np.random.default_rng(0)
+    particles.emit(rng.uniform(0, SCREEN_WIDTH * 10, size), rng.uniform(0, SCREEN_HEIGHT, size),
+                   rng.uniform(-1, 1, size), rng.uniform(-1, 1, size), 1e9)
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    start_pos = particles.pos[:size].copy()
+    start_vel = particles.vel[:size].copy()
+    state = {'tick': 0}
+
+    def step():
+        # Rewind every second of simulated time so gravity never carries the population off screen
+        state['tick'] += 1
+        if state['tick'] % 60 == 0:
+            particles.pos[:size] = start_pos
+            particles.vel[:size] = start_vel
+        particles.update(1)
+        particles.draw(surface, 0)
+    return step
+
+
+def scenario_enemies(size):
+    """Per-sprite Enemy.update for size enemies on a generated level"""
+    segments = max(1, size)
+    index = level_platforms(segments)
+    timers = TimerWheel()  # Shared and advanced once per tick, as Game does
+    player = Player(100, 400, timers)
+    rng = np.random.default_rng(0)
+    enemies = [Enemy(x, SCREEN_HEIGHT - 70, timers=timers) for x in rng.integers(0, segments * 400, size).tolist()]
+
+    def step():
+        timers.advance()
+        for enemy in enemies:
+            enemy.update(index, player, 1)
+    return step
+
+
+def scenario_enemy_swarm(size):
+    """Vectorized EnemySwarm.update for size enemies on a generated level"""
+    segments = max(1, size)
+    swarm = EnemySwarm()
+    swarm.set_platforms(level_platforms(segments))
+    rng = np.random.default_rng(0)
+    swarm.add([(x, SCREEN_HEIGHT - 70) for x in rng.integers(0, segments * 400, size).tolist()])
+    player = Player(100, 400)
+
+    def step():
+        swarm.update(player, 1)
+    return step
+
+
+def frame_game(size, batch_enemies=False):
+    game = Game(headless=True, input_source=ScriptedInput(soak_script), seed=0, batch_enemies=batch_enemies)
+    game.level_manager.levels = [LevelManager.generate_level(max(1, size // SEGMENT_ENTITIES), seed=0)]
+    game.create_level()
+
+    def step():
+        game.handle_events()
+        game.update()
+        game.draw()
+        if game.state != GameState.PLAYING:
+            game.restart_game()
+    return step
+
+
+def scenario_frame(size):
+    """Full frame (events, tick, draw) on a generated level of about size entities"""
+    return frame_game(size)
+
+
+def scenario_frame_batch(size):
+    """Full frame with the vectorized enemy engine"""
+    return frame_game(size, batch_enemies=True)
+
+
+# name: (builder, largest size worth running)
+SCENARIOS = {
+    'player_collisions': (scenario_player_collisions, 100000),
+    'player_collisions_tiles': (scenario_player_collisions_tiles, 100000),
+    'spatial_query': (scenario_spatial_query, 100000),
+    'particles': (scenario_particles, 100000),
+    'enemies': (scenario_enemies, 10000),  # 100k sprite updates take seconds per step
+    'enemy_swarm': (scenario_enemy_swarm, 100000),
+    'frame': (scenario_frame, 100000),
+    'frame_batch': (scenario_frame_batch, 100000),
+}
+
+
+def summarize(samples):
+    """Median, IQR and percentiles of per-step sample times, in milliseconds"""
+    ms = np.asarray(samples) * 1000
+    p5, p25, p50, p75, p95, p99 = np.percentile(ms, [5, 25, 50, 75, 95, 99]).tolist()
+    return {
+        'median_ms': p50, 'iqr_ms': p75 - p25, 'p5_ms': p5, 'p25_ms': p25, 'p75_ms': p75,
+        'p95_ms': p95, 'p99_ms': p99, 'mean_ms': float(ms.mean()),
+        'min_ms': float(ms.min()), 'max_ms': float(ms.max()), 'runs': len(samples),
+    }
+
+
+def measure(step, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP):
+    """Time step over warmup then repeat samples, batching fast steps into longer samples"""
+    start = time.perf_counter()
+    step()
+    first = time.perf_counter() - start
+    number = max(1, math.ceil(MIN_SAMPLE_SECONDS / first)) if first > 0 else 1000
+
+    samples = []
+    for run in range(warmup + repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            step()
+        elapsed = (time.perf_counter() - start) / number
+        if run >= warmup:
+            samples.append(elapsed)
+    stats = summarize(samples)
+    stats['steps_per_sample'] = number
+    return stats
+
+
+def run_benchmarks(scenarios=None, sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP,
+                   log=print):
+    """Run scenarios at each size; returns the JSON-ready results document"""
+    results = {}
+    for name in scenarios or SCENARIOS:
+        builder, max_size = SCENARIOS[name]
+        results[name] = {}
+        for size in sizes:
+            if size > max_size:
+                log(f"{name:<18} {size:>7}: skipped (over {max_size})")
+                continue
+            stats = measure(builder(size), repeat, warmup)
+            results[name][str(size)] = stats
+            log(f"{name:<18} {size:>7}: median {stats['median_ms']:.4f}ms  IQR {stats['iqr_ms']:.4f}ms  "
+                f"p95 {stats['p95_ms']:.4f}ms  p99 {stats['p99_ms']:.4f}ms")
+    return {
+        'meta': {
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'machine': platform.machine(), 'numpy': np.__version__, 'pygame': pygame.version.ver,
+            'repeat': repeat, 'warmup': warmup, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """Scenario sizes whose median slowed by more than threshold and more than the baseline IQR"""
+    regressions = []
+    for name, sizes in current['results'].items():
+        for size, stats in sizes.items():
+            base = baseline['results'].get(name, {}).get(size)
+            if base is None:
+                continue
+            slower = stats['median_ms'] - base['median_ms']
+            ratio = stats['median_ms'] / base['median_ms'] if base['median_ms'] else float('inf')
+            if ratio > 1 + threshold and slower > base['iqr_ms']:
+                regressions.append({'scenario': name, 'size': int(size), 'baseline_ms': base['median_ms'],
+                                    'current_ms': stats['median_ms'], 'ratio': ratio})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark game subsystems and full frames")
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), help="scenarios to run (default all)")
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES), help="entity counts")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="timed samples per size")
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help="untimed samples per size")
+    parser.add_argument('--output', help="write results JSON here")
+    parser.add_argument('--compare', metavar='BASELINE', help="flag regressions against a results JSON")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="median slowdown that counts as a regression (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    current = run_benchmarks(args.scenarios, args.sizes, args.repeat, args.warmup)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['scenario']} {regression['size']}: "
+                  f"{regression['baseline_ms']:.4f}ms -> {regression['current_ms']:.4f}ms "
+                  f"({regression['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
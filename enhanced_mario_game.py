@@ -4,23 +4,57 @@ Production-ready prototype with performance optimizations
 """
 
 import pygame
+import numpy as np
 import json
 import os
+import hashlib
+import random
+import struct
 from enum import Enum
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, NamedTuple
 import math
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
 
-# Initialize Pygame
-pygame.init()
+from frame_profiler import FrameProfiler
+from gc_scheduler import GCScheduler, MemoryMonitor
+from timer_wheel import TimerWheel
 
 # Game constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
+BASE_TICK_RATE = 60  # Physics constants are tuned per 1/60 s step
+SIM_TICK_RATE = 60  # Fixed simulation ticks per second
+MAX_CATCH_UP_TICKS = 5  # Ticks simulated per rendered frame before dropping time
+ANIMATION_FRAME_TICKS = 6  # 10fps for animations at the base tick rate
 GRAVITY = 0.8
 JUMP_STRENGTH = -15
 MOVE_SPEED = 5
 SCROLL_THRESHOLD = 200
+SPATIAL_CELL_SIZE = 128  # Bucket size for the static spatial index
+TILE_SIZE = 10  # Cell size of the optional tile collision world; the built-in levels sit on this grid
+COIN_FLOAT_AMPLITUDE = 5
+COIN_FLOAT_SPEED = 0.05  # Float phase advanced per base-rate frame
+CULL_MARGIN = 64  # Extra pixels around the viewport kept when culling draws
+LEVEL_CHUNK_WIDTH = 512  # Width of the pre-baked static scenery surfaces
+MAX_BAKED_CHUNKS = 32  # Baked chunk surfaces kept before the least recently drawn is dropped
+STREAM_CHUNK_WIDTH = 1024  # Width of the level slices that are loaded and evicted together
+STREAM_ACTIVE_RADIUS = 1  # Chunks either side of the camera whose entities are updated
+STREAM_LOAD_RADIUS = 2  # Chunks either side of the camera kept loaded
+STREAM_EVICT_RADIUS = 3  # Loaded chunks further away than this are frozen and unloaded
+POOL_WINDOW_CHUNKS = 2 * STREAM_EVICT_RADIUS + 2  # Most chunks loaded at once: the evict radius around a two-chunk view
+POOL_DEFAULT_SIZE = 64  # Entities of each kind preallocated for level sources that do not report counts
+LOD_NEAR_DISTANCE = 128  # With update LOD, chunks this close to the view update every tick
+LOD_MID_DISTANCE = STREAM_CHUNK_WIDTH  # Chunks this close update every LOD_MID_INTERVAL ticks; further ones sleep
+LOD_MID_INTERVAL = 4
+TEXT_CACHE_SIZE = 256  # Rendered text surfaces kept before the least recently used is dropped
+UI_FONT = None  # System font name for the HUD and menus; None (the default) uses pygame's bundled font, no lookup
+FONT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "enhanced_mario_game", "fonts.json")
+PROFILE_OVERLAY_REFRESH = 30  # Frames between profiler overlay text updates
+PROFILE_TRACE_PATH = "profile_trace.json"
+PROFILE_CSV_PATH = "profile.csv"
 
 # Colors
 WHITE = (255, 255, 255)
@@ -34,6 +68,42 @@ PURPLE = (128, 0, 128)
 ORANGE = (255, 165, 0)
 PINK = (255, 192, 203)
 SKY_BLUE = (135, 206, 235)
+FLASH_TINT = (0, 100, 100)  # Added to the player's colour while invincible flashing
+
+def init_pygame(headless=False):
+    """Initialize only the pygame subsystems the game uses
+
+    The game has no audio or joystick support, so the full pygame.init() is
+    never needed; headless games skip the display as well.
+    """
+    pygame.font.init()
+    if not headless:
+        pygame.display.init()
+
+def resolve_font(name, cache_path=FONT_CACHE_PATH):
+    """Font file for a system font name, cached on disk so launches skip the system font scan
+
+    Only names cost a scan: with UI_FONT left at None the bundled default is
+    used and the cache is never read or written.
+    """
+    if name is None:
+        return None  # pygame's bundled default font
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if name in cache and (cache[name] is None or os.path.exists(cache[name])):
+        return cache[name]
+    
+    cache[name] = pygame.font.match_font(name)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(cache, f)
+    except OSError:
+        pass  # A read-only home only costs the scan on the next launch
+    return cache[name]
 
 class GameState(Enum):
     MENU = 1
@@ -49,89 +119,567 @@ class AnimationState(Enum):
     ATTACKING = 4
     DAMAGED = 5
 
+class InputState(NamedTuple):
+    """Held controls for one simulation tick"""
+    left: bool = False
+    right: bool = False
+    jump: bool = False
+
+IDLE_INPUT = InputState()
+
+# Every combination of held controls, indexed by its packed input byte
+INPUT_STATES = tuple(InputState(left=bool(bits & 1), right=bool(bits & 2), jump=bool(bits & 4))
+                     for bits in range(8))
+
+def pack_input(state):
+    """Pack held controls into a byte: bit 0 left, bit 1 right, bit 2 jump"""
+    return state.left | state.right << 1 | state.jump << 2
+
+def read_keyboard():
+    """Sample the held movement keys into an InputState"""
+    if not pygame.display.get_init():
+        return IDLE_INPUT  # No display, so no keyboard
+    keys = pygame.key.get_pressed()
+    return InputState(
+        left=bool(keys[pygame.K_LEFT] or keys[pygame.K_a]),
+        right=bool(keys[pygame.K_RIGHT] or keys[pygame.K_d]),
+        jump=bool(keys[pygame.K_SPACE] or keys[pygame.K_UP])
+    )
+
+class KeyboardInput:
+    """Live input from the pygame event queue and keyboard state"""
+
+    def events(self):
+        return pygame.event.get()
+
+    def poll(self):
+        return read_keyboard()
+
+class ScriptedInput:
+    """Replays a fixed per-tick input script, for headless and benchmark runs
+
+    states is a sequence of InputState (or a callable taking the tick index),
+    events maps a tick index to the keys pressed (KEYDOWN) on that tick.
+    """
+
+    def __init__(self, states=(), events=None, loop=False):
+        self.states = states
+        self.key_events = events or {}
+        self.loop = loop
+        self.tick = 0
+
+    def events(self):
+        keys = self.key_events.get(self.tick, ())
+        return [pygame.event.Event(pygame.KEYDOWN, key=key) for key in keys]
+
+    def poll(self):
+        tick = self.tick
+        self.tick += 1
+        if callable(self.states):
+            return self.states(tick)
+        if self.loop and self.states:
+            tick %= len(self.states)
+        if tick < len(self.states):
+            return self.states[tick]
+        return IDLE_INPUT
+
+def subpixel_step(remainder, delta):
+    """Split a fractional move into a whole-pixel step and the carried remainder"""
+    total = remainder + delta
+    step = round(total)
+    return step, total - step
+
+class SurfaceRegistry:
+    """Shared flyweight surfaces, one per (size, colour, tint, flip)
+
+    Sprites reference these instead of owning copies, so a level of thousands
+    of identical enemies and coins holds a handful of surfaces. Surfaces are
+    converted to the display pixel format once a display exists.
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+        self.unconverted = set()  # Keys created before the display was set up
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.surfaces.clear()
+        self.unconverted.clear()
+
+    def build(self, size, color, tint, flip):
+        if tint is None and not flip:
+            surface = pygame.Surface(size)
+            surface.fill(color)
+        else:
+            surface = self.get(size, color).copy()
+            if tint is not None:
+                surface.fill(tint, special_flags=pygame.BLEND_RGB_ADD)
+            if flip:
+                surface = pygame.transform.flip(surface, True, False)
+        return surface
+
+    def get(self, size, color, tint=None, flip=False):
+        """Shared surface of size filled with color, optionally tinted and mirrored"""
+        key = (size, color, tint, flip)
+        surface = self.surfaces.get(key)
+        display_ready = pygame.display.get_surface() is not None
+        if surface is None:
+            self.misses += 1
+            surface = self.build(size, color, tint, flip)
+            if display_ready:
+                surface = surface.convert()
+            else:
+                self.unconverted.add(key)
+            self.surfaces[key] = surface
+        else:
+            self.hits += 1
+            if display_ready and key in self.unconverted:
+                surface = surface.convert()
+                self.surfaces[key] = surface
+                self.unconverted.discard(key)
+        return surface
+
+    def preload(self, size, color, tint=None):
+        """Build the plain, tinted and mirrored variants of a surface up front"""
+        for variant_tint in (None, tint) if tint is not None else (None,):
+            for flip in (False, True):
+                self.get(size, color, variant_tint, flip)
+
+    def memory_bytes(self):
+        return sum(surface.get_bytesize() * surface.get_width() * surface.get_height()
+                   for surface in self.surfaces.values())
+
+    def __len__(self):
+        return len(self.surfaces)
+
+
+ASSETS = SurfaceRegistry()
+
+# Component columns; each entity archetype is a ComponentStore holding the columns of its components
+COMPONENTS = {
+    'position': (('x', np.int64), ('y', np.int64)),
+    'previous': (('prev_x', np.int64), ('prev_y', np.int64)),  # Position at the start of the last tick
+    'size': (('width', np.int64), ('height', np.int64)),
+    'velocity': (('direction', np.int8), ('remainder_x', np.float64), ('remainder_y', np.float64)),
+    'patrol': (('move_counter', np.float64),),
+    'health': (('health', np.float64),),
+    'timer': (('attack_ready', np.int64),),  # Tick the next attack is allowed on
+    'float': (('start_y', np.int64), ('float_offset', np.float64)),
+}
+PLATFORM_COMPONENTS = ('position', 'size')
+ENEMY_COMPONENTS = ('position', 'previous', 'velocity', 'patrol', 'health', 'timer')
+COIN_COMPONENTS = ('position', 'previous', 'float')
+
+class ComponentStore:
+    """Entities of one archetype as rows of contiguous typed component columns
+
+    Rows are handed out from a free list and stay put for the life of their
+    entity, so facades and spatial indexes keep row ids while systems update
+    whole columns at once. Every row also has a live flag: in the world and
+    not killed. Facades reach single cells through cells, memoryviews of the
+    same columns, as indexing those yields plain Python numbers an order of
+    magnitude faster than NumPy scalar access.
+    """
+
+    def __init__(self, components, capacity=64):
+        self.components = components
+        self.fields = {'live': np.bool_}
+        for component in components:
+            self.fields.update(COMPONENTS[component])
+        self.capacity = 0
+        self.count = 0  # Rows ever handed out; rows past it are unused
+        self.free = []
+        self.cells = SimpleNamespace()  # Memoryviews of the columns, rebuilt as they grow
+        for name, dtype in self.fields.items():
+            setattr(self, name, np.empty(0, dtype=dtype))
+        self.reserve(capacity)
+
+    def __len__(self):
+        return self.count - len(self.free)
+
+    def reserve(self, capacity):
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, self.capacity * 2)
+        for name in self.fields:
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:self.count] = old[:self.count]
+            setattr(self, name, grown)
+        self.cells = SimpleNamespace(**{name: memoryview(getattr(self, name)) for name in self.fields})
+        self.capacity = capacity
+
+    def allocate(self):
+        """A row for a new entity, initially not live"""
+        if self.free:
+            return self.free.pop()
+        row = self.count
+        self.reserve(row + 1)
+        self.count = row + 1
+        return row
+
+    def release(self, row):
+        self.cells.live[row] = False
+        self.free.append(row)
+
+    def store_previous(self):
+        """Previous-position system: remember every row's position before a tick"""
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+    def gather(self, rows, dtype):
+        """Records of dtype for rows, each field read from the column of its name ('alive' from live)"""
+        records = np.zeros(len(rows), dtype=dtype)
+        for name in dtype.names:
+            column = 'live' if name == 'alive' else name
+            if column in self.fields:
+                records[name] = getattr(self, column)[rows]
+        return records
+
+    def scatter(self, rows, records):
+        """Write gather() records back to rows, previous positions included"""
+        for name in records.dtype.names:
+            column = 'live' if name == 'alive' else name
+            if column in self.fields:
+                getattr(self, column)[rows] = records[name]
+        if 'previous' in self.components:
+            self.prev_x[rows] = records['x']
+            self.prev_y[rows] = records['y']
+
+    def visible_blits(self, entities, alpha, camera_x, camera_y):
+        """Render system: (surface, screen position) pairs for the live ones of entities of this store
+
+        Positions are blended alpha of the way from the previous tick; the
+        entities share an archetype and so the first one's image.
+        """
+        if not entities:
+            return []
+        rows = np.fromiter((entity.row for entity in entities), dtype=np.intp, count=len(entities))
+        rows = rows[self.live[rows]]
+        prev_x = self.prev_x[rows]
+        prev_y = self.prev_y[rows]
+        screen_x = np.round(prev_x + (self.x[rows] - prev_x) * alpha).astype(np.int64) - camera_x
+        screen_y = np.round(prev_y + (self.y[rows] - prev_y) * alpha).astype(np.int64) - camera_y
+        image = entities[0].image
+        return [(image, position) for position in zip(screen_x.tolist(), screen_y.tolist())]
+
+    def memory_bytes(self):
+        return sum(getattr(self, name).nbytes for name in self.fields)
+
+class Column:
+    """Facade attribute backed by the entity's row of a ComponentStore column"""
+
+    def __init__(self, name=None):
+        self.name = name
+
+    def __set_name__(self, owner, name):
+        if self.name is None:
+            self.name = name
+
+    def __get__(self, entity, owner=None):
+        if entity is None:
+            return self
+        return getattr(entity.store.cells, self.name)[entity.row]
+
+    def __set__(self, entity, value):
+        getattr(entity.store.cells, self.name)[entity.row] = value
+
+class RowRect(pygame.Rect):
+    """Rect bound to a ComponentStore row: in-place edits are written through to the row's columns
+
+    Setting any position attribute or calling an in-place method (move_ip,
+    clamp_ip, update, ...) stores the new position, and the size too when
+    the store has size columns; archetypes of a fixed size raise ValueError
+    on a resize. Rects derived from one (move(), copy(), ...) are bound to
+    no row and behave as plain rects.
+    """
+
+    __slots__ = ('store', 'row', 'fixed_size')
+
+    def bind(self, store, row, fixed_size=None):
+        self.store = store
+        self.row = row
+        self.fixed_size = fixed_size  # (width, height), or None when the store has size columns
+
+    def write_back(self):
+        store = getattr(self, 'store', None)
+        if store is None:
+            return
+        cells, row = store.cells, self.row
+        x, y, width, height = self
+        fixed_size = self.fixed_size
+        if fixed_size is None:
+            cells.width[row], cells.height[row] = width, height
+        elif (width, height) != fixed_size:
+            pygame.Rect.update(self, x, y, *fixed_size)
+            raise ValueError(f"entities of this kind are {fixed_size[0]}x{fixed_size[1]}, not {width}x{height}")
+        cells.x[row], cells.y[row] = x, y
+
+    def __setattr__(self, name, value):
+        # Only writes come through here, so reading a position stays a plain Rect attribute access
+        pygame.Rect.__setattr__(self, name, value)
+        if name not in RowRect.__slots__:
+            self.write_back()
+
+def row_rect_method(name):
+    method = getattr(pygame.Rect, name)
+
+    def write_through(rect, *args, **kwargs):
+        result = method(rect, *args, **kwargs)
+        rect.write_back()
+        return result
+    write_through.__name__ = name
+    write_through.__doc__ = method.__doc__
+    return write_through
+
+for name in ('move_ip', 'inflate_ip', 'scale_by_ip', 'clamp_ip', 'union_ip', 'unionall_ip', 'update', 'normalize'):
+    setattr(RowRect, name, row_rect_method(name))
+
+class Entity:
+    """Thin facade over one ComponentStore row
+
+    Facades implement pygame's sprite group protocol, so they still go into
+    pygame.sprite.Group, and give their row back when they are collected.
+    """
+
+    __slots__ = ('store', 'row', 'sprite_groups', 'bounds')
+
+    def __init__(self, store):
+        self.store = store
+        self.row = store.allocate()
+        self.sprite_groups = None
+        self.bounds = RowRect(0, 0, 0, 0)
+        self.bounds.bind(store, self.row, None if 'width' in store.fields else (self.width, self.height))
+        store.cells.live[self.row] = True
+
+    def __del__(self):
+        self.store.release(self.row)
+
+    @property
+    def rect(self):
+        """The row's bounds as a RowRect, refreshed from the columns on every read
+
+        The same Rect comes back each time, so reading allocates nothing, and
+        edits to it (rect.x = ..., rect.move_ip(...)) move the entity. A rect
+        kept across a tick holds the position it had when it was read.
+        Assigning a rect (or an (x, y, ...) sequence) moves the entity too.
+        """
+        cells, row = self.store.cells, self.row
+        bounds = self.bounds
+        pygame.Rect.update(bounds, cells.x[row], cells.y[row], self.width, self.height)
+        return bounds
+
+    @rect.setter
+    def rect(self, rect):
+        cells, row = self.store.cells, self.row
+        cells.x[row], cells.y[row] = int(rect[0]), int(rect[1])
+
+    @property
+    def prev_pos(self):
+        cells, row = self.store.cells, self.row
+        return cells.prev_x[row], cells.prev_y[row]
+
+    @prev_pos.setter
+    def prev_pos(self, position):
+        cells, row = self.store.cells, self.row
+        cells.prev_x[row], cells.prev_y[row] = position
+
+    # pygame.sprite.Group protocol
+    def add_internal(self, group):
+        if self.sprite_groups is None:
+            self.sprite_groups = set()
+        self.sprite_groups.add(group)
+
+    def remove_internal(self, group):
+        self.sprite_groups.discard(group)
+
+    def groups(self):
+        return list(self.sprite_groups or ())
+
+    def kill(self):
+        """Leave every sprite group and the world"""
+        for group in self.groups():
+            group.remove_internal(self)
+        self.sprite_groups = None
+        self.store.cells.live[self.row] = False
+
+    def alive(self):
+        return self.store.cells.live[self.row]
+
+    def revive(self):
+        """Return a killed entity to the world"""
+        self.store.cells.live[self.row] = True
+
+class EntityPool:
+    """Released facades of one archetype, reinitialized with reset() instead of rebuilt
+
+    Pooled entities keep their store rows, so reusing one allocates nothing.
+    hits counts entities handed out from the pool, misses those that had to
+    be built because it was empty.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory  # Builds a new entity, which acquire() then resets
+        self.free = []
+        self.size = 0  # Entities built, free or in use
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.free)
+
+    def reserve(self, count):
+        """Build entities up front until the pool has made at least count"""
+        while self.size < count:
+            entity = self.factory()
+            entity.kill()
+            self.free.append(entity)
+            self.size += 1
+
+    def acquire(self, *args):
+        """A live entity reset with args"""
+        if self.free:
+            entity = self.free.pop()
+            entity.revive()
+            self.hits += 1
+        else:
+            entity = self.factory()
+            self.size += 1
+            self.misses += 1
+        entity.reset(*args)
+        return entity
+
+    def release(self, entity):
+        """Take back an entity that has left the world and its indexes"""
+        entity.kill()
+        self.free.append(entity)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': self.size, 'free': len(self.free)}
+
 class Player(pygame.sprite.Sprite):
-    def __init__(self, x=100, y=400):
+    def __init__(self, x=100, y=400, timers=None):
         super().__init__()
         self.width = 30
         self.height = 50
         
-        # Create basic surface if no assets loaded
-        self.image = pygame.Surface((self.width, self.height))
-        self.image.fill(RED)
+        # Shared surfaces, including the flashing and facing-left variants
+        ASSETS.preload((self.width, self.height), RED, FLASH_TINT)
+        self.image = ASSETS.get((self.width, self.height), RED)
         self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        self.level_width = None  # Right boundary, None for unbounded levels
+        
+        # Movement
+        self.max_speed = MOVE_SPEED
+        self.jump_power = JUMP_STRENGTH
+        
+        # Combat and health; invincibility and cooldowns are timers on a shared wheel,
+        # or on a private one advanced by update() when the player is used on its own
+        self.timers = timers if timers is not None else TimerWheel()
+        self.private_timers = timers is None
+        self.invincibility_timer = None
+        self.attack_timer = None
+        self.max_health = 100
+        self.max_invincible_time = 60  # Base-rate frames
+        self.max_attack_cooldown = 20
+        self.attack_range = 50
+        self.attack_damage = 30
+        self.animation_speed = 0.1  # Fractional increment per frame
+        
+        self.reset(x, y)
+
+    def reset(self, x=100, y=400):
+        """Start over at (x, y) with full health, three lives and no stats, as a new player would"""
+        self.rect.topleft = (x, y)
         
         # Physics
         self.vel_x = 0
         self.vel_y = 0
+        self.remainder_x = 0.0
+        self.remainder_y = 0.0
         self.on_ground = False
         self.facing_right = True
-        
-        # Movement
-        self.max_speed = MOVE_SPEED
-        self.jump_power = JUMP_STRENGTH
+        self.prev_pos = self.rect.topleft  # Position at the start of the last tick
         self.move_direction = 0  # -1 for left, 1 for right, 0 for no movement
         
         # Combat and health
-        self.health = 100
-        self.max_health = 100
-        self.invincible = False
         self.invincible_timer = 0
-        self.max_invincible_time = 60
         self.attack_cooldown = 0
-        self.max_attack_cooldown = 20
-        self.attack_range = 50
-        self.attack_damage = 30
+        self.health = self.max_health
+        self.invincible = False
         
         # Animation and visual state
         self.animation_state = AnimationState.IDLE
         self.animation_frame = 0
-        self.animation_speed = 0.1  # Fractional increment per frame
-        self.last_update = pygame.time.get_ticks()
+        self.animation_timer = 0
         
         # Stats
         self.coins_collected = 0
         self.enemies_defeated = 0
         self.lives = 3
 
-    def update(self, platforms, enemies, dt):
-        # Update timers
-        if self.invincible:
-            self.invincible_timer -= dt
-            if self.invincible_timer <= 0:
-                self.invincible = False
-                
-        if self.attack_cooldown > 0:
-            self.attack_cooldown -= dt
+    @property
+    def invincible_timer(self):
+        """Ticks of invincibility left"""
+        return self.timers.remaining(self.invincibility_timer)
+
+    @invincible_timer.setter
+    def invincible_timer(self, ticks):
+        self.timers.cancel(self.invincibility_timer)
+        self.invincibility_timer = self.timers.schedule(ticks, self.end_invincibility) if ticks > 0 else None
+
+    @property
+    def attack_cooldown(self):
+        """Ticks until the player can attack again"""
+        return self.timers.remaining(self.attack_timer)
+
+    @attack_cooldown.setter
+    def attack_cooldown(self, ticks):
+        self.timers.cancel(self.attack_timer)
+        self.attack_timer = self.timers.schedule(ticks) if ticks > 0 else None
+
+    def end_invincibility(self):
+        self.invincible = False
+        self.invincibility_timer = None
+
+    def update(self, platforms, enemies, dt, controls=None):
+        # Timers on a shared wheel are advanced by the game, once per tick
+        if self.private_timers:
+            self.timers.advance()
 
         # Handle input
-        keys = pygame.key.get_pressed()
+        if controls is None:
+            controls = read_keyboard()
         self.move_direction = 0
         
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        if controls.left:
             self.move_direction = -1
             self.facing_right = False
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        if controls.right:
             self.move_direction = 1
             self.facing_right = True
             
         # Jumping
-        if (keys[pygame.K_SPACE] or keys[pygame.K_UP]) and self.on_ground:
+        if controls.jump and self.on_ground:
             self.vel_y = self.jump_power
             self.on_ground = False
             self.animation_state = AnimationState.JUMPING
 
-        # Apply movement
+        # Apply movement, resolving each axis before moving along the next
         self.vel_x = self.move_direction * self.max_speed
-        self.rect.x += self.vel_x
-
-        # Apply gravity
-        self.vel_y += GRAVITY
-        self.rect.y += self.vel_y
+        step, self.remainder_x = subpixel_step(self.remainder_x, self.vel_x * dt)
+        self.rect.x += step
+        self.handle_horizontal_collisions(platforms)
 
-        # Check platform collisions
-        self.handle_collisions(platforms)
+        # Apply gravity, integrated exactly so the arc is the base-rate one at any tick rate
+        # (the base rate adds its gravity step before moving, hence the dt + 1)
+        fall = self.vel_y * dt + 0.5 * GRAVITY * dt * (dt + 1)
+        self.vel_y += GRAVITY * dt
+        step, self.remainder_y = subpixel_step(self.remainder_y, fall)
+        self.rect.y += step
+        self.handle_vertical_collisions(platforms, step)
 
         # Update animation state
         self.update_animation(dt)
@@ -139,40 +687,86 @@ class Player(pygame.sprite.Sprite):
         # Keep player in bounds
         if self.rect.left < 0:
             self.rect.left = 0
-        if self.rect.right > 10000:  # Assuming level width
-            self.rect.right = 10000
+        if self.level_width is not None and self.rect.right > self.level_width:
+            self.rect.right = self.level_width
 
-    def handle_collisions(self, platforms):
-        # Horizontal collisions
-        for platform in platforms:
+    def handle_collisions(self, platforms, step_y=0):
+        self.handle_horizontal_collisions(platforms)
+        self.handle_vertical_collisions(platforms, step_y)
+
+    def handle_horizontal_collisions(self, platforms):
+        if isinstance(platforms, TileWorld):
+            blocked = platforms.blocking_columns(self.rect)
+            if blocked is not None:
+                if self.vel_x > 0:  # Moving right
+                    self.rect.right = blocked[0] * platforms.tile_size
+                elif self.vel_x < 0:  # Moving left
+                    self.rect.left = (blocked[1] + 1) * platforms.tile_size
+                self.vel_x = 0
+                self.remainder_x = 0.0
+            return
+        for platform in nearby_platforms(platforms, self.rect):
             if self.rect.colliderect(platform.rect):
                 if self.vel_x > 0:  # Moving right
                     self.rect.right = platform.rect.left
                 elif self.vel_x < 0:  # Moving left
                     self.rect.left = platform.rect.right
                 self.vel_x = 0
+                self.remainder_x = 0.0
 
-        # Vertical collisions
+    def handle_vertical_collisions(self, platforms, step_y=0):
+        """Resolve overlaps after a vertical move of step_y pixels"""
         self.on_ground = False
-        collisions = pygame.sprite.spritecollide(self, platforms, False)
-        for platform in collisions:
-            if self.vel_y > 0:  # Falling
-                if self.rect.bottom <= platform.rect.top + 10:  # Only collide from top
-                    self.rect.bottom = platform.rect.top
-                    self.vel_y = 0
-                    self.on_ground = True
-                    self.animation_state = AnimationState.IDLE
-            elif self.vel_y < 0:  # Jumping up
-                if self.rect.top >= platform.rect.bottom - 10:  # Only collide from bottom
-                    self.rect.top = platform.rect.bottom
-                    self.vel_y = 0
+        # Compare against where the player was before this tick's move, so the
+        # top/bottom tests hold however large a step the tick length produces
+        prev_top = self.rect.top - step_y
+        prev_bottom = self.rect.bottom - step_y
+        floor = ceiling = None
+        if isinstance(platforms, TileWorld):
+            if self.vel_y > 0:
+                floor = platforms.landing(self.rect, prev_bottom - 10)
+            elif self.vel_y < 0:
+                ceiling = platforms.ceiling(self.rect, prev_top + 10)
+        else:
+            for platform in nearby_platforms(platforms, self.rect):
+                if not self.rect.colliderect(platform.rect):
+                    continue
+                if self.vel_y > 0 and prev_bottom <= platform.rect.top + 10:  # Only collide from top
+                    floor = platform.rect.top
+                    break
+                if self.vel_y < 0 and prev_top >= platform.rect.bottom - 10:  # Only collide from bottom
+                    ceiling = platform.rect.bottom
+                    break
+        if floor is not None:  # Falling
+            self.rect.bottom = floor
+            self.vel_y = 0
+            self.remainder_y = 0.0
+            self.on_ground = True
+            self.animation_state = AnimationState.IDLE
+        elif ceiling is not None:  # Jumping up
+            self.rect.top = ceiling
+            self.vel_y = 0
+            self.remainder_y = 0.0
+
+        # Short ticks may not sink into the ground at all; check for support directly below
+        if not self.on_ground and self.vel_y >= 0:
+            if isinstance(platforms, TileWorld):
+                supported = platforms.ground(self.rect)
+            else:
+                probe = pygame.Rect(self.rect.left, self.rect.bottom, self.rect.width, 1)
+                supported = any(platform.rect.top == self.rect.bottom and probe.colliderect(platform.rect)
+                                for platform in nearby_platforms(platforms, probe))
+            if supported:
+                self.vel_y = 0
+                self.remainder_y = 0.0
+                self.on_ground = True
 
     def update_animation(self, dt):
-        # Update animation frame based on state
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_update > 100:  # 10fps for animations
+        # Update animation frame based on simulated time
+        self.animation_timer += dt
+        if self.animation_timer > ANIMATION_FRAME_TICKS:
             self.animation_frame = (self.animation_frame + 1) % 4
-            self.last_update = current_time
+            self.animation_timer = 0
             
         # Determine animation state
         if not self.on_ground:
@@ -186,7 +780,7 @@ class Player(pygame.sprite.Sprite):
         if not self.invincible:
             self.health -= damage
             self.invincible = True
-            self.invincible_timer = self.max_invincible_time
+            self.invincible_timer = self.timers.ticks(self.max_invincible_time)
             self.animation_state = AnimationState.DAMAGED
             if self.health <= 0:
                 self.health = 0
@@ -197,123 +791,188 @@ class Player(pygame.sprite.Sprite):
         """Attack an enemy from above"""
         if self.attack_cooldown <= 0 and self.rect.bottom <= enemy.rect.top + 10:
             enemy.take_damage(self.attack_damage)
-            self.attack_cooldown = self.max_attack_cooldown
+            self.attack_cooldown = self.timers.ticks(self.max_attack_cooldown)
             # Bounce off enemy
             self.vel_y = self.jump_power * 0.7
             return True
         return False
 
-    def draw_health_bar(self, screen, camera_x):
-        """Draw health bar above player"""
+    def draw_health_bar(self, screen, camera_x, rect=None):
+        """Draw health bar above player (at rect, if given an interpolated one)"""
+        rect = rect or self.rect
         bar_width = 50
         bar_height = 6
         health_width = int((self.health / self.max_health) * bar_width)
         
         # Draw background (red)
-        pygame.draw.rect(screen, RED, (self.rect.x - camera_x, self.rect.y - 20, bar_width, bar_height))
+        bar = pygame.draw.rect(screen, RED, (rect.x - camera_x, rect.y - 20, bar_width, bar_height))
         # Draw health (green)
-        pygame.draw.rect(screen, GREEN, (self.rect.x - camera_x, self.rect.y - 20, health_width, bar_height))
+        pygame.draw.rect(screen, GREEN, (rect.x - camera_x, rect.y - 20, health_width, bar_height))
+        return bar
 
     def get_render_image(self):
         """Get image to render (handles invincibility flashing)"""
-        if self.invincible and int(pygame.time.get_ticks() / 100) % 2:
-            # Flash during invincibility
-            flash_image = pygame.Surface((self.width, self.height))
-            flash_image.fill((255, 100, 100))
-            return flash_image
-        return self.image
-
-class Platform(pygame.sprite.Sprite):
-    def __init__(self, x, y, width, height, color=GREEN):
-        super().__init__()
-        self.image = pygame.Surface((width, height))
-        self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.width = width
-        self.height = height
+        # Flash during invincibility
+        flashing = self.invincible and int(pygame.time.get_ticks() / 100) % 2
+        return ASSETS.get((self.width, self.height), RED, FLASH_TINT if flashing else None,
+                          not self.facing_right)
 
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x, y, enemy_type="goomba"):
-        super().__init__()
+class Platform(Entity):
+    """Static platform; the facade keeps a Rect as collision code reads it constantly"""
+
+    __slots__ = ('rect', 'color')
+    default_store = ComponentStore(PLATFORM_COMPONENTS)
+    width = Column()
+    height = Column()
+
+    def __init__(self, x, y, width, height, color=GREEN, store=None):
+        super().__init__(store if store is not None else Platform.default_store)
+        self.rect = self.bounds  # Static, so read as is rather than refreshed; edits still write through
+        self.reset(x, y, width, height, color)
+
+    def reset(self, x, y, width, height, color=GREEN):
+        cells, row = self.store.cells, self.row
+        cells.x[row], cells.y[row], cells.width[row], cells.height[row] = x, y, width, height
+        self.rect.update(x, y, width, height)
+        self.color = color
+
+    @property
+    def image(self):
+        return ASSETS.get(self.rect.size, self.color)
+
+class Enemy(Entity):
+    """Patrolling enemy; its state lives in an ENEMY_COMPONENTS store row"""
+
+    __slots__ = ('enemy_type', 'timers', 'private_timers')
+    default_store = ComponentStore(ENEMY_COMPONENTS)
+    width = 30
+    height = 30
+    speed = 2
+    move_limit = 100
+    max_health = 50
+    attack_range = 40
+    attack_damage = 25
+    max_attack_cooldown = 90  # Base-rate frames
+    animation_speed = 0.1
+    work_rect = pygame.Rect(0, 0, 30, 30)  # Scratch for update(); enemies update one at a time
+    direction = Column()
+    move_counter = Column()
+    remainder_x = Column()
+    remainder_y = Column()
+    health = Column()
+    alive = Column('live')
+
+    def __init__(self, x, y, enemy_type="goomba", timers=None, store=None):
+        super().__init__(store if store is not None else Enemy.default_store)
         self.enemy_type = enemy_type
-        self.width = 30
-        self.height = 30
-        
-        # Create basic surface if no assets loaded
-        self.image = pygame.Surface((self.width, self.height))
-        self.image.fill(BROWN)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        
-        # Movement
-        self.speed = 2
-        self.direction = 1
-        self.move_counter = 0
-        self.move_limit = 100
-        
-        # Combat
-        self.health = 50
-        self.max_health = 50
-        self.alive = True
-        self.attack_range = 40
-        self.attack_damage = 25
-        self.attack_cooldown = 0
-        self.max_attack_cooldown = 90
-        
-        # Animation
-        self.animation_frame = 0
-        self.animation_speed = 0.1
-        self.last_update = pygame.time.get_ticks()
+        self.timers = timers if timers is not None else TimerWheel()
+        self.private_timers = timers is None  # Advanced by update() instead of the game
+        self.reset(x, y)
+
+    def reset(self, x, y, direction=1, move_counter=0.0, health=max_health, attack_cooldown=0):
+        """Reinitialize from a level record (x, y) or a freeze() tuple"""
+        cells, row = self.store.cells, self.row
+        cells.x[row] = cells.prev_x[row] = x
+        cells.y[row] = cells.prev_y[row] = y
+        cells.direction[row] = direction
+        cells.move_counter[row] = move_counter
+        cells.remainder_x[row] = cells.remainder_y[row] = 0.0
+        cells.health[row] = health
+        self.attack_cooldown = attack_cooldown
+
+    @property
+    def image(self):
+        return ASSETS.get((self.width, self.height), BROWN)
+
+    @property
+    def attack_cooldown(self):
+        """Ticks until the enemy can attack again"""
+        return max(self.store.cells.attack_ready[self.row] - self.timers.now, 0)
+
+    @attack_cooldown.setter
+    def attack_cooldown(self, ticks):
+        self.store.cells.attack_ready[self.row] = self.timers.now + max(ticks, 0)
 
     def update(self, platforms, player, dt):
-        if not self.alive:
+        cells, row = self.store.cells, self.row
+        if not cells.live[row]:
             return
             
-        # Update timers
-        if self.attack_cooldown > 0:
-            self.attack_cooldown -= dt
+        # Timers on a shared wheel are advanced by the game, once per tick
+        if self.private_timers:
+            self.timers.advance()
+
+        # Work on a scratch rect and the row's components, written back at the end
+        rect = self.work_rect
+        rect.update(cells.x[row], cells.y[row], self.width, self.height)
+        direction = cells.direction[row]
+        move_counter = cells.move_counter[row]
+        remainder_y = cells.remainder_y[row]
 
         # Move horizontally
-        self.rect.x += self.speed * self.direction
-        self.move_counter += 1
+        step, cells.remainder_x[row] = subpixel_step(cells.remainder_x[row], self.speed * direction * dt)
+        rect.x += step
+        move_counter += dt
 
         # Change direction if moved too far or hit a boundary
-        if self.move_counter >= self.move_limit or self.rect.left <= 0:
-            self.direction *= -1
-            self.move_counter = 0
+        if move_counter >= self.move_limit or rect.left <= 0:
+            direction *= -1
+            move_counter = 0
+        cells.direction[row] = direction
+        cells.move_counter[row] = move_counter
 
         # Check platform collisions to stay on platforms
-        on_platform = False
-        for platform in platforms:
-            if (self.rect.bottom <= platform.rect.top + 5 and 
-                self.rect.bottom + self.speed >= platform.rect.top and
-                self.rect.right > platform.rect.left and 
-                self.rect.left < platform.rect.right):
-                self.rect.bottom = platform.rect.top
-                on_platform = True
-                break
+        if isinstance(platforms, TileWorld):
+            support = platforms.support(rect.left, rect.right, rect.bottom - 5, rect.bottom + self.speed)
+        else:
+            support = None
+            ground_probe = pygame.Rect(rect.left, rect.bottom - 5, rect.width, self.speed + 6)
+            for platform in nearby_platforms(platforms, ground_probe):
+                if (rect.bottom <= platform.rect.top + 5 and 
+                    rect.bottom + self.speed >= platform.rect.top and
+                    rect.right > platform.rect.left and 
+                    rect.left < platform.rect.right):
+                    support = platform.rect.top
+                    break
+        on_platform = support is not None
+        if on_platform:
+            rect.bottom = support
+            remainder_y = 0.0
 
         # If not on platform, fall down
         if not on_platform:
-            self.rect.y += 5  # Simple gravity for enemies
+            step, remainder_y = subpixel_step(remainder_y, 5 * dt)  # Simple gravity for enemies
+            rect.y += step
+        cells.remainder_y[row] = remainder_y
+        cells.x[row], cells.y[row] = rect.x, rect.y
 
         # Check for attack on player
-        distance_to_player = abs(self.rect.centerx - player.rect.centerx)
+        distance_to_player = abs(rect.centerx - player.rect.centerx)
         if (distance_to_player < self.attack_range and 
-            self.attack_cooldown <= 0 and 
-            pygame.Rect.colliderect(self.rect, player.rect)):
+            cells.attack_ready[row] <= self.timers.now and 
+            rect.colliderect(player.rect)):
             player.take_damage(self.attack_damage)
-            self.attack_cooldown = self.max_attack_cooldown
+            self.attack_cooldown = self.timers.ticks(self.max_attack_cooldown)
+
+    def freeze(self):
+        """Compact state tuple kept while the enemy's level chunk is unloaded"""
+        cells, row = self.store.cells, self.row
+        return (cells.x[row], cells.y[row], cells.direction[row], cells.move_counter[row],
+                cells.health[row], self.attack_cooldown)
+
+    @classmethod
+    def thaw(cls, state, timers=None, store=None):
+        """Rebuild an enemy from a level record (x, y) or a freeze() tuple"""
+        enemy = cls(state[0], state[1], timers=timers, store=store)
+        if len(state) > 2:
+            enemy.reset(*state)
+        return enemy
 
     def take_damage(self, damage):
         self.health -= damage
         if self.health <= 0:
             self.health = 0
-            self.alive = False
-            self.kill()  # Remove from all sprite groups
+            self.kill()  # Remove from all sprite groups and mark dead
             return True
         return False
 
@@ -331,92 +990,852 @@ class Enemy(pygame.sprite.Sprite):
         # Draw health (green)
         pygame.draw.rect(screen, GREEN, (self.rect.x - camera_x, self.rect.y - 10, health_width, bar_height))
 
-class Coin(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.width = 20
-        self.height = 20
-        self.image = pygame.Surface((self.width, self.height))
-        pygame.draw.circle(self.image, YELLOW, (10, 10), 10)
-        self.image.fill(YELLOW)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+class PlatformColumns:
+    """Platforms bucketed into fixed-width x columns as a padded NumPy lookup table
+
+    Row c of the table lists (in platform order) every platform that a probe
+    of probe_width starting in column c could overlap, padded with -1, so a
+    batch of probes gathers its candidates with one fancy-index instead of a
+    per-entity spatial query.
+    """
+
+    def __init__(self, platforms, probe_width, column_width=SPATIAL_CELL_SIZE):
+        rects = [platform.rect for platform in platforms]
+        self.column_width = column_width
+        self.left = np.array([rect.left for rect in rects], dtype=np.int64)
+        self.right = np.array([rect.right for rect in rects], dtype=np.int64)
+        self.top = np.array([rect.top for rect in rects], dtype=np.int64)
+        if not rects:
+            self.first_column = 0
+            self.table = np.full((1, 1), -1, dtype=np.int64)
+            return
+        
+        # A probe at x overlaps a platform when left - probe_width < x < right
+        first = (self.left - probe_width + 1) // column_width
+        last = (self.right - 1) // column_width
+        self.first_column = int(first.min())
+        columns = {}
+        for platform_id, (start, end) in enumerate(zip(first.tolist(), last.tolist())):
+            for column in range(start, end + 1):
+                columns.setdefault(column, []).append(platform_id)
+        depth = max(len(ids) for ids in columns.values())
+        self.table = np.full((int(last.max()) - self.first_column + 1, depth), -1, dtype=np.int64)
+        for column, ids in columns.items():
+            self.table[column - self.first_column, :len(ids)] = ids
+
+    def candidates(self, x):
+        """Candidate platform ids (N, depth) for probes starting at x, -1 padded"""
+        column = x // self.column_width - self.first_column
+        inside = (column >= 0) & (column < len(self.table))
+        rows = self.table[np.clip(column, 0, len(self.table) - 1)]
+        if inside.all():
+            return rows
+        return np.where(inside[:, None], rows, -1)
+
+class TileWorld:
+    """Solid cells of the loaded platforms on a fixed tile grid
+
+    Each cell counts the platform rects covering it, column by column in a
+    bytearray (with a NumPy view for stamping and batch lookups), so loading
+    and unloading stream chunks that share a cell stays exact. Rects off the
+    tile grid cover every cell they touch. Collision and ground checks read
+    the few cells around an entity, however many platforms the level has.
+    """
+
+    def __init__(self, tile_size=TILE_SIZE, height=SCREEN_HEIGHT):
+        self.tile_size = tile_size
+        self.rows = -(-height // tile_size)
+        self.columns = 0
+        self.data = bytearray()
+        self.cells = np.zeros((0, self.rows), dtype=np.uint8)  # (column, row) view of data
+
+    def reserve(self, columns):
+        if columns <= self.columns:
+            return
+        columns = max(columns, self.columns * 2)
+        data = bytearray(columns * self.rows)
+        data[:len(self.data)] = self.data
+        self.data = data
+        self.cells = np.frombuffer(data, dtype=np.uint8).reshape(columns, self.rows)
+        self.columns = columns
+
+    def clear(self):
+        self.cells[:] = 0
+
+    def span(self, rect):
+        """Inclusive (first column, last column, first row, last row) of the cells rect overlaps"""
+        size = self.tile_size
+        return rect.left // size, (rect.right - 1) // size, rect.top // size, (rect.bottom - 1) // size
+
+    def stamp(self, rect):
+        """Cell slices covered by rect, growing the grid to reach it"""
+        first_column, last_column, first_row, last_row = self.span(rect)
+        first_column = max(first_column, 0)
+        first_row = max(first_row, 0)
+        last_row = min(last_row, self.rows - 1)
+        if last_column < first_column or last_row < first_row:
+            return None
+        self.reserve(last_column + 1)
+        return self.cells[first_column:last_column + 1, first_row:last_row + 1]
+
+    def add(self, rect):
+        cells = self.stamp(rect)
+        if cells is not None:
+            cells += 1
+
+    def remove(self, rect):
+        cells = self.stamp(rect)
+        if cells is not None:
+            cells -= 1
+
+    def clipped_span(self, rect):
+        first_column, last_column, first_row, last_row = self.span(rect)
+        return (max(first_column, 0), min(last_column, self.columns - 1),
+                max(first_row, 0), min(last_row, self.rows - 1))
+
+    def blocking_columns(self, rect):
+        """First and last columns holding a solid cell that overlaps rect, or None"""
+        first_column, last_column, first_row, last_row = self.clipped_span(rect)
+        rows, data = self.rows, self.data
+        blocked = [column for column in range(first_column, last_column + 1)
+                   if any(data[column * rows + first_row:column * rows + last_row + 1])]
+        if not blocked:
+            return None
+        return blocked[0], blocked[-1]
+
+    def landing(self, rect, highest):
+        """Top of the highest floor (solid cell under an empty one) overlapping rect at or below y=highest"""
+        size = self.tile_size
+        first_column, last_column, first_row, last_row = self.clipped_span(rect)
+        first_row = max(first_row, -(-highest // size))
+        rows, data = self.rows, self.data
+        floor = None
+        for column in range(first_column, last_column + 1):
+            base = column * rows
+            for row in range(first_row, last_row + 1 if floor is None else min(last_row + 1, floor)):
+                if data[base + row] and (row == 0 or not data[base + row - 1]):
+                    floor = row
+                    break
+        return None if floor is None else floor * size
+
+    def ceiling(self, rect, lowest):
+        """Bottom of the lowest ceiling (solid cell over an empty one) overlapping rect at or above y=lowest"""
+        size = self.tile_size
+        first_column, last_column, first_row, last_row = self.clipped_span(rect)
+        last_row = min(last_row, lowest // size - 1)
+        rows, data = self.rows, self.data
+        ceiling = None
+        for column in range(first_column, last_column + 1):
+            base = column * rows
+            for row in range(last_row, first_row - 1 if ceiling is None else ceiling, -1):
+                if data[base + row] and (row == rows - 1 or not data[base + row + 1]):
+                    ceiling = row
+                    break
+        return None if ceiling is None else (ceiling + 1) * size
+
+    def ground(self, rect):
+        """Whether a floor lies right under rect's bottom edge"""
+        size = self.tile_size
+        row, offset = divmod(rect.bottom, size)
+        if offset or not 0 <= row < self.rows:
+            return False
+        first_column, last_column, _, _ = self.clipped_span(rect)
+        rows, data = self.rows, self.data
+        return any(data[column * rows + row] and (row == 0 or not data[column * rows + row - 1])
+                   for column in range(first_column, last_column + 1))
+
+    def support(self, left, right, highest, lowest):
+        """Top of the highest floor between y=highest and y=lowest under left..right, or None"""
+        size = self.tile_size
+        first_column = max(left // size, 0)
+        last_column = min((right - 1) // size, self.columns - 1)
+        rows, data = self.rows, self.data
+        for row in range(max(-(-highest // size), 0), min(lowest // size, rows - 1) + 1):
+            for column in range(first_column, last_column + 1):
+                if data[column * rows + row] and (row == 0 or not data[column * rows + row - 1]):
+                    return row * size
+        return None
+
+    def supports(self, left, right, highest, lowest):
+        """support() for arrays of probes; -1 where there is none"""
+        size = self.tile_size
+        top = np.full(len(left), -1, dtype=np.int64)
+        if self.columns == 0 or len(left) == 0:
+            return top
+        cells = self.cells
+        first_column = left // size
+        last_column = (right - 1) // size
+        first_row = -(-highest // size)
+        row_count = int((lowest - highest).max()) // size + 1
+        column_count = int((last_column - first_column).max()) + 1
+        for k in range(row_count):
+            row = first_row + k
+            in_rows = (row * size <= lowest) & (row >= 0) & (row < self.rows)
+            above = np.clip(row - 1, 0, self.rows - 1)
+            row = np.clip(row, 0, self.rows - 1)
+            for j in range(column_count):
+                column = first_column + j
+                valid = in_rows & (column <= last_column) & (column >= 0) & (column < self.columns) & (top < 0)
+                column = np.clip(column, 0, self.columns - 1)
+                floor = valid & (cells[column, row] > 0) & ((row == 0) | (cells[column, above] == 0))
+                top = np.where(floor, row * size, top)
+        return top
+
+class EnemyHandle:
+    """Enemy-like view of one EnemySwarm slot, for code written against Enemy"""
+
+    def __init__(self, swarm, slot):
+        self.swarm = swarm
+        self.slot = slot
+
+    @property
+    def rect(self):
+        swarm = self.swarm
+        return pygame.Rect(int(swarm.x[self.slot]), int(swarm.y[self.slot]), swarm.width, swarm.height)
+
+    @property
+    def alive(self):
+        return bool(self.swarm.alive[self.slot])
+
+    @property
+    def attack_damage(self):
+        return self.swarm.attack_damage
+
+    def take_damage(self, damage):
+        return self.swarm.take_damage(self.slot, damage)
+
+class EnemySwarm:
+    """Patrol enemies held in NumPy arrays and updated in bulk
+
+    Each tick reproduces Enemy.update for every active enemy at once:
+    patrol and turnaround, ground snapping against the platforms, fall
+    gravity, cooldowns and contact attacks on the player. Slots move as the
+    swarm compacts, so cooldowns are kept as the tick each enemy may attack
+    again, compared against the timer wheel's clock, rather than as timers.
+    """
+
+    def __init__(self, capacity=256, timers=None):
+        # Shared stats, matching Enemy's defaults
+        self.width = 30
+        self.height = 30
+        self.speed = 2
+        self.move_limit = 100
+        self.max_health = 50
+        self.attack_range = 40
+        self.attack_damage = 25
+        self.max_attack_cooldown = 90  # Base-rate frames
+        self.image = ASSETS.get((self.width, self.height), BROWN)
+        self.timers = timers if timers is not None else TimerWheel()
+        self.private_timers = timers is None  # Advanced by update() instead of the game
         
-        # Animation for floating effect
-        self.start_y = y
-        self.float_offset = 0
-        self.float_speed = 0.05
+        self.count = 0
+        self.capacity = 0
+        self.fields = {
+            'x': np.int64, 'y': np.int64, 'prev_x': np.int64, 'prev_y': np.int64,
+            'remainder_x': np.float64, 'remainder_y': np.float64,
+            'direction': np.int64, 'move_counter': np.float64, 'health': np.float64,
+            'attack_ready': np.int64, 'alive': np.bool_, 'chunk': np.int64,
+        }
+        for name, dtype in self.fields.items():
+            setattr(self, name, np.empty(0, dtype=dtype))
+        self.reserve(capacity)
+        self.columns = PlatformColumns([], self.width)
+        self.tiles = None  # TileWorld to read ground from instead of the platform columns
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, capacity):
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, self.capacity * 2)
+        for name in self.fields:
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:self.count] = old[:self.count]
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def clear(self):
+        self.count = 0
+
+    def set_platforms(self, platforms):
+        """Rebuild the ground lookup; platforms must be in the order Enemy would scan them"""
+        self.columns = PlatformColumns(platforms, self.width)
+
+    def add(self, records, chunk=0):
+        """Append enemies from (x, y) level records or Enemy.freeze() tuples"""
+        start = self.count
+        self.reserve(start + len(records))
+        now = self.timers.now
+        for slot, state in enumerate(records, start):
+            self.x[slot] = self.prev_x[slot] = state[0]
+            self.y[slot] = self.prev_y[slot] = state[1]
+            self.remainder_x[slot] = self.remainder_y[slot] = 0.0
+            if len(state) > 2:
+                self.direction[slot], self.move_counter[slot], self.health[slot], cooldown = state[2:]
+                self.attack_ready[slot] = now + cooldown
+            else:
+                self.direction[slot] = 1
+                self.move_counter[slot] = 0
+                self.health[slot] = self.max_health
+                self.attack_ready[slot] = now
+            self.alive[slot] = True
+            self.chunk[slot] = chunk
+        self.count = start + len(records)
+
+    def remove_chunk(self, chunk):
+        """Drop a chunk's enemies, returning the survivors as Enemy.freeze() tuples"""
+        n = self.count
+        members = self.chunk[:n] == chunk
+        survivors = np.flatnonzero(members & self.alive[:n])
+        frozen = list(zip(self.x[survivors].tolist(), self.y[survivors].tolist(),
+                          self.direction[survivors].tolist(), self.move_counter[survivors].tolist(),
+                          self.health[survivors].tolist(), self.cooldowns()[survivors].tolist()))
+        self.compact(~members)
+        return frozen
+
+    def cooldowns(self):
+        """Ticks until each enemy can attack again, like Enemy.attack_cooldown"""
+        return np.maximum(self.attack_ready[:self.count] - self.timers.now, 0)
+
+    def compact(self, keep=None):
+        """Swap-remove dead (or not kept) slots so live enemies stay packed at the front"""
+        n = self.count
+        keep = self.alive[:n] if keep is None else keep & self.alive[:n]
+        kept = int(np.count_nonzero(keep))
+        holes = np.flatnonzero(~keep[:kept])
+        if holes.size:
+            movers = np.flatnonzero(keep[kept:]) + kept
+            for name in self.fields:
+                buffer = getattr(self, name)
+                buffer[holes] = buffer[movers]
+        self.count = kept
+
+    def store_previous(self):
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+    def take_damage(self, slot, damage):
+        self.health[slot] -= damage
+        if self.health[slot] <= 0:
+            self.health[slot] = 0
+            self.alive[slot] = False
+            return True
+        return False
+
+    def colliding(self, rect):
+        """Slots of live enemies overlapping rect, in slot order"""
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        hit = (self.alive[:n] & (x < rect.right) & (x + self.width > rect.left) &
+               (y < rect.bottom) & (y + self.height > rect.top))
+        return np.flatnonzero(hit).tolist()
+
+    def update(self, player, dt, active=None):
+        """Advance every live enemy (or those in the active mask) by one tick
+
+        dt is a tick length, or an array of one per slot.
+        """
+        if self.private_timers:
+            self.timers.advance()
+        n = self.count
+        if n == 0:
+            return
+        slots = self.alive[:n] if active is None else self.alive[:n] & active
+        slots = np.flatnonzero(slots)
+        if slots.size == 0:
+            return
+        if slots.size == n:
+            slots = slice(0, n)  # Everyone ticks: work on views instead of gathered copies
+        if isinstance(dt, np.ndarray):
+            dt = dt[slots]
+        
+        # Move horizontally, carrying sub-pixel remainders like subpixel_step
+        direction = self.direction[slots]
+        total = self.remainder_x[slots] + self.speed * direction * dt
+        step = np.round(total)
+        x = self.x[slots] + step.astype(np.int64)
+        self.remainder_x[slots] = total - step
+        move_counter = self.move_counter[slots] + dt
+        
+        # Change direction if moved too far or hit a boundary
+        turn = (move_counter >= self.move_limit) | (x <= 0)
+        self.direction[slots] = np.where(turn, -direction, direction)
+        self.move_counter[slots] = np.where(turn, 0, move_counter)
+        
+        # Stay on the first platform (in platform order) whose top is just below the feet
+        y = self.y[slots]
+        bottom = y + self.height
+        columns = self.columns
+        remainder_y = self.remainder_y[slots]
+        on_platform = np.zeros(len(x), dtype=np.bool_)
+        if self.tiles is not None:
+            top = self.tiles.supports(x, x + self.width, bottom - 5, bottom + self.speed)
+            on_platform = top >= 0
+            if on_platform.any():
+                y = np.where(on_platform, top - self.height, y)
+                remainder_y = np.where(on_platform, 0.0, remainder_y)
+        elif len(columns.top):
+            candidates = columns.candidates(x)
+            ids = np.maximum(candidates, 0)
+            top = columns.top[ids]
+            supports = ((candidates >= 0) &
+                        (bottom[:, None] <= top + 5) &
+                        (bottom[:, None] + self.speed >= top) &
+                        (columns.right[ids] > x[:, None]) &
+                        (columns.left[ids] < (x + self.width)[:, None]))
+            no_support = np.iinfo(np.int64).max
+            first = np.where(supports, candidates, no_support).min(axis=1)
+            on_platform = first != no_support
+            if on_platform.any():
+                y = np.where(on_platform, columns.top[np.where(on_platform, first, 0)] - self.height, y)
+                remainder_y = np.where(on_platform, 0.0, remainder_y)
+        
+        # If not on platform, fall down
+        total = remainder_y + 5 * dt
+        step = np.round(total)
+        falling = ~on_platform
+        y = np.where(falling, y + step.astype(np.int64), y)
+        self.remainder_y[slots] = np.where(falling, total - step, remainder_y)
+        self.x[slots] = x
+        self.y[slots] = y
+        
+        # Check for attack on player
+        prect = player.rect
+        now = self.timers.now
+        attacking = ((np.abs(x + self.width // 2 - prect.centerx) < self.attack_range) &
+                     (self.attack_ready[slots] <= now) &
+                     (x < prect.right) & (x + self.width > prect.left) &
+                     (y < prect.bottom) & (y + self.height > prect.top))
+        if attacking.any():
+            for _ in range(int(np.count_nonzero(attacking))):
+                player.take_damage(self.attack_damage)
+            self.attack_ready[slots] = np.where(attacking, now + self.timers.ticks(self.max_attack_cooldown),
+                                                self.attack_ready[slots])
+
+    def visible_blits(self, view, alpha, camera_x, camera_y):
+        """(surface, screen position) pairs for live enemies overlapping view"""
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        slots = np.flatnonzero(self.alive[:n] & (x < view.right) & (x + self.width > view.left) &
+                               (y < view.bottom) & (y + self.height > view.top))
+        if slots.size == 0:
+            return []
+        prev_x = self.prev_x[slots]
+        prev_y = self.prev_y[slots]
+        screen_x = np.round(prev_x + (x[slots] - prev_x) * alpha).astype(np.int64) - camera_x
+        screen_y = np.round(prev_y + (y[slots] - prev_y) * alpha).astype(np.int64) - camera_y
+        image = self.image
+        return [(image, position) for position in zip(screen_x.tolist(), screen_y.tolist())]
+
+def float_coins(store, rows, dt):
+    """Coin float system: bob the coins in rows of a COIN_COMPONENTS store about their start height"""
+    offsets = store.float_offset[rows] + COIN_FLOAT_SPEED * dt
+    store.float_offset[rows] = offsets
+    y = store.start_y[rows] + np.sin(offsets) * COIN_FLOAT_AMPLITUDE
+    whole = np.trunc(y)
+    store.y[rows] = whole + np.copysign(np.abs(y - whole) >= 0.5, y)  # Half away from zero, as Rect rounds
+
+class Coin(Entity):
+    """Floating coin; its state lives in a COIN_COMPONENTS store row"""
+
+    __slots__ = ()
+    default_store = ComponentStore(COIN_COMPONENTS)
+    width = 20
+    height = 20
+    float_speed = COIN_FLOAT_SPEED
+    start_y = Column()
+    float_offset = Column()
+
+    def __init__(self, x, y, store=None):
+        super().__init__(store if store is not None else Coin.default_store)
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        cells, row = self.store.cells, self.row
+        cells.x[row] = cells.prev_x[row] = x
+        cells.y[row] = cells.prev_y[row] = cells.start_y[row] = y
+        cells.float_offset[row] = 0.0
+
+    @property
+    def image(self):
+        return ASSETS.get((self.width, self.height), YELLOW)
 
     def update(self, dt):
-        # Floating animation
-        self.float_offset += self.float_speed
-        self.rect.y = self.start_y + math.sin(self.float_offset) * 5
+        float_coins(self.store, [self.row], dt)
+
+    def index_rect(self):
+        """Spatial index bucket, padded by the float amplitude so the bobbing coin stays indexed"""
+        cells, row = self.store.cells, self.row
+        return pygame.Rect(cells.x[row], cells.start_y[row], self.width, self.height).inflate(0, 2 * COIN_FLOAT_AMPLITUDE)
+
+class SpatialGrid:
+    """Uniform bucket grid over static rects for nearby-candidate queries"""
+
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.bounds = {}  # item -> (order, cell range) for removal and stable ordering
+        self.next_order = 0
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def __iter__(self):
+        return iter(sorted(self.bounds, key=lambda item: self.bounds[item][0]))
+
+    def cell_range(self, rect):
+        size = self.cell_size
+        return (rect.left // size, (rect.right - 1) // size,
+                rect.top // size, (rect.bottom - 1) // size)
+
+    def insert(self, item, rect=None, order=None):
+        """Add an item, bucketed by rect (defaults to item.rect), at order (defaults to last)"""
+        cells = self.cell_range(rect if rect is not None else item.rect)
+        if order is None:
+            order = self.next_order
+        self.bounds[item] = (order, cells)
+        self.next_order = max(self.next_order, order + 1)
+        min_cx, max_cx, min_cy, max_cy = cells
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                self.cells.setdefault((cx, cy), []).append(item)
+
+    def move(self, item, rect=None):
+        """Re-bucket an item after it moved; a no-op while it stays in the same cells"""
+        entry = self.bounds.get(item)
+        if entry is None:
+            self.insert(item, rect)
+            return
+        cells = self.cell_range(rect if rect is not None else item.rect)
+        if cells == entry[1]:
+            return
+        order = entry[0]
+        self.remove(item)
+        self.insert(item, rect)
+        self.bounds[item] = (order, cells)  # Keep the original draw/iteration order
+
+    def remove(self, item):
+        entry = self.bounds.pop(item, None)
+        if entry is None:
+            return
+        min_cx, max_cx, min_cy, max_cy = entry[1]
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket is not None:
+                    bucket.remove(item)
+                    if not bucket:
+                        del self.cells[(cx, cy)]
+
+    def clear(self):
+        self.cells.clear()
+        self.bounds.clear()
+        self.next_order = 0
+
+    def query(self, rect):
+        """Return items whose cells overlap rect, in insertion order"""
+        min_cx, max_cx, min_cy, max_cy = self.cell_range(rect)
+        cells = self.cells
+        found = {}
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    for item in bucket:
+                        found[item] = None
+        if len(found) > 1:
+            bounds = self.bounds
+            return sorted(found, key=lambda item: bounds[item][0])
+        return list(found)
+
+class LevelChunkCache:
+    """Static scenery rasterized into fixed-width chunk surfaces
+
+    Chunks are baked from the platform index the first time the camera needs
+    them (or up front with prebake) and kept in a small LRU, so drawing the
+    level costs a few chunk blits however many platforms it has.
+    """
+
+    def __init__(self, platform_index, chunk_width=LEVEL_CHUNK_WIDTH, height=SCREEN_HEIGHT,
+                 max_chunks=MAX_BAKED_CHUNKS, background=SKY_BLUE):
+        self.platform_index = platform_index
+        self.chunk_width = chunk_width
+        self.height = height
+        self.max_chunks = max_chunks
+        self.background = background
+        self.chunks = OrderedDict()
+        self.spare = []  # Surfaces of dropped chunks, repainted by the next bakes
+        self.bakes = 0
+        self.hits = 0  # Bakes into a spare surface
+        self.misses = 0  # Bakes that allocated one
+
+    def clear(self):
+        self.spare.extend(self.chunks.values())
+        self.chunks.clear()
+
+    def prebake(self, extent):
+        """Bake every chunk up to extent, if they all fit in the cache"""
+        count = -(-extent // self.chunk_width)
+        if count > self.max_chunks:
+            return
+        for chunk_index in range(count):
+            self.get_chunk(chunk_index)
+
+    def bake(self, chunk_index):
+        area = pygame.Rect(chunk_index * self.chunk_width, 0, self.chunk_width, self.height)
+        if self.spare:
+            surface = self.spare.pop()
+            self.hits += 1
+        else:
+            surface = pygame.Surface(area.size)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            self.misses += 1
+        surface.fill(self.background)
+        surface.blits([(platform.image, (platform.rect.x - area.x, platform.rect.y - area.y))
+                       for platform in self.platform_index.query(area)], doreturn=False)
+        self.bakes += 1
+        return surface
+
+    def get_chunk(self, chunk_index):
+        surface = self.chunks.get(chunk_index)
+        if surface is None:
+            surface = self.bake(chunk_index)
+            self.chunks[chunk_index] = surface
+            if len(self.chunks) > self.max_chunks:
+                self.spare.append(self.chunks.popitem(last=False)[1])
+        else:
+            self.chunks.move_to_end(chunk_index)
+        return surface
+
+    def covers(self, view):
+        return view.left >= 0 and view.top >= 0 and view.bottom <= self.height
+
+    def blits(self, view):
+        """(surface, screen position) pairs for the chunks overlapping view"""
+        first = max(0, view.left // self.chunk_width)
+        last = (view.right - 1) // self.chunk_width
+        return [(self.get_chunk(chunk_index), (chunk_index * self.chunk_width - view.x, -view.y))
+                for chunk_index in range(first, last + 1)]
+
+
+class TextCache:
+    """Rendered text surfaces keyed on (font, text, colour)
+
+    HUD and menu strings rarely change between frames, so a line is only
+    rasterized again when its value does; the least recently used surfaces
+    are dropped once the cache is full.
+    """
+
+    def __init__(self, capacity=TEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            surface = font.render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.capacity:
+                self.surfaces.popitem(last=False)
+        else:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def __len__(self):
+        return len(self.surfaces)
+
+def nearby_platforms(platforms, rect):
+    """Narrow a platform collection to candidates near rect when it is indexed"""
+    if isinstance(platforms, SpatialGrid):
+        return platforms.query(rect)
+    return platforms
 
 class ParticleSystem:
-    def __init__(self):
-        self.particles = []
+    """Structure-of-arrays particle engine backed by preallocated NumPy buffers"""
+
+    def __init__(self, capacity=1024, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.capacity = 0
+        self.count = 0
+        self.pos = np.empty((0, 2), dtype=np.float32)
+        self.vel = np.empty((0, 2), dtype=np.float32)
+        self.life = np.empty(0, dtype=np.float32)
+        self.max_life = np.empty(0, dtype=np.float32)
+        self.color = np.empty((0, 3), dtype=np.float32)
+        self.hits = 0  # Emits that fit the preallocated buffers
+        self.misses = 0  # Emits that had to grow them
+        self.reserve(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, capacity):
+        """Grow the buffers (geometrically) so they hold at least capacity particles"""
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, self.capacity * 2)
+        n = self.count
+        for name in ('pos', 'vel', 'life', 'max_life', 'color'):
+            old = getattr(self, name)
+            grown = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:n] = old[:n]
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def emit(self, x, y, vx, vy, life, color=YELLOW):
+        """Append a batch of particles; scalars broadcast, arrays must share a length"""
+        count = max(np.size(x), np.size(y), np.size(vx), np.size(vy), np.size(life))
+        if count == 0:
+            return
+        start = self.count
+        end = start + count
+        if end > self.capacity:
+            self.misses += 1
+            self.reserve(end)
+        else:
+            self.hits += 1
+        self.pos[start:end, 0] = x
+        self.pos[start:end, 1] = y
+        self.vel[start:end, 0] = vx
+        self.vel[start:end, 1] = vy
+        self.life[start:end] = life
+        self.max_life[start:end] = life
+        self.color[start:end] = color
+        self.count = end
 
     def add_coin_particles(self, x, y, count=5):
-        for _ in range(count):
-            particle = {
-                'x': x,
-                'y': y,
-                'vx': (pygame.time.get_ticks() % 10) - 5,  # Random velocity
-                'vy': (pygame.time.get_ticks() % 10) - 8,  # Random velocity
-                'life': 30,  # Frames until death
-                'max_life': 30,
-                'color': YELLOW
-            }
-            self.particles.append(particle)
+        self.emit(
+            x,
+            y,
+            self.rng.integers(-5, 5, count),  # Random velocity
+            self.rng.integers(-8, 2, count),  # Random velocity
+            30  # Frames until death
+        )
+
+    def clear(self):
+        self.count = 0
 
     def update(self, dt):
-        for particle in self.particles[:]:  # Copy list to avoid modification during iteration
-            particle['x'] += particle['vx']
-            particle['y'] += particle['vy']
-            particle['vy'] += 0.2  # Gravity
-            particle['life'] -= dt
-            
-            if particle['life'] <= 0:
-                self.particles.remove(particle)
+        n = self.count
+        if n == 0:
+            return
+        pos = self.pos[:n]
+        vel = self.vel[:n]
+        life = self.life[:n]
+        pos += vel * dt
+        vel[:, 1] += 0.2 * dt  # Gravity
+        life -= dt
+
+        dead = life <= 0
+        if not dead.any():
+            return
+        # Swap-remove: live particles from the tail fill the dead slots at the head
+        alive_count = n - int(np.count_nonzero(dead))
+        holes = np.flatnonzero(dead[:alive_count])
+        if holes.size:
+            movers = np.flatnonzero(~dead[alive_count:]) + alive_count
+            for buffer in (self.pos, self.vel, self.life, self.max_life, self.color):
+                buffer[holes] = buffer[movers]
+        self.count = alive_count
 
     def draw(self, screen, camera_x):
-        for particle in self.particles:
-            alpha = particle['life'] / particle['max_life']
-            color = tuple(int(c * alpha) for c in particle['color'])
-            pygame.draw.circle(
-                screen, 
-                color, 
-                (int(particle['x'] - camera_x), int(particle['y'])), 
-                3
-            )
+        n = self.count
+        if n == 0:
+            return
+        screen_x = self.pos[:n, 0] - camera_x
+        screen_y = self.pos[:n, 1]
+        width, height = screen.get_size()
+        visible = np.flatnonzero((screen_x > -3) & (screen_x < width + 3) &
+                                 (screen_y > -3) & (screen_y < height + 3))
+        if visible.size == 0:
+            return
+        alpha = self.life[visible] / self.max_life[visible]
+        colors = (self.color[visible] * alpha[:, None]).astype(np.uint8).tolist()
+        xs = screen_x[visible].astype(np.int32).tolist()
+        ys = screen_y[visible].astype(np.int32).tolist()
+        draw_circle = pygame.draw.circle
+        for color, px, py in zip(colors, xs, ys):
+            draw_circle(screen, color, (px, py), 3)
+
+    def screen_bounds(self, camera_x):
+        """Screen rect covering every live particle, or None when there are none"""
+        n = self.count
+        if n == 0:
+            return None
+        xs = self.pos[:n, 0].astype(np.int32)
+        ys = self.pos[:n, 1].astype(np.int32)
+        left, top = int(xs.min()) - camera_x - 3, int(ys.min()) - 3
+        return pygame.Rect(left, top, int(xs.max()) - camera_x + 4 - left, int(ys.max()) + 4 - top)
 
 class Camera:
     def __init__(self, width, height):
         self.camera = pygame.Rect(0, 0, width, height)
         self.width = width
         self.height = height
+        self.level_width = None  # Right boundary, None for unbounded levels
+        self.prev_pos = self.camera.topleft
+
+    def store_previous(self):
+        """Remember the current offset as the start point for render interpolation"""
+        self.prev_pos = self.camera.topleft
 
-    def apply(self, entity):
-        return entity.rect.move(-self.camera.x, -self.camera.y)
+    def offset(self, alpha=1.0):
+        """Camera offset blended between the last two simulation ticks"""
+        if alpha >= 1.0:
+            return self.camera.topleft
+        prev_x, prev_y = self.prev_pos
+        return (round(prev_x + (self.camera.x - prev_x) * alpha),
+                round(prev_y + (self.camera.y - prev_y) * alpha))
+
+    def apply(self, entity, alpha=1.0):
+        if alpha >= 1.0:
+            return entity.rect.move(-self.camera.x, -self.camera.y)
+        offset_x, offset_y = self.offset(alpha)
+        return interpolated_rect(entity, alpha).move(-offset_x, -offset_y)
 
     def update(self, target):
-        # Center camera on target
-        x = -target.rect.centerx + int(SCREEN_WIDTH / 2)
-        y = -target.rect.centery + int(SCREEN_HEIGHT / 2)
+        # Center camera on target; camera holds the visible area in world coordinates
+        x = target.rect.centerx - SCREEN_WIDTH // 2
+        y = target.rect.centery - SCREEN_HEIGHT // 2
 
         # Limit scrolling to map boundaries
-        x = min(0, x)  # Left boundary
-        y = max(-(10000 - SCREEN_WIDTH), y)  # Right boundary (assuming level width)
-        y = min(0, y)  # Top boundary
-        y = max(-(10000 - SCREEN_HEIGHT), y)  # Bottom boundary
+        if self.level_width is not None:
+            x = min(x, self.level_width - self.width)  # Right boundary
+        x = max(0, x)  # Left boundary
+        y = max(0, min(y, SCREEN_HEIGHT - self.height))  # Levels are one screen tall
+
+        self.camera.topleft = (x, y)
 
-        self.camera = pygame.Rect(x, y, self.width, self.height)
+def interpolated_rect(entity, alpha):
+    """Entity rect blended from its previous-tick position (static entities pass through)"""
+    prev_pos = getattr(entity, 'prev_pos', None)
+    if prev_pos is None or alpha >= 1.0:
+        return entity.rect
+    prev_x, prev_y = prev_pos
+    rect = entity.rect
+    return pygame.Rect(round(prev_x + (rect.x - prev_x) * alpha),
+                       round(prev_y + (rect.y - prev_y) * alpha),
+                       rect.width, rect.height)
 
 class LevelManager:
     def __init__(self):
         self.levels = []
         self.current_level = 0
+        self.sources = {}  # Level data id -> (level data, its DictLevelSource), reused by later loads
         self.load_levels()
 
     def load_levels(self):
@@ -456,83 +1875,491 @@ class LevelManager:
         
         self.levels = [level1, level2]
 
+    @staticmethod
+    def generate_level(segments, seed=0):
+        """Build a procedural level in the load_levels format, 400px per segment"""
+        rng = random.Random(seed)
+        platforms, enemies, coins = [], [], []
+        for i in range(segments):
+            x = i * 400
+            platforms.append((x, SCREEN_HEIGHT - 40, 400, 40))
+            for j in range(2):
+                platforms.append((x + 60 + j * 180, rng.randrange(250, 460, 10), 100, 20))
+            enemies.append((x + rng.randrange(100, 300), SCREEN_HEIGHT - 70))
+            coins.extend((x + 50 + k * 90, rng.randrange(200, 420, 10)) for k in range(4))
+        return {'platforms': platforms, 'enemies': enemies, 'coins': coins}
+
     def get_current_level_data(self):
         if 0 <= self.current_level < len(self.levels):
             return self.levels[self.current_level]
         return self.levels[0]  # Default to first level
 
+    def get_current_level_source(self):
+        """Chunked view of the current level for streaming"""
+        level_data = self.get_current_level_data()
+        if 'source' in level_data:
+            return level_data['source']
+        cached = self.sources.get(id(level_data))
+        if cached is None or cached[0] is not level_data:
+            cached = self.sources[id(level_data)] = (level_data, DictLevelSource(level_data))
+        return cached[1]
+
+class DictLevelSource:
+    """Level dict records bucketed into stream chunks
+
+    Platforms are split at chunk edges so each piece belongs to exactly one
+    chunk; enemies and coins belong to the chunk of their spawn point.
+    """
+
+    def __init__(self, level_data, chunk_width=STREAM_CHUNK_WIDTH):
+        self.chunk_width = chunk_width
+        self.chunks = {}
+        for x, y, width, height in level_data['platforms']:
+            right = x + width
+            while x < right:
+                chunk_index = x // chunk_width
+                piece_right = min(right, (chunk_index + 1) * chunk_width)
+                self.records(chunk_index)['platforms'].append((x, y, piece_right - x, height))
+                x = piece_right
+        for kind in ('enemies', 'coins'):
+            for x, y in level_data[kind]:
+                self.records(x // chunk_width)[kind].append((x, y))
+        self.platform_count = sum(len(chunk['platforms']) for chunk in self.chunks.values())
+        self.enemy_count = len(level_data['enemies'])
+        self.coin_count = len(level_data['coins'])
+        self.width = level_data.get('width') or max(
+            [x + width for x, _, width, _ in level_data['platforms']] +
+            [x + 30 for x, _ in level_data['enemies']] +
+            [x + 20 for x, _ in level_data['coins']] + [SCREEN_WIDTH])
+        self.chunk_count = -(-self.width // chunk_width)
+
+    def records(self, chunk_index):
+        chunk = self.chunks.get(chunk_index)
+        if chunk is None:
+            chunk = self.chunks[chunk_index] = {'platforms': [], 'enemies': [], 'coins': []}
+        return chunk
+
+    def load_chunk(self, chunk_index):
+        return self.chunks.get(chunk_index, {'platforms': [], 'enemies': [], 'coins': []})
+
+class EndlessLevelSource:
+    """Procedurally generated level of unbounded length, built one chunk at a time"""
+
+    def __init__(self, seed=0, chunk_width=STREAM_CHUNK_WIDTH):
+        self.seed = seed
+        self.chunk_width = chunk_width
+        self.width = None
+        self.chunk_count = None
+        self.platform_count = None
+        self.enemy_count = None
+        self.coin_count = None
+
+    def load_chunk(self, chunk_index):
+        rng = random.Random(self.seed * 1000003 + chunk_index)
+        x = chunk_index * self.chunk_width
+        chunk = {'platforms': [(x, SCREEN_HEIGHT - 40, self.chunk_width, 40)], 'enemies': [], 'coins': []}
+        step = self.chunk_width // 4
+        for i in range(4):
+            left = x + i * step
+            chunk['platforms'].append((left + 40, rng.randrange(250, 460, 10), 100, 20))
+            chunk['coins'].append((left + 80, rng.randrange(200, 420, 10)))
+            if chunk_index > 0 and i % 2:
+                chunk['enemies'].append((left + rng.randrange(0, step - 30), SCREEN_HEIGHT - 70))
+        return chunk
+
+def pool_sizes(source, window=POOL_WINDOW_CHUNKS):
+    """Platforms, enemies and coins to preallocate for a level source
+
+    A source's per-chunk average over the most chunks a stream keeps loaded,
+    capped at its totals; POOL_DEFAULT_SIZE where it reports no counts.
+    """
+    sizes = []
+    for count in (getattr(source, 'platform_count', None), source.enemy_count, source.coin_count):
+        if count is None or not source.chunk_count:
+            sizes.append(POOL_DEFAULT_SIZE)
+        else:
+            sizes.append(min(count, -(-count * window // source.chunk_count)))
+    return sizes
+
+class LevelStream:
+    """Tracks which level chunks are loaded, active or frozen around the camera"""
+
+    def __init__(self, source, active_radius=STREAM_ACTIVE_RADIUS, load_radius=STREAM_LOAD_RADIUS,
+                 evict_radius=STREAM_EVICT_RADIUS):
+        self.source = source
+        self.chunk_width = source.chunk_width
+        self.active_radius = active_radius
+        self.load_radius = load_radius
+        self.evict_radius = evict_radius
+        self.loaded = {}  # chunk index -> {'platforms': [...], 'enemies': [...], 'coins': [...]} sprites
+        self.frozen = {}  # chunk index -> {'enemies': [...], 'coins': [...]} compact records
+        self.view_range = None
+        self.remaining_enemies = source.enemy_count
+        self.remaining_coins = source.coin_count
+
+    def chunk_range(self, view):
+        first = max(0, view.left // self.chunk_width)
+        last = max(first, (view.right - 1) // self.chunk_width)
+        return first, last
+
+    def plan(self, view):
+        """Chunks to load and evict for the camera view, cheap while the view stays put"""
+        view_range = self.chunk_range(view)
+        if view_range == self.view_range:
+            return [], []
+        self.view_range = first, last = view_range
+        evict = [chunk_index for chunk_index in self.loaded
+                 if chunk_index < first - self.evict_radius or chunk_index > last + self.evict_radius]
+        end = last + self.load_radius + 1
+        if self.source.chunk_count is not None:
+            end = min(end, self.source.chunk_count)
+        load = [chunk_index for chunk_index in range(max(0, first - self.load_radius), end)
+                if chunk_index not in self.loaded]
+        return load, evict
+
+    def records(self, chunk_index):
+        """Level records for a chunk, with frozen enemy and coin state if it was visited"""
+        records = self.source.load_chunk(chunk_index)
+        frozen = self.frozen.pop(chunk_index, None)
+        if frozen is not None:
+            records = {'platforms': records['platforms'], 'enemies': frozen['enemies'],
+                       'coins': frozen['coins']}
+        return records
+
+    def active_range(self):
+        """Inclusive chunk index range whose entities get updated"""
+        first, last = self.view_range
+        return first - self.active_radius, last + self.active_radius
+
+    def range_within(self, view, distance):
+        """Inclusive chunk index range overlapping view widened by distance px each side"""
+        return (view.left - distance) // self.chunk_width, (view.right + distance - 1) // self.chunk_width
+
+    def active_chunks(self):
+        if self.view_range is None:
+            return
+        first, last = self.active_range()
+        for chunk_index in range(first, last + 1):
+            chunk = self.loaded.get(chunk_index)
+            if chunk is not None:
+                yield chunk
+
+    def coin_collected(self):
+        if self.remaining_coins:
+            self.remaining_coins -= 1
+
+    def enemy_defeated(self):
+        if self.remaining_enemies:
+            self.remaining_enemies -= 1
+
+    def is_cleared(self):
+        return self.remaining_enemies == 0 and self.remaining_coins == 0
+
+# Packed world state for Game.snapshot() and Game.restore()
+GAME_STATE = struct.Struct('<bq?qqqqqqq')  # state, level, view range known, view first/last, camera x/y, remaining enemies/coins, timer tick
+PLAYER_STATE = struct.Struct('<qqdddd??dq?qqqqbqd')
+CHUNK_LOD = struct.Struct('<dq')  # Update LOD dt owed and ticks waited
+ENEMY_STATE = np.dtype([('x', np.int64), ('y', np.int64), ('remainder_x', np.float64), ('remainder_y', np.float64),
+                        ('direction', np.int64), ('move_counter', np.float64), ('health', np.float64),
+                        ('attack_cooldown', np.int64), ('alive', np.bool_)])
+COIN_STATE = np.dtype([('x', np.int64), ('y', np.int64), ('start_y', np.int64), ('float_offset', np.float64),
+                       ('alive', np.bool_)])
+FROZEN_ENEMY = np.dtype([('x', np.int64), ('y', np.int64), ('direction', np.int64), ('move_counter', np.float64),
+                         ('health', np.float64), ('attack_cooldown', np.int64)])
+FROZEN_COIN = np.dtype([('x', np.int64), ('y', np.int64)])
+PARTICLE_FIELDS = ('pos', 'vel', 'life', 'max_life', 'color')
+
+
+class WorldSnapshot(NamedTuple):
+    """Simulated world state packed into structs and arrays, from Game.snapshot()"""
+    source: object  # Level source the stream was reading; restoring across sources rebuilds the stream
+    scalars: bytes  # GAME_STATE then PLAYER_STATE
+    rng_state: dict
+    chunks: tuple  # (chunk index, serial, index orders, CHUNK_LOD, ENEMY_STATE array, COIN_STATE array) per loaded chunk
+    frozen: tuple  # (chunk index, FROZEN_ENEMY array, FROZEN_COIN array) per frozen chunk
+    swarm: tuple  # EnemySwarm field arrays, empty without the swarm
+    particles: tuple  # ParticleSystem arrays, in PARTICLE_FIELDS order
+
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Enhanced Super Mario-Style Game")
+    def __init__(self, sim_rate=SIM_TICK_RATE, render_fps=FPS, max_catch_up_ticks=MAX_CATCH_UP_TICKS,
+                 headless=False, input_source=None, seed=None, batch_enemies=False, profile=False,
+                 dirty_rendering=False, tile_world=False, update_lod=False, manage_gc=False, trace_memory=False):
+        # Headless games draw into an off-screen surface and never open a window
+        self.headless = headless
+        init_pygame(headless)
+        if headless:
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Enhanced Super Mario-Style Game")
         self.clock = pygame.time.Clock()
+        self.input_source = input_source or (ScriptedInput() if headless else KeyboardInput())
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
         
         # Game state
         self.state = GameState.PLAYING
         self.running = True
         
-        # Create sprite groups
-        self.all_sprites = pygame.sprite.Group()
-        self.platforms = pygame.sprite.Group()
-        self.enemies = pygame.sprite.Group()
-        self.coins = pygame.sprite.Group()
-        self.particles = ParticleSystem()
+        # Component stores holding the level entities; Platform, Enemy and Coin are facades over their rows
+        self.platform_store = ComponentStore(PLATFORM_COMPONENTS)
+        self.enemy_store = ComponentStore(ENEMY_COMPONENTS)
+        self.coin_store = ComponentStore(COIN_COMPONENTS)
+        # Facades released by unloaded chunks and finished levels, reused by the next ones built
+        self.platform_pool = EntityPool(lambda: Platform(0, 0, 0, 0, store=self.platform_store))
+        self.enemy_pool = EntityPool(lambda: Enemy(0, 0, timers=self.timers, store=self.enemy_store))
+        self.coin_pool = EntityPool(lambda: Coin(0, 0, self.coin_store))
+        self.particles = ParticleSystem(rng=self.rng)
+        
+        # Static spatial indexes, rebuilt in create_level
+        self.platform_index = SpatialGrid()
+        self.coin_index = SpatialGrid()
+        self.enemy_index = SpatialGrid()  # Dynamic, re-bucketed as enemies move
+        self.level_chunks = LevelChunkCache(self.platform_index)
+        self.level_stream = None
+        self.next_chunk_serial = 0  # Identifies loaded chunk instances, so restore() can reuse them
+        self.checkpoint = None  # F5 saves a snapshot here, F9 restores it
+        # Invincibility, cooldowns and other timed effects, keyed on the simulation tick
+        self.timers = TimerWheel(BASE_TICK_RATE / sim_rate)
+        # Optional vectorized enemy engine in place of per-sprite Enemy updates
+        self.enemy_swarm = EnemySwarm(timers=self.timers) if batch_enemies else None
+        # Optional tile grid that entities collide with instead of the platform rects
+        self.tile_world = TileWorld() if tile_world else None
+        self.collision_world = self.platform_index if self.tile_world is None else self.tile_world
+        if self.enemy_swarm is not None:
+            self.enemy_swarm.tiles = self.tile_world
+        # Optional distance-based update rates for enemies and coins, in place of the plain active window
+        self.update_lod = update_lod
         
         # Initialize systems
         self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
         self.level_manager = LevelManager()
         
         # Create player
-        self.player = Player()
-        self.all_sprites.add(self.player)
+        self.player = Player(timers=self.timers)
         
         # Create level
         self.create_level()
         
         # UI elements
-        self.font_large = pygame.font.SysFont(None, 72)
-        self.font_medium = pygame.font.SysFont(None, 36)
-        self.font_small = pygame.font.SysFont(None, 24)
+        self.fonts = {}  # Loaded on first use, by size
+        self.text_cache = TextCache()
+        self.overlays = {}  # Translucent fills, built once per (size, colour, alpha)
+        
+        # Fixed-timestep timing
+        self.render_fps = render_fps
+        self.sim_rate = sim_rate
+        self.tick_seconds = 1.0 / sim_rate
+        self.tick_dt = BASE_TICK_RATE / sim_rate  # Tick length in base-rate frames
+        self.max_catch_up_ticks = max_catch_up_ticks
+        self.dt = self.tick_dt
+        self.render_alpha = 1.0
+        self.controls = IDLE_INPUT
         
-        # Timing
-        self.last_time = pygame.time.get_ticks()
-        self.dt = 0
+        # Optional dirty-rect presentation while the camera holds still
+        self.dirty_rendering = dirty_rendering
+        self.full_redraw = True  # Forces the next draw to repaint and present the whole screen
+        self.last_frame_key = None
+        self.drawn_rects = []  # Screen rects holding sprites, particles and HUD from the last draw
+        self.presented_rects = None  # Rects pushed by the last draw, None after a full frame
+        
+        # Per-phase frame profiler; F3 toggles the overlay, F4 exports the trace
+        self.profiler = FrameProfiler(enabled=profile or trace_memory)
+        self.show_profile = False
+        self.profile_lines = []
+        self.frame_start = time.perf_counter()
+        
+        # Optional GC scheduling: no automatic collections during play, explicit ones between frames and on pause
+        self.gc_scheduler = GCScheduler(enabled=manage_gc)
+        # Optional per-frame allocation and collection pause counters, reported through the profiler
+        self.memory_monitor = None
+        if trace_memory:
+            self.memory_monitor = MemoryMonitor()
+            self.memory_monitor.start()
+
+    @property
+    def platforms(self):
+        """Platforms of the loaded chunks"""
+        return [platform for chunk in self.level_stream.loaded.values() for platform in chunk['platforms']]
+
+    @property
+    def enemies(self):
+        """Live sprite-engine enemies of the loaded chunks"""
+        return [enemy for chunk in self.level_stream.loaded.values() for enemy in chunk['enemies'] if enemy.alive]
+
+    @property
+    def coins(self):
+        """Uncollected coins of the loaded chunks"""
+        return [coin for chunk in self.level_stream.loaded.values() for coin in chunk['coins'] if coin.alive()]
+
+    def font(self, size):
+        """UI font of the given size, loaded the first time it is drawn"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(resolve_font(UI_FONT), size)
+            self.fonts[size] = font
+        return font
+
+    @property
+    def font_large(self):
+        return self.font(72)
+
+    @property
+    def font_medium(self):
+        return self.font(36)
+
+    @property
+    def font_small(self):
+        return self.font(24)
 
     def create_level(self):
-        # Clear existing sprites
-        self.platforms.empty()
-        self.enemies.empty()
-        self.coins.empty()
-        self.all_sprites.empty()
+        self.reset_world(self.level_manager.get_current_level_source())
         
-        # Get level data
-        level_data = self.level_manager.get_current_level_data()
+        # Place the player at the start
+        self.player.rect.x = 100
+        self.player.rect.y = 400
+        self.player.prev_pos = self.player.rect.topleft
+        
+        self.camera.update(self.player)
+        self.camera.store_previous()
+        self.update_stream()
+        
+        self.full_redraw = True
+        
+        # Bake the loaded static scenery now so the first frames do not pay for it;
+        # headless games have no frame pacing to protect and bake on first draw, if ever
+        if not self.headless:
+            loaded_right = (max(self.level_stream.loaded) + 1) * self.level_stream.chunk_width
+            self.level_chunks.prebake(loaded_right)
+
+    def reset_world(self, source):
+        """Empty the world and start streaming source"""
+        # Return the loaded entities to their pools, then top the pools up for the new level
+        if self.level_stream is not None:
+            for chunk in self.level_stream.loaded.values():
+                self.release_chunk(chunk)
+        platforms, enemies, coins = pool_sizes(source)
+        self.platform_pool.reserve(platforms)
+        self.coin_pool.reserve(coins)
+        if self.enemy_swarm is not None:
+            self.enemy_swarm.reserve(enemies)
+        else:
+            self.enemy_pool.reserve(enemies)
+        self.platform_index.clear()
+        self.coin_index.clear()
+        self.enemy_index.clear()
+        self.level_chunks.clear()
+        if self.enemy_swarm is not None:
+            self.enemy_swarm.clear()
+        if self.tile_world is not None:
+            self.tile_world.clear()
+        
+        # Stream the level in chunks around the camera
+        self.level_stream = LevelStream(source)
+        self.player.level_width = source.width
+        self.camera.level_width = source.width
+
+    def load_chunk(self, chunk_index):
+        """Instantiate a level chunk's entities and add them to the world"""
+        self.build_chunk(chunk_index, self.level_stream.records(chunk_index))
+
+    def build_chunk(self, chunk_index, records, serial=None, orders=None):
+        """Add a chunk built from records; serial and index orders default to fresh ones"""
+        if serial is None:
+            serial = self.next_chunk_serial
+            self.next_chunk_serial += 1
+        if orders is None:
+            orders = (self.platform_index.next_order, self.enemy_index.next_order, self.coin_index.next_order)
+        platform_order, enemy_order, coin_order = orders
+        chunk = {'platforms': [], 'enemies': [], 'coins': [], 'serial': serial, 'orders': orders,
+                 'pending': 0.0, 'waiting': chunk_index % LOD_MID_INTERVAL}  # Update LOD: dt owed, ticks since update
         
         # Create platforms
-        for x, y, width, height in level_data['platforms']:
-            platform = Platform(x, y, width, height)
-            self.platforms.add(platform)
-            self.all_sprites.add(platform)
+        for offset, (x, y, width, height) in enumerate(records['platforms']):
+            platform = self.platform_pool.acquire(x, y, width, height)
+            self.platform_index.insert(platform, order=platform_order + offset)
+            if self.tile_world is not None:
+                self.tile_world.add(platform.rect)
+            chunk['platforms'].append(platform)
         
         # Create enemies
-        for x, y in level_data['enemies']:
-            enemy = Enemy(x, y)
-            self.enemies.add(enemy)
-            self.all_sprites.add(enemy)
+        if self.enemy_swarm is not None:
+            self.enemy_swarm.add(records['enemies'], chunk_index)
+        else:
+            for offset, state in enumerate(records['enemies']):
+                enemy = self.enemy_pool.acquire(*state)
+                self.enemy_index.insert(enemy, order=enemy_order + offset)
+                chunk['enemies'].append(enemy)
         
         # Create coins
-        for x, y in level_data['coins']:
-            coin = Coin(x, y)
-            self.coins.add(coin)
-            self.all_sprites.add(coin)
+        for offset, (x, y) in enumerate(records['coins']):
+            coin = self.coin_pool.acquire(x, y)
+            self.coin_index.insert(coin, coin.index_rect(), coin_order + offset)
+            chunk['coins'].append(coin)
         
-        # Add player to group
-        self.all_sprites.add(self.player)
-        self.player.rect.x = 100
-        self.player.rect.y = 400
+        # Store rows of the chunk's entities, for the systems that run over whole columns
+        chunk['enemy_rows'] = np.array([enemy.row for enemy in chunk['enemies']], dtype=np.intp)
+        chunk['coin_rows'] = np.array([coin.row for coin in chunk['coins']], dtype=np.intp)
+        
+        self.level_stream.loaded[chunk_index] = chunk
+        return chunk
+
+    def evict_chunk(self, chunk_index):
+        """Remove a chunk's entities, freezing surviving enemies and coins as records"""
+        chunk = self.level_stream.loaded[chunk_index]
+        frozen = {'enemies': [], 'coins': []}
+        if self.enemy_swarm is not None:
+            frozen['enemies'] = self.enemy_swarm.remove_chunk(chunk_index)
+        frozen['enemies'].extend(enemy.freeze() for enemy in chunk['enemies'] if enemy.alive)
+        store, rows = self.coin_store, chunk['coin_rows']
+        rows = rows[store.live[rows]]
+        frozen['coins'] = list(zip(store.x[rows].tolist(), store.start_y[rows].tolist()))
+        self.discard_chunk(chunk_index)
+        self.level_stream.frozen[chunk_index] = frozen
+
+    def discard_chunk(self, chunk_index):
+        """Remove a loaded chunk's entities from the world without keeping their state"""
+        chunk = self.level_stream.loaded.pop(chunk_index)
+        for platform in chunk['platforms']:
+            self.platform_index.remove(platform)
+            if self.tile_world is not None:
+                self.tile_world.remove(platform.rect)
+        for enemy in chunk['enemies']:
+            if enemy.alive:
+                self.enemy_index.remove(enemy)
+        for coin in chunk['coins']:
+            if coin.alive():
+                self.coin_index.remove(coin)
+        self.release_chunk(chunk)
+
+    def release_chunk(self, chunk):
+        """Return a chunk's entities, defeated and collected ones included, to their pools"""
+        for pool, kind in ((self.platform_pool, 'platforms'), (self.enemy_pool, 'enemies'),
+                           (self.coin_pool, 'coins')):
+            for entity in chunk[kind]:
+                pool.release(entity)
+            chunk[kind] = []
+
+    def pool_stats(self):
+        """{pool: {'hits', 'misses', ...}} for the entity pools, particle buffers and baked scenery surfaces"""
+        stats = {name: pool.stats() for name, pool in (('platforms', self.platform_pool),
+                                                       ('enemies', self.enemy_pool), ('coins', self.coin_pool))}
+        for name, pool in (('particles', self.particles), ('scenery', self.level_chunks)):
+            stats[name] = {'hits': pool.hits, 'misses': pool.misses}
+        return stats
+
+    def update_stream(self):
+        """Load chunks the camera approaches and evict ones it left behind"""
+        load, evict = self.level_stream.plan(self.camera.camera)
+        for chunk_index in evict:
+            self.evict_chunk(chunk_index)
+        for chunk_index in load:
+            self.load_chunk(chunk_index)
+        if self.enemy_swarm is not None and (load or evict):
+            self.enemy_swarm.set_platforms(self.platform_index)
 
     def handle_events(self):
-        for event in pygame.event.get():
+        for event in self.input_source.events():
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
@@ -547,40 +2374,151 @@ class Game:
                     self.restart_game()
                 elif event.key == pygame.K_n and self.state == GameState.LEVEL_COMPLETE:
                     self.next_level()
+                elif event.key == pygame.K_F3:
+                    self.profiler.enabled = True
+                    self.show_profile = not self.show_profile
+                elif event.key == pygame.K_F4 and self.profiler.enabled:
+                    self.export_profile()
+                elif event.key == pygame.K_F5:
+                    self.checkpoint = self.snapshot()
+                elif event.key == pygame.K_F9 and self.checkpoint is not None:
+                    self.restore(self.checkpoint)
 
-    def update(self):
-        current_time = pygame.time.get_ticks()
-        self.dt = (current_time - self.last_time) / 16.67  # Normalize to ~60fps
-        self.last_time = current_time
+    def store_previous_positions(self):
+        """Snapshot dynamic entity positions before a tick for render interpolation"""
+        self.camera.store_previous()
+        self.player.prev_pos = self.player.rect.topleft
+        self.enemy_store.store_previous()
+        self.coin_store.store_previous()
+        if self.enemy_swarm is not None:
+            self.enemy_swarm.store_previous()
+
+    def update(self, dt=None):
+        """Advance the simulation by one fixed tick"""
+        self.dt = self.tick_dt if dt is None else dt
+        self.store_previous_positions()
+        self.controls = self.input_source.poll()  # Sampled every tick so scripts stay in step
         
         if self.state != GameState.PLAYING:
             return
             
+        profiler = self.profiler
+        
+        # Fire the timers due this tick
+        with profiler.phase('timers'):
+            fired = self.timers.advance()
+        if profiler.enabled:
+            profiler.count('timers_fired', fired)
+        
         # Update camera to follow player
-        self.camera.update(self.player)
+        with profiler.phase('stream'):
+            self.camera.update(self.player)
+            self.update_stream()
         
         # Update player
-        self.player.update(self.platforms, self.enemies, self.dt)
-        
-        # Update enemies
-        for enemy in self.enemies:
-            enemy.update(self.platforms, self.player, self.dt)
+        with profiler.phase('player'):
+            self.player.update(self.collision_world, self.enemy_index, self.dt, self.controls)
         
-        # Update coins
-        for coin in self.coins:
-            coin.update(self.dt)
+        # Update enemies and coins near the camera; with update LOD, further ones at a reduced rate
+        updates = self.plan_updates()
+        with profiler.phase('enemies'):
+            if self.enemy_swarm is not None and updates:
+                swarm = self.enemy_swarm
+                chunks = swarm.chunk[:swarm.count]
+                active = np.zeros(swarm.count, dtype=np.bool_)
+                dt = np.zeros(swarm.count)
+                for chunk_index, _, chunk_dt, _ in updates:
+                    members = chunks == chunk_index
+                    active |= members
+                    dt[members] = chunk_dt
+                swarm.update(self.player, dt, active)
+            for _, chunk, chunk_dt, _ in updates:
+                for enemy in chunk['enemies']:
+                    if enemy.alive:
+                        enemy.update(self.collision_world, self.player, chunk_dt)
+                        self.enemy_index.move(enemy)
+        with profiler.phase('coins'):
+            # One pass over the coin rows of all updated chunks owed the same dt
+            owed = {}
+            for _, chunk, chunk_dt, _ in updates:
+                owed.setdefault(chunk_dt, []).append(chunk['coin_rows'])
+            store = self.coin_store
+            for chunk_dt, rows in owed.items():
+                rows = np.concatenate(rows)
+                float_coins(store, rows[store.live[rows]], chunk_dt)
+        if profiler.enabled:
+            self.count_updates(updates)
         
         # Update particles
-        self.particles.update(self.dt)
+        with profiler.phase('particles'):
+            self.particles.update(self.dt)
         
+        with profiler.phase('collisions'):
+            self.resolve_collisions()
+
+    def plan_updates(self):
+        """(chunk index, chunk, dt, tier) for the loaded chunks whose enemies and coins update this tick
+
+        Without update LOD every chunk in the stream's active window is near.
+        With it, chunks within LOD_NEAR_DISTANCE of the view are near and update
+        every tick, those within LOD_MID_DISTANCE are mid and update every
+        LOD_MID_INTERVAL ticks with the dt they accumulated meanwhile, and the
+        rest sleep without accumulating any.
+        """
+        stream = self.level_stream
+        if self.update_lod:
+            near_first, near_last = stream.range_within(self.camera.camera, LOD_NEAR_DISTANCE)
+            first, last = stream.range_within(self.camera.camera, LOD_MID_DISTANCE)
+        else:
+            near_first, near_last = first, last = stream.active_range()
+        updates = []
+        for chunk_index in range(first, last + 1):
+            chunk = stream.loaded.get(chunk_index)
+            if chunk is None:
+                continue
+            chunk['pending'] += self.dt
+            chunk['waiting'] += 1
+            near = near_first <= chunk_index <= near_last
+            if near or chunk['waiting'] >= LOD_MID_INTERVAL:
+                updates.append((chunk_index, chunk, chunk['pending'], 'lod_near' if near else 'lod_mid'))
+                chunk['pending'] = 0.0
+                chunk['waiting'] = 0
+        return updates
+
+    def count_updates(self, updates):
+        """Report live enemies and coins updated per LOD tier, and those left asleep, to the profiler"""
+        swarm = self.enemy_swarm
+        ticked = {}
+        for chunk_index, _, _, tier in updates:
+            ticked[chunk_index] = tier
+        counts = dict.fromkeys(('lod_near', 'lod_mid', 'lod_asleep'), 0)
+        for chunk_index, chunk in self.level_stream.loaded.items():
+            live = (int(np.count_nonzero(self.enemy_store.live[chunk['enemy_rows']])) +
+                    int(np.count_nonzero(self.coin_store.live[chunk['coin_rows']])))
+            if swarm is not None:
+                live += int(np.count_nonzero((swarm.chunk[:swarm.count] == chunk_index) & swarm.alive[:swarm.count]))
+            counts[ticked.get(chunk_index, 'lod_asleep')] += live
+        for name, value in counts.items():
+            self.profiler.count(name, value)
+
+    def resolve_collisions(self):
+        """Coin pickups, enemy contacts, falling off the map and level completion"""
         # Check coin collection
-        coin_collisions = pygame.sprite.spritecollide(self.player, self.coins, True)
+        coin_collisions = [coin for coin in self.coin_index.query(self.player.rect)
+                           if self.player.rect.colliderect(coin.rect)]
         for coin in coin_collisions:
+            coin.kill()
+            self.coin_index.remove(coin)
+            self.level_stream.coin_collected()
             self.player.coins_collected += 1
             self.particles.add_coin_particles(coin.rect.centerx, coin.rect.centery)
         
         # Check enemy collisions
-        enemy_hits = pygame.sprite.spritecollide(self.player, self.enemies, False)
+        if self.enemy_swarm is not None:
+            enemy_hits = [EnemyHandle(self.enemy_swarm, slot)
+                          for slot in self.enemy_swarm.colliding(self.player.rect)]
+        else:
+            enemy_hits = self.enemy_index.query(self.player.rect)
         for enemy in enemy_hits:
             if enemy.alive and self.player.rect.colliderect(enemy.rect):
                 # Check if player is jumping on enemy from above
@@ -590,6 +2528,9 @@ class Game:
                     killed = self.player.attack_enemy(enemy)
                     if killed:
                         self.player.enemies_defeated += 1
+                    if not enemy.alive:
+                        self.enemy_index.remove(enemy)
+                        self.level_stream.enemy_defeated()
                 else:
                     # Enemy hits player
                     if not self.player.invincible:
@@ -608,70 +2549,187 @@ class Game:
                 self.player.rect.y = 400
                 self.player.vel_x = 0
                 self.player.vel_y = 0
+                self.player.prev_pos = self.player.rect.topleft
         
         # Check if level is complete (all enemies defeated and coins collected)
-        if len(self.enemies) == 0 and len(self.coins) == 0:
+        if self.level_stream.is_cleared():
             self.state = GameState.LEVEL_COMPLETE
 
-    def draw(self):
-        # Clear screen
-        self.screen.fill(SKY_BLUE)
+    def draw(self, alpha=1.0):
+        """Render the world, blending positions alpha of the way into the current tick"""
+        self.render_alpha = alpha
+        camera_x, camera_y = self.camera.offset(alpha)
+        profiler = self.profiler
+        view = pygame.Rect(camera_x, camera_y, SCREEN_WIDTH, SCREEN_HEIGHT)
         
-        # Draw sprites with camera offset
-        for sprite in self.all_sprites:
-            if hasattr(sprite, 'alive') and not sprite.alive:
-                continue  # Skip dead enemies
+        # With dirty rendering, a still camera only repaints what changed
+        frame_key = (camera_x, camera_y, self.state)
+        if (self.dirty_rendering and not self.full_redraw and not self.show_profile
+                and frame_key == self.last_frame_key):
+            if self.state == GameState.PLAYING:
+                self.draw_dirty(view, alpha)
+            else:
+                self.presented_rects = []  # Paused and end screens are already on display
+            return
+        self.last_frame_key = frame_key
+        self.full_redraw = False
+        self.presented_rects = None
+        
+        with profiler.phase('draw_world'):
+            # Static scenery comes from baked chunks; clear only what they leave uncovered
+            if not self.level_chunks.covers(view):
+                self.screen.fill(SKY_BLUE)
+            blits = self.level_chunks.blits(view)
             
-            screen_pos = self.camera.apply(sprite)
+            # Draw only sprites near the viewport, submitted in one batch
+            sprite_blits = self.visible_blits(view.inflate(2 * CULL_MARGIN, 2 * CULL_MARGIN),
+                                              alpha, camera_x, camera_y)
+            blits.extend(sprite_blits)
+            self.screen.blits(blits, doreturn=False)
             
-            if isinstance(sprite, Player):
-                # Draw player with special effects
-                render_img = sprite.get_render_image()
-                self.screen.blit(render_img, screen_pos)
-            else:
-                self.screen.blit(sprite.image, screen_pos)
+            # Draw particles
+            self.particles.draw(self.screen, camera_x)
         
-        # Draw particles
-        self.particles.draw(self.screen, self.camera.camera.x)
+        with profiler.phase('draw_ui'):
+            # Draw UI elements
+            ui_rects = self.draw_ui()
+            if self.dirty_rendering:
+                self.drawn_rects = self.sprite_rects(sprite_blits, camera_x) + ui_rects
+            
+            # Draw state-specific screens
+            if self.state == GameState.PAUSED:
+                self.draw_pause_screen()
+            elif self.state == GameState.GAME_OVER:
+                self.draw_game_over_screen()
+            elif self.state == GameState.LEVEL_COMPLETE:
+                self.draw_level_complete_screen()
+            
+            if self.show_profile:
+                self.draw_profile_overlay()
         
-        # Draw UI elements
-        self.draw_ui()
+        if not self.headless:
+            with profiler.phase('flip'):
+                pygame.display.flip()
+
+    def draw_dirty(self, view, alpha):
+        """Repaint and present only the regions that changed since the last draw"""
+        camera_x, camera_y = view.topleft
+        profiler = self.profiler
+        with profiler.phase('draw_world'):
+            sprite_blits = self.visible_blits(view.inflate(2 * CULL_MARGIN, 2 * CULL_MARGIN),
+                                              alpha, camera_x, camera_y)
+            rects = self.sprite_rects(sprite_blits, camera_x)
+            
+            # Restore scenery under everything drawn last frame or about to be drawn now
+            self.restore_background(view, self.drawn_rects + rects)
+            self.screen.blits(sprite_blits, doreturn=False)
+            self.particles.draw(self.screen, camera_x)
+        
+        with profiler.phase('draw_ui'):
+            rects += self.draw_ui()
         
-        # Draw state-specific screens
-        if self.state == GameState.PAUSED:
-            self.draw_pause_screen()
-        elif self.state == GameState.GAME_OVER:
-            self.draw_game_over_screen()
-        elif self.state == GameState.LEVEL_COMPLETE:
-            self.draw_level_complete_screen()
+        self.presented_rects = self.drawn_rects + rects
+        self.drawn_rects = rects
+        if not self.headless:
+            with profiler.phase('flip'):
+                pygame.display.update(self.presented_rects)
+
+    def sprite_rects(self, sprite_blits, camera_x):
+        """Screen rects covered by sprite blits and live particles"""
+        rects = [pygame.Rect(position, surface.get_size()) for surface, position in sprite_blits]
+        particles = self.particles.screen_bounds(camera_x)
+        if particles is not None:
+            rects.append(particles)
+        return rects
+
+    def restore_background(self, view, rects):
+        """Repaint the baked scenery under screen rects"""
+        screen_rect = self.screen.get_rect()
+        rects = [rect.clip(screen_rect) for rect in rects]
+        if not self.level_chunks.covers(view):
+            for rect in rects:
+                self.screen.fill(SKY_BLUE, rect)
+        blits = []
+        for surface, (x, y) in self.level_chunks.blits(view):
+            bounds = surface.get_rect()
+            for rect in rects:
+                area = rect.move(-x, -y).clip(bounds)
+                if area.width and area.height:
+                    blits.append((surface, (area.x + x, area.y + y), area))
+        self.screen.blits(blits, doreturn=False)
+
+    def visible_blits(self, view, alpha, camera_x, camera_y):
+        """(surface, screen position) pairs for dynamic sprites overlapping view, back to front"""
+        blits = []
+        if self.enemy_swarm is not None:
+            blits.extend(self.enemy_swarm.visible_blits(view, alpha, camera_x, camera_y))
+        for index, store in ((self.enemy_index, self.enemy_store), (self.coin_index, self.coin_store)):
+            blits.extend(store.visible_blits(index.query(view), alpha, camera_x, camera_y))
         
-        pygame.display.flip()
+        # Draw player with special effects
+        rect = interpolated_rect(self.player, alpha)
+        blits.append((self.player.get_render_image(), (rect.x - camera_x, rect.y - camera_y)))
+        return blits
 
     def draw_ui(self):
+        """Draw the health bar and HUD, returning the screen rects drawn"""
         # Draw health bar
-        self.player.draw_health_bar(self.screen, self.camera.camera.x)
-        
-        # Draw stats
-        coins_text = self.font_small.render(f"Coins: {self.player.coins_collected}", True, WHITE)
-        health_text = self.font_small.render(f"Health: {self.player.health}", True, WHITE)
-        lives_text = self.font_small.render(f"Lives: {self.player.lives}", True, WHITE)
+        alpha = self.render_alpha
+        bar = self.player.draw_health_bar(self.screen, self.camera.offset(alpha)[0],
+                                          interpolated_rect(self.player, alpha))
         
-        self.screen.blit(coins_text, (10, 10))
-        self.screen.blit(health_text, (10, 35))
-        self.screen.blit(lives_text, (10, 60))
-        
-        # Draw level info
-        level_text = self.font_small.render(f"Level: {self.level_manager.current_level + 1}", True, WHITE)
-        self.screen.blit(level_text, (SCREEN_WIDTH - 120, 10))
+        # Draw stats and level info, re-rendered only when a value changes
+        text = self.text_cache.render
+        font = self.font_small
+        return [bar] + self.screen.blits([
+            (text(font, f"Coins: {self.player.coins_collected}", WHITE), (10, 10)),
+            (text(font, f"Health: {self.player.health}", WHITE), (10, 35)),
+            (text(font, f"Lives: {self.player.lives}", WHITE), (10, 60)),
+            (text(font, f"Level: {self.level_manager.current_level + 1}", WHITE), (SCREEN_WIDTH - 120, 10)),
+        ])
+
+    def overlay(self, color, alpha, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        """Translucent fill surface, built on first use and shared afterwards"""
+        key = (size, color, alpha)
+        surface = self.overlays.get(key)
+        if surface is None:
+            surface = pygame.Surface(size)
+            surface.set_alpha(alpha)
+            surface.fill(color)
+            self.overlays[key] = surface
+        return surface
+
+    def draw_profile_overlay(self):
+        """p50/p99 milliseconds per phase, re-rendered every PROFILE_OVERLAY_REFRESH frames"""
+        if not self.profile_lines or self.profiler.frame % PROFILE_OVERLAY_REFRESH == 0:
+            summary = self.profiler.summary()
+            self.profile_lines = [
+                self.font_small.render(f"{name:<14}{p50:6.2f} {p99:6.2f}", True, WHITE)
+                for name, (p50, p99) in summary.items()
+            ] + [
+                self.font_small.render(f"{name:<14}{p50:6.0f} {p99:6.0f}", True, WHITE)
+                for name, (p50, p99) in self.profiler.counter_summary().items()
+            ]
+        overlay = self.overlay(BLACK, 160, (220, 20 * len(self.profile_lines) + 30))
+        x, y = SCREEN_WIDTH - overlay.get_width() - 10, 40
+        self.screen.blit(overlay, (x, y))
+        self.screen.blit(self.text_cache.render(self.font_small, "phase    p50    p99 ms", YELLOW), (x + 6, y + 6))
+        for line, text in enumerate(self.profile_lines):
+            self.screen.blit(text, (x + 6, y + 26 + 20 * line))
+
+    def export_profile(self, trace_path=PROFILE_TRACE_PATH, csv_path=PROFILE_CSV_PATH):
+        """Write the buffered frame timings as a Chrome trace and a CSV"""
+        self.profiler.export_chrome_trace(trace_path)
+        self.profiler.export_csv(csv_path)
+        slow = self.profiler.slow_frames()
+        print(f"Wrote {trace_path} and {csv_path} ({len(slow)} frames over budget)")
 
     def draw_pause_screen(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlay(BLACK, 128), (0, 0))
+        text = self.text_cache.render
         
-        pause_text = self.font_large.render("PAUSED", True, WHITE)
-        continue_text = self.font_medium.render("Press ESC to Continue", True, WHITE)
+        pause_text = text(self.font_large, "PAUSED", WHITE)
+        continue_text = text(self.font_medium, "Press ESC to Continue", WHITE)
         
         pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 50))
         continue_rect = continue_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20))
@@ -680,14 +2738,12 @@ class Game:
         self.screen.blit(continue_text, continue_rect)
 
     def draw_game_over_screen(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(200)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlay(BLACK, 200), (0, 0))
+        text = self.text_cache.render
         
-        game_over_text = self.font_large.render("GAME OVER", True, RED)
-        score_text = self.font_medium.render(f"Final Score: {self.player.coins_collected * 10 + self.player.enemies_defeated * 50}", True, WHITE)
-        restart_text = self.font_medium.render("Press R to Restart or ESC to Quit", True, WHITE)
+        game_over_text = text(self.font_large, "GAME OVER", RED)
+        score_text = text(self.font_medium, f"Final Score: {self.player.coins_collected * 10 + self.player.enemies_defeated * 50}", WHITE)
+        restart_text = text(self.font_medium, "Press R to Restart or ESC to Quit", WHITE)
         
         game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 60))
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
@@ -698,14 +2754,12 @@ class Game:
         self.screen.blit(restart_text, restart_rect)
 
     def draw_level_complete_screen(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(200)
-        overlay.fill(GREEN)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlay(GREEN, 200), (0, 0))
+        text = self.text_cache.render
         
-        complete_text = self.font_large.render("LEVEL COMPLETE!", True, WHITE)
-        score_text = self.font_medium.render(f"Score: {self.player.coins_collected * 10 + self.player.enemies_defeated * 50}", True, WHITE)
-        next_text = self.font_medium.render("Press N for Next Level or ESC to Quit", True, WHITE)
+        complete_text = text(self.font_large, "LEVEL COMPLETE!", WHITE)
+        score_text = text(self.font_medium, f"Score: {self.player.coins_collected * 10 + self.player.enemies_defeated * 50}", WHITE)
+        next_text = text(self.font_medium, "Press N for Next Level or ESC to Quit", WHITE)
         
         complete_rect = complete_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 60))
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
@@ -716,9 +2770,7 @@ class Game:
         self.screen.blit(next_text, next_rect)
 
     def restart_game(self):
-        self.player = Player()
-        self.player.lives = 3
-        self.player.health = self.player.max_health
+        self.player.reset()
         self.level_manager.current_level = 0
         self.create_level()
         self.state = GameState.PLAYING
@@ -731,13 +2783,239 @@ class Game:
         self.state = GameState.PLAYING
 
     def run(self):
-        while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
+        accumulator = 0.0
+        previous = time.perf_counter()
+        try:
+            while self.running:
+                now = time.perf_counter()
+                accumulator += now - previous
+                previous = now
+                
+                self.begin_frame()
+                with self.profiler.phase('handle_events'):
+                    self.handle_events()
+                
+                # Run as many fixed ticks as the elapsed time covers, up to the catch-up clamp
+                ticks = 0
+                while accumulator >= self.tick_seconds and ticks < self.max_catch_up_ticks:
+                    self.update()
+                    accumulator -= self.tick_seconds
+                    ticks += 1
+                if accumulator >= self.tick_seconds:
+                    accumulator %= self.tick_seconds  # Drop time we could not catch up on
+                
+                self.draw(accumulator / self.tick_seconds)
+                self.end_frame()
+                self.clock.tick(self.render_fps)
+        finally:
+            self.close()
+            pygame.quit()
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+        self.profiler.begin_frame()
+        if self.memory_monitor is not None:
+            self.memory_monitor.begin_frame()
+
+    def end_frame(self):
+        """Collect garbage if play stopped or the frame has time to spare, then close the frame's counters"""
+        self.gc_scheduler.update(self.state == GameState.PLAYING)
+        self.gc_scheduler.idle(1.0 / self.render_fps - (time.perf_counter() - self.frame_start))
+        if self.memory_monitor is not None:
+            allocated, held, collections, pause_ns = self.memory_monitor.end_frame()
+            profiler = self.profiler
+            profiler.count('alloc_bytes', allocated)
+            profiler.count('held_bytes', held)
+            profiler.count('gc_collections', collections)
+            profiler.count('gc_pause_us', pause_ns // 1000)
+        self.profiler.end_frame()
+
+    def close(self):
+        """Give garbage collection back to the interpreter and stop memory tracing"""
+        self.gc_scheduler.close()
+        if self.memory_monitor is not None:
+            self.memory_monitor.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def simulate(self, frames, render=False, restart_on_game_over=False):
+        """Step the real game loop frames times as fast as possible, one tick per frame
+
+        Returns the number of frames simulated, wall time and simulated frames per second.
+        """
+        start = time.perf_counter()
+        try:
+            for _ in range(frames):
+                self.begin_frame()
+                with self.profiler.phase('handle_events'):
+                    self.handle_events()
+                self.update()
+                if render:
+                    self.draw()
+                self.end_frame()
+                if restart_on_game_over and self.state == GameState.GAME_OVER:
+                    self.restart_game()
+        finally:
+            self.gc_scheduler.close()  # Managed GC only lasts as long as the loop driving it
+        elapsed = time.perf_counter() - start
+        return {
+            'frames': frames,
+            'seconds': elapsed,
+            'fps': frames / elapsed if elapsed > 0 else float('inf')
+        }
+
+    def snapshot(self):
+        """Pack the simulated world into a WorldSnapshot that restore() can return to"""
+        player = self.player
+        stream = self.level_stream
+        view_first, view_last = stream.view_range or (0, 0)
+        scalars = GAME_STATE.pack(
+            self.state.value, self.level_manager.current_level, stream.view_range is not None,
+            view_first, view_last, self.camera.camera.x, self.camera.camera.y,
+            -1 if stream.remaining_enemies is None else stream.remaining_enemies,
+            -1 if stream.remaining_coins is None else stream.remaining_coins, self.timers.now,
+        ) + PLAYER_STATE.pack(
+            player.rect.x, player.rect.y, player.vel_x, player.vel_y, player.remainder_x, player.remainder_y,
+            player.on_ground, player.facing_right, player.health, player.lives, player.invincible,
+            player.invincible_timer, player.attack_cooldown, player.coins_collected, player.enemies_defeated,
+            player.animation_state.value, player.animation_frame, player.animation_timer,
+        )
+        
+        chunks = []
+        for chunk_index in sorted(stream.loaded):
+            chunk = stream.loaded[chunk_index]
+            rows = chunk['enemy_rows']
+            enemies = self.enemy_store.gather(rows, ENEMY_STATE)
+            enemies['attack_cooldown'] = np.maximum(self.enemy_store.attack_ready[rows] - self.timers.now, 0)
+            coins = self.coin_store.gather(chunk['coin_rows'], COIN_STATE)
+            chunks.append((chunk_index, chunk['serial'], chunk['orders'],
+                           CHUNK_LOD.pack(chunk['pending'], chunk['waiting']), enemies, coins))
+        frozen = tuple((chunk_index, np.array(records['enemies'], dtype=FROZEN_ENEMY),
+                        np.array(records['coins'], dtype=FROZEN_COIN))
+                       for chunk_index, records in sorted(stream.frozen.items()))
+        
+        swarm = self.enemy_swarm
+        swarm_arrays = () if swarm is None else tuple(getattr(swarm, name)[:swarm.count].copy()
+                                                      for name in swarm.fields)
+        particles = self.particles
+        particle_arrays = tuple(getattr(particles, name)[:particles.count].copy() for name in PARTICLE_FIELDS)
+        return WorldSnapshot(stream.source, scalars, self.rng.bit_generator.state, tuple(chunks), frozen,
+                             swarm_arrays, particle_arrays)
+
+    def restore(self, snapshot):
+        """Return the world to a snapshot() of this game
+
+        Chunks still loaded since the snapshot keep their sprites and are
+        patched in place; only chunks loaded or evicted since are rebuilt.
+        """
+        (state, level, has_view, view_first, view_last, camera_x, camera_y,
+         remaining_enemies, remaining_coins, tick) = GAME_STATE.unpack_from(snapshot.scalars)
+        self.state = GameState(state)
+        # Pending timers are dropped and rescheduled from the remaining ticks the snapshot holds
+        self.timers.reset(tick)
+        self.level_manager.current_level = level
+        if self.level_stream.source is not snapshot.source:
+            self.reset_world(snapshot.source)
+        stream = self.level_stream
+        
+        # Drop chunks the snapshot does not hold as they are, then patch or rebuild the rest
+        wanted = {chunk_index: serial for chunk_index, serial, _, _, _, _ in snapshot.chunks}
+        stale = [chunk_index for chunk_index, chunk in stream.loaded.items()
+                 if wanted.get(chunk_index) != chunk['serial']]
+        for chunk_index in stale:
+            self.discard_chunk(chunk_index)
+        rebuilt = False
+        for chunk_index, serial, orders, lod, enemies, coins in snapshot.chunks:
+            chunk = stream.loaded.get(chunk_index)
+            if chunk is None:
+                records = {
+                    'platforms': stream.source.load_chunk(chunk_index)['platforms'],
+                    'enemies': [] if self.enemy_swarm is not None else enemies[['x', 'y']].tolist(),
+                    'coins': coins[['x', 'start_y']].tolist(),
+                }
+                chunk = self.build_chunk(chunk_index, records, serial, orders)
+                rebuilt = True
+            chunk['pending'], chunk['waiting'] = CHUNK_LOD.unpack(lod)
+            self.restore_chunk(chunk, enemies, coins)
+        stream.frozen = {chunk_index: {'enemies': enemies.tolist(), 'coins': coins.tolist()}
+                         for chunk_index, enemies, coins in snapshot.frozen}
+        stream.view_range = (view_first, view_last) if has_view else None
+        stream.remaining_enemies = None if remaining_enemies < 0 else remaining_enemies
+        stream.remaining_coins = None if remaining_coins < 0 else remaining_coins
         
-        pygame.quit()
+        swarm = self.enemy_swarm
+        if swarm is not None:
+            count = len(snapshot.swarm[0])
+            swarm.reserve(count)
+            for name, array in zip(swarm.fields, snapshot.swarm):
+                getattr(swarm, name)[:count] = array
+            swarm.count = count
+            if stale or rebuilt:
+                swarm.set_platforms(self.platform_index)
+        particles = self.particles
+        count = len(snapshot.particles[0])
+        particles.reserve(count)
+        for name, array in zip(PARTICLE_FIELDS, snapshot.particles):
+            getattr(particles, name)[:count] = array
+        particles.count = count
+        self.rng.bit_generator.state = snapshot.rng_state
+        
+        player = self.player
+        (x, y, player.vel_x, player.vel_y, player.remainder_x, player.remainder_y, player.on_ground,
+         player.facing_right, player.health, player.lives, player.invincible, player.invincible_timer,
+         player.attack_cooldown, player.coins_collected, player.enemies_defeated, animation_state,
+         player.animation_frame, player.animation_timer) = PLAYER_STATE.unpack_from(snapshot.scalars, GAME_STATE.size)
+        player.rect.topleft = (x, y)
+        player.prev_pos = player.rect.topleft
+        player.animation_state = AnimationState(animation_state)
+        self.camera.camera.topleft = (camera_x, camera_y)
+        self.camera.store_previous()
+        self.full_redraw = True
+
+    def restore_chunk(self, chunk, enemies, coins):
+        """Set a loaded chunk's entities to ENEMY_STATE and COIN_STATE records, re-adding or removing the fallen"""
+        _, enemy_order, coin_order = chunk['orders']
+        store, rows = self.enemy_store, chunk['enemy_rows']
+        was_alive = store.live[rows].tolist()
+        store.scatter(rows, enemies)
+        store.attack_ready[rows] = self.timers.now + enemies['attack_cooldown']
+        for offset, (enemy, was, alive) in enumerate(zip(chunk['enemies'], was_alive, enemies['alive'].tolist())):
+            if alive and not was:
+                self.enemy_index.insert(enemy, order=enemy_order + offset)
+            elif was and not alive:
+                self.enemy_index.remove(enemy)
+            elif alive:
+                self.enemy_index.move(enemy)
+        store, rows = self.coin_store, chunk['coin_rows']
+        was_alive = store.live[rows].tolist()
+        store.scatter(rows, coins)
+        for offset, (coin, was, alive) in enumerate(zip(chunk['coins'], was_alive, coins['alive'].tolist())):
+            if alive and not was:
+                self.coin_index.insert(coin, coin.index_rect(), coin_order + offset)
+            elif was and not alive:
+                self.coin_index.remove(coin)
+
+    def state_hash(self):
+        """Digest of the simulated world, for checking that a replay ended where the recording did"""
+        snapshot = self.snapshot()
+        digest = hashlib.blake2b(snapshot.scalars, digest_size=16)
+        digest.update(repr(snapshot.rng_state).encode())
+        for chunk_index, _, _, lod, enemies, coins in snapshot.chunks:
+            digest.update(chunk_index.to_bytes(8, 'little', signed=True))
+            digest.update(lod)
+            digest.update(enemies.tobytes())
+            digest.update(coins.tobytes())
+        for chunk_index, enemies, coins in snapshot.frozen:
+            digest.update(chunk_index.to_bytes(8, 'little', signed=True))
+            digest.update(enemies.tobytes())
+            digest.update(coins.tobytes())
+        for array in snapshot.swarm + snapshot.particles:
+            digest.update(array.tobytes())
+        return digest.hexdigest()
 
 if __name__ == "__main__":
     game = Game()
@@ -0,0 +1,182 @@
+"""
+Per-phase frame profiler for the Enhanced Mario Game
+
+Times each phase of the real game loop with perf_counter_ns into a ring buffer
+of recent frames, summarizes p50/p99 per phase, and exports Chrome trace-event
+JSON (chrome://tracing, Perfetto) and CSV for finding frames over budget.
+Per-frame counters (entities updated per LOD tier, timers fired, bytes
+allocated and garbage collection pauses) ride along in the same rows.
+"""
+
+import csv
+import json
+from time import perf_counter_ns
+
+import numpy as np
+
+PHASES = (
+    'handle_events', 'timers', 'stream', 'player', 'enemies', 'coins', 'particles',
+    'collisions', 'draw_world', 'draw_ui', 'flip',
+)
+COUNTERS = ('lod_near', 'lod_mid', 'lod_asleep', 'timers_fired', 'alloc_bytes', 'held_bytes', 'gc_collections',
+            'gc_pause_us')
+FRAME_BUDGET_MS = 1000 / 60
+
+
+class PhaseTimer:
+    """Reusable context manager adding one phase's elapsed time to the current frame"""
+
+    __slots__ = ('profiler', 'column', 'start')
+
+    def __init__(self, profiler, column):
+        self.profiler = profiler
+        self.column = column
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = perf_counter_ns()
+        profiler = self.profiler
+        row = profiler.row
+        if profiler.durations[row, self.column] == 0:
+            profiler.starts[row, self.column] = self.start
+        # Phases that run more than once a frame (several ticks) accumulate
+        profiler.durations[row, self.column] += end - self.start
+
+
+class NullTimer:
+    """Stand-in for PhaseTimer while profiling is off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class FrameProfiler:
+    """Ring buffer of per-phase frame timings"""
+
+    def __init__(self, capacity=600, phases=PHASES, enabled=True, counters=COUNTERS):
+        self.capacity = capacity
+        self.phases = phases
+        self.counters = counters
+        self.enabled = enabled
+        self.frame_starts = np.zeros(capacity, dtype=np.int64)
+        self.frame_durations = np.zeros(capacity, dtype=np.int64)
+        self.starts = np.zeros((capacity, len(phases)), dtype=np.int64)
+        self.durations = np.zeros((capacity, len(phases)), dtype=np.int64)
+        self.counts = np.zeros((capacity, len(counters)), dtype=np.int64)
+        self.counter_columns = {name: column for column, name in enumerate(counters)}
+        self.frame_numbers = np.full(capacity, -1, dtype=np.int64)  # -1 while empty or in progress
+        self.timers = {name: PhaseTimer(self, column) for column, name in enumerate(phases)}
+        self.frame = -1
+        self.row = 0
+        self.origin = perf_counter_ns()
+
+    def phase(self, name):
+        """Context manager timing a phase of the current frame"""
+        if not self.enabled or self.frame < 0:
+            return NULL_TIMER
+        return self.timers[name]
+
+    def count(self, name, value):
+        """Add value to one of the current frame's counters"""
+        if self.enabled and self.frame >= 0:
+            self.counts[self.row, self.counter_columns[name]] += value
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame += 1
+        self.row = self.frame % self.capacity
+        self.durations[self.row] = 0
+        self.starts[self.row] = 0
+        self.counts[self.row] = 0
+        self.frame_numbers[self.row] = -1
+        self.frame_starts[self.row] = perf_counter_ns()
+
+    def end_frame(self):
+        if not self.enabled or self.frame < 0:
+            return
+        self.frame_durations[self.row] = perf_counter_ns() - self.frame_starts[self.row]
+        self.frame_numbers[self.row] = self.frame
+
+    def completed_rows(self):
+        """Ring buffer rows of completed frames, oldest first"""
+        rows = np.flatnonzero(self.frame_numbers >= 0)
+        return rows[np.argsort(self.frame_numbers[rows])]
+
+    def summary(self):
+        """{phase: (p50_ms, p99_ms)} over the buffered frames, plus 'frame'"""
+        rows = self.completed_rows()
+        if not len(rows):
+            return {}
+        durations = self.durations[rows] / 1e6
+        p50, p99 = np.percentile(durations, [50, 99], axis=0)
+        result = {name: (float(p50[column]), float(p99[column]))
+                  for column, name in enumerate(self.phases)}
+        frames = self.frame_durations[rows] / 1e6
+        result['frame'] = (float(np.percentile(frames, 50)), float(np.percentile(frames, 99)))
+        return result
+
+    def counter_summary(self):
+        """{counter: (p50, p99)} over the buffered frames"""
+        rows = self.completed_rows()
+        if not len(rows):
+            return {}
+        p50, p99 = np.percentile(self.counts[rows], [50, 99], axis=0)
+        return {name: (float(p50[column]), float(p99[column])) for column, name in enumerate(self.counters)}
+
+    def frames(self):
+        """(frame number, start ns, duration ns, phase starts, phase durations), oldest first"""
+        for row in self.completed_rows():
+            yield (int(self.frame_numbers[row]), int(self.frame_starts[row]),
+                   int(self.frame_durations[row]), self.starts[row], self.durations[row])
+
+    def slow_frames(self, budget_ms=FRAME_BUDGET_MS):
+        """Frame numbers whose total time exceeded the budget"""
+        return [number for number, _, duration, _, _ in self.frames() if duration / 1e6 > budget_ms]
+
+    def export_chrome_trace(self, path):
+        """Write the buffered frames as Chrome trace-event JSON"""
+        events = []
+        for row, (number, start, duration, starts, durations) in zip(self.completed_rows(), self.frames()):
+            if self.counters:
+                events.append({
+                    'name': 'counters', 'ph': 'C', 'pid': 1, 'tid': 1, 'ts': (start - self.origin) / 1000,
+                    'args': dict(zip(self.counters, self.counts[row].tolist())),
+                })
+            events.append({
+                'name': 'frame', 'ph': 'X', 'pid': 1, 'tid': 1,
+                'ts': (start - self.origin) / 1000, 'dur': duration / 1000,
+                'args': {'frame': number},
+            })
+            for column, name in enumerate(self.phases):
+                if durations[column]:
+                    events.append({
+                        'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                        'ts': (int(starts[column]) - self.origin) / 1000,
+                        'dur': int(durations[column]) / 1000,
+                        'args': {'frame': number},
+                    })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def export_csv(self, path):
+        """Write one row per buffered frame: frame, start_ms, total_ms, each phase in ms, then the counters"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'start_ms', 'total_ms'] + list(self.phases) + list(self.counters))
+            for row, (number, start, duration, _, durations) in zip(self.completed_rows(), self.frames()):
+                writer.writerow([number, f"{(start - self.origin) / 1e6:.3f}", f"{duration / 1e6:.3f}"] +
+                                [f"{value / 1e6:.3f}" for value in durations.tolist()] +
+                                self.counts[row].tolist())
@@ -0,0 +1,157 @@
+"""
+GC-aware frame scheduling for the Enhanced Mario Game
+
+CPython's cyclic collector runs whenever allocations since the last collection
+cross a threshold, so a generation-2 pass over the whole heap (several
+milliseconds) can land in the middle of any gameplay frame. GCScheduler keeps
+automatic collection off while the game is being played: entering play moves
+every object alive at that point into the permanent generation (gc.freeze),
+the young generations are collected in frame time left over before the next
+frame is due (or, once they grow far past the threshold, in whatever frame
+that happens, so garbage stays bounded on machines with no time to spare),
+and full collections wait for the moments a hitch cannot be
+seen, such as the pause, level complete and game over screens. The game
+loop that drives the scheduler closes it when it returns or raises, so
+collection is only ever suspended while frames are being run.
+
+MemoryMonitor reports per-frame allocation through tracemalloc and the
+duration of each collection through gc.callbacks, for confirming that
+steady-state frames leave nothing behind and trigger no collections.
+"""
+
+import gc
+import tracemalloc
+from time import perf_counter_ns
+
+IDLE_COLLECT_SECONDS = 0.002  # Frame time that must be left over before an idle collection runs
+IDLE_COLLECT_THRESHOLD = 700  # Young objects that make an idle collection worthwhile (gc's own default)
+FORCED_COLLECT_FACTOR = 8  # Multiples of the idle threshold after which the young generations are collected anyway
+
+
+class GCScheduler:
+    """Suspends automatic garbage collection during gameplay and collects between frames instead"""
+
+    def __init__(self, enabled=True, idle_threshold=IDLE_COLLECT_THRESHOLD):
+        self.enabled = enabled
+        self.idle_threshold = idle_threshold
+        self.playing = False  # Automatic collection suspended and the heap frozen
+        self.was_enabled = True  # Whether gc was enabled before play began
+        self.idle_collections = 0
+        self.forced_collections = 0  # Young collections that could not wait for spare frame time
+        self.transition_collections = 0
+
+    def begin_play(self):
+        """Freeze the heap built so far and stop automatic collection"""
+        if not self.enabled or self.playing:
+            return
+        self.was_enabled = gc.isenabled()
+        gc.disable()
+        gc.freeze()
+        self.playing = True
+
+    def end_play(self):
+        """Gameplay stopped: unfreeze and collect everything while a pause goes unnoticed"""
+        if not self.playing:
+            return
+        self.playing = False
+        gc.unfreeze()
+        gc.collect()
+        self.transition_collections += 1
+        if self.was_enabled:
+            gc.enable()
+
+    def update(self, playing):
+        """Follow the game in and out of play; call once per frame"""
+        if playing:
+            self.begin_play()
+        else:
+            self.end_play()
+
+    def idle(self, seconds_left):
+        """Collect the young generations if they have grown and the frame has time to spare
+
+        Without spare time they are collected anyway once they reach
+        FORCED_COLLECT_FACTOR times the threshold. Returns the generation
+        collected, or None.
+        """
+        if not self.playing:
+            return None
+        young, middle, _ = gc.get_count()
+        if young < self.idle_threshold:
+            return None
+        if seconds_left >= IDLE_COLLECT_SECONDS:
+            self.idle_collections += 1
+        elif young >= self.idle_threshold * FORCED_COLLECT_FACTOR:
+            self.forced_collections += 1
+        else:
+            return None
+        generation = 1 if middle >= gc.get_threshold()[1] else 0
+        gc.collect(generation)
+        return generation
+
+    def close(self):
+        """Hand collection back to the interpreter without collecting"""
+        if self.playing:
+            self.playing = False
+            gc.unfreeze()
+            if self.was_enabled:
+                gc.enable()
+
+
+class MemoryMonitor:
+    """Per-frame allocation counters from tracemalloc and collection pauses from gc.callbacks"""
+
+    def __init__(self, trace_allocations=True):
+        self.trace_allocations = trace_allocations
+        self.started_tracing = False
+        self.frame_start_bytes = 0
+        self.collection_start = 0
+        self.collections = 0  # This frame's
+        self.pause_ns = 0
+        self.total_collections = 0
+        self.total_pause_ns = 0
+        self.max_pause_ns = 0
+
+    def start(self):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        if self.callback not in gc.callbacks:
+            gc.callbacks.append(self.callback)
+
+    def stop(self):
+        if self.callback in gc.callbacks:
+            gc.callbacks.remove(self.callback)
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def callback(self, phase, info):
+        if phase == 'start':
+            self.collection_start = perf_counter_ns()
+            return
+        pause = perf_counter_ns() - self.collection_start
+        self.collections += 1
+        self.pause_ns += pause
+        self.total_collections += 1
+        self.total_pause_ns += pause
+        self.max_pause_ns = max(self.max_pause_ns, pause)
+
+    def begin_frame(self):
+        self.collections = 0
+        self.pause_ns = 0
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.frame_start_bytes = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self):
+        """(bytes allocated at the frame's peak, bytes still held at its end, collections, pause ns)
+
+        Both byte counts are relative to the start of the frame and zero while
+        tracemalloc is off; a frame that frees as much as it allocates holds nothing.
+        """
+        if not tracemalloc.is_tracing():
+            return 0, 0, self.collections, self.pause_ns
+        current, peak = tracemalloc.get_traced_memory()
+        start = self.frame_start_bytes
+        return peak - start, current - start, self.collections, self.pause_ns
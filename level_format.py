@@ -0,0 +1,146 @@
+"""
+Compact binary level format for the Enhanced Mario Game
+
+A level file holds fixed-size little-endian records grouped by stream chunk:
+
+    header       magic, version, chunk width, level width, counts, section offsets
+    chunk index  per chunk: first record and record count for platforms, enemies, coins
+    platforms    (x, y, width, height) int32 records, chunk by chunk
+    enemies      (x, y) int32 records, chunk by chunk
+    coins        (x, y) int32 records, chunk by chunk
+
+MmapLevelSource maps the file and decodes only the chunks the level stream asks
+for, unpacking straight out of the mapping without copying the file contents.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+
+from enhanced_mario_game import DictLevelSource, LevelManager, STREAM_CHUNK_WIDTH
+
+MAGIC = b'MLVL'
+VERSION = 1
+HEADER = struct.Struct('<4sHHiiIIIIQQQQ')
+CHUNK_ENTRY = struct.Struct('<IIIIII')
+PLATFORM_RECORD = struct.Struct('<iiii')
+POINT_RECORD = struct.Struct('<ii')
+NO_WIDTH = -1
+
+
+def convert_level(level_data, path, chunk_width=STREAM_CHUNK_WIDTH):
+    """Write a dict level (the LevelManager.load_levels format) as a binary level file"""
+    source = DictLevelSource(level_data, chunk_width)
+    chunk_count = source.chunk_count
+
+    index = bytearray()
+    sections = {'platforms': bytearray(), 'enemies': bytearray(), 'coins': bytearray()}
+    formats = {'platforms': PLATFORM_RECORD, 'enemies': POINT_RECORD, 'coins': POINT_RECORD}
+    counts = {'platforms': 0, 'enemies': 0, 'coins': 0}
+    for chunk_index in range(chunk_count):
+        records = source.load_chunk(chunk_index)
+        entry = []
+        for kind in ('platforms', 'enemies', 'coins'):
+            entry += [counts[kind], len(records[kind])]
+            for record in records[kind]:
+                sections[kind] += formats[kind].pack(*record)
+            counts[kind] += len(records[kind])
+        index += CHUNK_ENTRY.pack(*entry)
+
+    index_offset = HEADER.size
+    platforms_offset = index_offset + len(index)
+    enemies_offset = platforms_offset + len(sections['platforms'])
+    coins_offset = enemies_offset + len(sections['enemies'])
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, chunk_width, source.width if source.width is not None else NO_WIDTH,
+        chunk_count, counts['platforms'], counts['enemies'], counts['coins'],
+        index_offset, platforms_offset, enemies_offset, coins_offset
+    )
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(index)
+        for kind in ('platforms', 'enemies', 'coins'):
+            f.write(sections[kind])
+
+
+class MmapLevelSource:
+    """Level chunk source backed by a memory-mapped binary level file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mm)
+
+        (magic, version, _, self.chunk_width, width, self.chunk_count, self.platform_count,
+         self.enemy_count, self.coin_count, self.index_offset, self.platforms_offset,
+         self.enemies_offset, self.coins_offset) = HEADER.unpack_from(self.view, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} level file")
+        self.width = None if width == NO_WIDTH else width
+
+    def close(self):
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def records(self, offset, record, start, count):
+        begin = offset + start * record.size
+        return list(record.iter_unpack(self.view[begin:begin + count * record.size]))
+
+    def load_chunk(self, chunk_index):
+        if not 0 <= chunk_index < self.chunk_count:
+            return {'platforms': [], 'enemies': [], 'coins': []}
+        (platform_start, platform_count, enemy_start, enemy_count,
+         coin_start, coin_count) = CHUNK_ENTRY.unpack_from(
+            self.view, self.index_offset + chunk_index * CHUNK_ENTRY.size)
+        return {
+            'platforms': self.records(self.platforms_offset, PLATFORM_RECORD, platform_start, platform_count),
+            'enemies': self.records(self.enemies_offset, POINT_RECORD, enemy_start, enemy_count),
+            'coins': self.records(self.coins_offset, POINT_RECORD, coin_start, coin_count),
+        }
+
+
+def load_level(path):
+    """Level entry for LevelManager.levels that streams from a binary level file"""
+    return {'source': MmapLevelSource(path)}
+
+
+def level_to_json(level_data, path):
+    """Write a dict level as JSON (the format the binary loader is benchmarked against)"""
+    with open(path, 'w') as f:
+        json.dump({kind: [list(record) for record in level_data[kind]]
+                   for kind in ('platforms', 'enemies', 'coins')}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert levels to the binary level format")
+    parser.add_argument('output_dir', help="directory to write .mlvl files into")
+    parser.add_argument('--generate', type=int, metavar='SEGMENTS',
+                        help="write a generated level of this many segments instead of the built-in levels")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.generate:
+        levels = [LevelManager.generate_level(args.generate, seed=args.seed)]
+    else:
+        levels = LevelManager().levels
+    for number, level_data in enumerate(levels, 1):
+        path = os.path.join(args.output_dir, f"level{number}.mlvl")
+        convert_level(level_data, path)
+        print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Gym-style training environments for the Enhanced Mario Game
+
+MarioEnv wraps one headless Game: reset() starts a new episode and
+step(action) advances it by fixed ticks with no window, no rendering and no
+clock.tick. Actions are the packed input bytes 0-7 (bit 0 left, bit 1 right,
+bit 2 jump); observations are a small float32 feature vector of the player and
+the nearest enemies and coins; rewards come from coins collected, enemies
+defeated and lives lost.
+
+VectorEnv shards many MarioEnvs across worker processes. Actions,
+observations, rewards and done flags live in shared-memory NumPy buffers and
+the processes synchronize on barriers, so nothing is pickled per step.
+
+PixelObserver turns a game's rendered frames into NumPy arrays: each frame is
+scaled into a small off-screen surface that a pixels3d view exposes without
+copying, optionally converted to grayscale and stacked in place into a
+preallocated ring buffer. MarioEnv(pixels=True) observes through it.
+"""
+
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # Environments never open a window
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from enhanced_mario_game import (Game, GameState, IDLE_INPUT, INPUT_STATES, SCREEN_WIDTH, SCREEN_HEIGHT,
+                                 MOVE_SPEED, JUMP_STRENGTH)
+
+ACTION_COUNT = len(INPUT_STATES)
+NEAREST_ENEMIES = 4
+NEAREST_COINS = 4
+OBS_SIZE = 6 + 2 * NEAREST_ENEMIES + 2 * NEAREST_COINS
+COIN_REWARD = 1.0
+ENEMY_REWARD = 2.0
+DEATH_PENALTY = -5.0
+MAX_EPISODE_STEPS = 3000
+OBSERVE_RANGE = SCREEN_WIDTH // 2  # Enemies and coins further away than this are left out
+PIXEL_OBS_SIZE = (160, 120)  # Width and height of pixel observations
+LUMA_WEIGHTS = (77, 150, 29)  # ITU-R BT.601 luma in 1/256ths
+
+# VectorEnv worker commands
+STEP, RESET, CLOSE = 0, 1, 2
+
+
+class ActionInput:
+    """Input source driven by the environment's current action"""
+
+    def __init__(self):
+        self.state = IDLE_INPUT
+
+    def events(self):
+        return ()
+
+    def poll(self):
+        return self.state
+
+
+class PixelObserver:
+    """Low-resolution frames of a game's render as NumPy arrays over pygame surfaces
+
+    Each capture scales the game's screen into a small off-screen surface;
+    pixels is a (height, width, 3) pixels3d view of it, updated in place with
+    no copy. A single RGB frame is returned as that view itself, so it shares
+    the surface's memory and changes with the next capture. Only with
+    grayscale or a frame stack are captures written into a preallocated ring
+    that stores every frame twice, so frames() is a contiguous, oldest-first
+    (stack, height, width[, 3]) view.
+    """
+
+    def __init__(self, game, size=PIXEL_OBS_SIZE, grayscale=False, stack=1, smooth=False):
+        self.game = game
+        self.size = size
+        self.grayscale = grayscale
+        self.stack = stack
+        self.smooth = smooth
+        self.surface = pygame.Surface(size)
+        # The view keeps the surface locked; scaling into it still works, blitting would not
+        self.pixels = pygame.surfarray.pixels3d(self.surface).transpose(1, 0, 2)
+        width, height = size
+        self.direct = stack == 1 and not grayscale  # Frames are the pixel view, no ring
+        ring_length = 0 if self.direct else 2 * stack
+        self.ring = np.zeros((ring_length, height, width) + (() if grayscale else (3,)), dtype=np.uint8)
+        self.luma = np.empty((height, width), dtype=np.uint16)
+        self.channel = np.empty((height, width), dtype=np.uint16)
+        self.count = 0
+
+    @staticmethod
+    def shape(size=PIXEL_OBS_SIZE, grayscale=False, stack=1):
+        width, height = size
+        return (stack, height, width) + (() if grayscale else (3,))
+
+    def reset(self):
+        self.ring[:] = 0
+        self.count = 0
+
+    def capture(self):
+        """Scale the game's current screen in and push it onto the stack; returns frames()"""
+        scale = pygame.transform.smoothscale if self.smooth else pygame.transform.scale
+        scale(self.game.screen, self.size, self.surface)
+        if self.direct:
+            return self.frames()
+        slot = self.count % self.stack
+        frame = self.ring[slot]
+        if self.grayscale:
+            pixels, luma, channel = self.pixels, self.luma, self.channel
+            np.multiply(pixels[..., 0], LUMA_WEIGHTS[0], out=luma, dtype=np.uint16)
+            for index in (1, 2):
+                np.multiply(pixels[..., index], LUMA_WEIGHTS[index], out=channel, dtype=np.uint16)
+                luma += channel
+            np.right_shift(luma, 8, out=frame, casting='unsafe')
+        else:
+            frame[...] = self.pixels
+        self.ring[slot + self.stack] = frame
+        self.count += 1
+        return self.frames()
+
+    def frames(self):
+        if self.direct:
+            return self.pixels[np.newaxis]
+        start = self.count % self.stack
+        return self.ring[start:start + self.stack]
+
+
+def observation_space(pixels=False, pixel_size=PIXEL_OBS_SIZE, grayscale=False, frame_stack=1, **_):
+    """(shape, dtype) of a MarioEnv's observations for these settings"""
+    if pixels:
+        return PixelObserver.shape(pixel_size, grayscale, frame_stack), np.uint8
+    return (OBS_SIZE,), np.float32
+
+
+class MarioEnv:
+    """One headless game as a reset()/step(action) environment
+
+    With pixels=True, observations are the last frame_stack rendered frames at
+    pixel_size (optionally grayscale) instead of the feature vector.
+    """
+
+    def __init__(self, seed=0, frame_skip=1, max_steps=MAX_EPISODE_STEPS, batch_enemies=False,
+                 pixels=False, pixel_size=PIXEL_OBS_SIZE, grayscale=False, frame_stack=1, tile_world=False):
+        self.controls = ActionInput()
+        self.game = Game(headless=True, input_source=self.controls, seed=seed, batch_enemies=batch_enemies,
+                         tile_world=tile_world)
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.observer = PixelObserver(self.game, pixel_size, grayscale, frame_stack) if pixels else None
+        self.obs = np.zeros(OBS_SIZE, dtype=np.float32)
+        self.steps = 0
+        self.lives = self.game.player.lives
+        self.score = (0, 0)
+
+    def reset(self, out=None):
+        """Start a new episode; returns the first observation (written into out, if given)"""
+        self.game.restart_game()
+        self.steps = 0
+        self.lives = self.game.player.lives
+        self.score = (0, 0)
+        if self.observer is not None:
+            self.observer.reset()
+        return self.observe(out)
+
+    def step(self, action, out=None):
+        """Hold action for frame_skip ticks; returns (observation, reward, done, info)"""
+        game = self.game
+        player = game.player
+        self.controls.state = INPUT_STATES[int(action)]
+        for _ in range(self.frame_skip):
+            game.update()
+            if game.state != GameState.PLAYING:
+                break
+        self.steps += 1
+
+        coins, defeated = player.coins_collected, player.enemies_defeated
+        deaths = self.lives - player.lives + (game.state == GameState.GAME_OVER and player.lives > 0)
+        reward = ((coins - self.score[0]) * COIN_REWARD + (defeated - self.score[1]) * ENEMY_REWARD +
+                  deaths * DEATH_PENALTY)
+        self.score = (coins, defeated)
+        self.lives = player.lives
+
+        terminated = game.state in (GameState.GAME_OVER, GameState.LEVEL_COMPLETE)
+        truncated = not terminated and self.steps >= self.max_steps
+        info = {'truncated': truncated, 'level_complete': game.state == GameState.LEVEL_COMPLETE}
+        return self.observe(out), reward, terminated or truncated, info
+
+    def observe(self, out=None):
+        """Pixel frames, or the feature vector; written into out when given"""
+        if self.observer is None:
+            return self.features(out)
+        self.game.draw()
+        frames = self.observer.capture()
+        if out is None:
+            return frames
+        out[...] = frames
+        return out
+
+    def features(self, out=None):
+        """Player state, then (dx, dy) to the nearest enemies and coins scaled to screens
+
+        Missing neighbours read as (1, 1), a screen away in both directions.
+        """
+        obs = self.obs if out is None else out
+        game = self.game
+        player = game.player
+        rect = player.rect
+        obs[:6] = (rect.x / SCREEN_WIDTH, rect.y / SCREEN_HEIGHT, player.vel_x / MOVE_SPEED,
+                   player.vel_y / -JUMP_STRENGTH, player.health / player.max_health, player.on_ground)
+
+        window = pygame.Rect(rect.centerx - OBSERVE_RANGE, 0, 2 * OBSERVE_RANGE, SCREEN_HEIGHT)
+        if game.enemy_swarm is not None:
+            swarm = game.enemy_swarm
+            n = swarm.count
+            live = np.flatnonzero(swarm.alive[:n] & (np.abs(swarm.x[:n] - rect.x) < OBSERVE_RANGE))
+            enemies = list(zip(swarm.x[live].tolist(), swarm.y[live].tolist()))
+        else:
+            enemies = [enemy.rect.topleft for enemy in game.enemy_index.query(window) if enemy.alive]
+        coins = [coin.rect.topleft for coin in game.coin_index.query(window)]
+        offset = 6
+        for positions, count in ((enemies, NEAREST_ENEMIES), (coins, NEAREST_COINS)):
+            positions.sort(key=lambda position: abs(position[0] - rect.x))
+            block = obs[offset:offset + 2 * count]
+            block[:] = 1.0
+            for k, (x, y) in enumerate(positions[:count]):
+                block[2 * k] = (x - rect.x) / SCREEN_WIDTH
+                block[2 * k + 1] = (y - rect.y) / SCREEN_HEIGHT
+            offset += 2 * count
+        return obs
+
+
+def shared_array(shape, dtype):
+    """NumPy array over a new shared memory block; returns (block, array)"""
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def attach_array(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def buffer_specs(num_envs, env_kwargs):
+    """Shape and dtype of each shared buffer"""
+    obs_shape, obs_dtype = observation_space(**env_kwargs)
+    return {
+        'command': ((1,), np.int32),
+        'actions': ((num_envs,), np.uint8),
+        'obs': ((num_envs,) + obs_shape, obs_dtype),
+        'rewards': ((num_envs,), np.float32),
+        'dones': ((num_envs,), np.bool_),
+    }
+
+
+def run_shard(arrays, first, last, seed, env_kwargs, start, finished):
+    """Step environments first..last-1 each time the start barrier releases, until CLOSE"""
+    envs = [MarioEnv(seed=seed + index, **env_kwargs) for index in range(first, last)]
+    command, actions, obs = arrays['command'], arrays['actions'], arrays['obs']
+    rewards, dones = arrays['rewards'], arrays['dones']
+    try:
+        while True:
+            start.wait()
+            if command[0] == CLOSE:
+                return
+            for index, env in enumerate(envs, first):
+                if command[0] == RESET:
+                    env.reset(out=obs[index])
+                    rewards[index] = 0
+                    dones[index] = False
+                    continue
+                _, reward, done, _ = env.step(actions[index], out=obs[index])
+                if done:
+                    env.reset(out=obs[index])  # Auto-reset; the returned observation starts the next episode
+                rewards[index] = reward
+                dones[index] = done
+            finished.wait()
+    except BaseException:
+        start.abort()
+        finished.abort()
+        raise
+
+
+def worker_main(names, num_envs, first, last, seed, env_kwargs, start, finished):
+    blocks, arrays = [], {}
+    for key, (shape, dtype) in buffer_specs(num_envs, env_kwargs).items():
+        block, arrays[key] = attach_array(names[key], shape, dtype)
+        blocks.append(block)
+    try:
+        run_shard(arrays, first, last, seed, env_kwargs, start, finished)
+    finally:
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+
+class VectorEnv:
+    """num_envs MarioEnvs sharded across worker processes over shared-memory buffers
+
+    reset() and step(actions) return views of the shared buffers, which the
+    next call overwrites; copy them to keep them. Finished episodes reset
+    automatically, so the observation returned alongside done=True starts the
+    next episode. workers=0 steps every environment in the calling process.
+    """
+
+    def __init__(self, num_envs, workers=None, seed=0, **env_kwargs):
+        self.num_envs = num_envs
+        workers = min(num_envs, os.cpu_count() or 1) if workers is None else min(workers, num_envs)
+        self.blocks = {}
+        specs = buffer_specs(num_envs, env_kwargs)
+        for key, (shape, dtype) in specs.items():
+            self.blocks[key], array = shared_array(shape, dtype)
+            setattr(self, key, array)
+        self.processes = []
+        if workers == 0:
+            # In-process shard, driven on a thread so the barrier protocol stays the same
+            self.start_barrier = threading.Barrier(2)
+            self.finished_barrier = threading.Barrier(2)
+            arrays = {key: getattr(self, key) for key in specs}
+            thread = threading.Thread(target=run_shard, args=(arrays, 0, num_envs, seed, env_kwargs,
+                                                              self.start_barrier, self.finished_barrier),
+                                      daemon=True)
+            thread.start()
+            self.processes.append(thread)
+        else:
+            context = multiprocessing.get_context()
+            self.start_barrier = context.Barrier(workers + 1)
+            self.finished_barrier = context.Barrier(workers + 1)
+            names = {key: block.name for key, block in self.blocks.items()}
+            bounds = np.linspace(0, num_envs, workers + 1).astype(int).tolist()
+            for first, last in zip(bounds, bounds[1:]):
+                process = context.Process(target=worker_main, daemon=True,
+                                          args=(names, num_envs, first, last, seed, env_kwargs,
+                                                self.start_barrier, self.finished_barrier))
+                process.start()
+                self.processes.append(process)
+        self.closed = False
+
+    def run(self, command):
+        self.command[0] = command
+        self.start_barrier.wait()
+        if command != CLOSE:
+            self.finished_barrier.wait()
+
+    def reset(self):
+        """Reset every environment; returns the (num_envs, *observation shape) buffer"""
+        self.run(RESET)
+        return self.obs
+
+    def step(self, actions):
+        """Step every environment with its action; returns (observations, rewards, dones)"""
+        self.actions[:] = actions
+        self.run(STEP)
+        return self.obs, self.rewards, self.dones
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.run(CLOSE)
+        except threading.BrokenBarrierError:
+            pass  # A worker already failed
+        for process in self.processes:
+            process.join(timeout=5)
+        for key, block in self.blocks.items():
+            delattr(self, key)
+            block.close()
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
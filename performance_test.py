@@ -5,8 +5,30 @@ Tests various performance optimizations implemented in the game
 
 import pygame
 import time
+import os
+import json
 import random
-from enhanced_mario_game import Player, Enemy, Platform, Coin, ParticleSystem, Camera
+import tempfile
+import subprocess
+import sys
+import math
+import gc
+import tracemalloc
+import numpy as np
+from enhanced_mario_game import (Player, Enemy, Platform, Coin, ParticleSystem, Camera, SpatialGrid,
+                                 Game, GameState, InputState, ScriptedInput, LevelManager, EndlessLevelSource,
+                                 DictLevelSource, EnemySwarm, TextCache,
+                                 SurfaceRegistry, TileWorld, ComponentStore, resolve_font, float_coins,
+                                 COIN_COMPONENTS, ENEMY_COMPONENTS, PLATFORM_COMPONENTS)
+from enhanced_mario_game import (SCREEN_WIDTH, SCREEN_HEIGHT, GREEN, BROWN, YELLOW, MOVE_SPEED, COIN_FLOAT_SPEED,
+                                 COIN_FLOAT_AMPLITUDE)
+from level_format import convert_level, level_to_json, MmapLevelSource
+from frame_profiler import FrameProfiler, PHASES, COUNTERS
+import benchmark
+from replay import RecordingInput, save_recording, load_recording, replay
+from mario_env import MarioEnv, VectorEnv, PixelObserver, OBS_SIZE
+from timer_wheel import TimerWheel
+from gc_scheduler import GCScheduler, FORCED_COLLECT_FACTOR
 
 
 def test_sprite_collision_performance():
@@ -29,7 +51,7 @@ def test_sprite_collision_performance():
         enemies.add(enemy)
     
     # Measure collision detection performance
-    start_time = time.time()
+    start_time = time.perf_counter()
     for _ in range(1000):  # Simulate 1000 frames worth of collision checks
         # Player-platform collisions
         collisions = pygame.sprite.spritecollide(player, platforms, False)
@@ -37,7 +59,7 @@ def test_sprite_collision_performance():
         # Player-enemy collisions
         enemy_collisions = pygame.sprite.spritecollide(player, enemies, False)
     
-    end_time = time.time()
+    end_time = time.perf_counter()
     elapsed = (end_time - start_time) * 1000  # Convert to milliseconds
     
     print(f"Collision detection for 1000 frames took {elapsed:.2f}ms")
@@ -59,16 +81,44 @@ def test_particle_system_performance():
     dummy_surface = pygame.Surface((800, 600))
     
     # Measure particle update and draw performance
-    start_time = time.time()
+    start_time = time.perf_counter()
     for _ in range(1000):  # Simulate 1000 updates
         particle_system.update(1)  # Update with dt=1
         particle_system.draw(dummy_surface, 0)  # Draw with no camera offset
     
-    end_time = time.time()
+    end_time = time.perf_counter()
     elapsed = (end_time - start_time) * 1000  # Convert to milliseconds
     
     print(f"Particle system update/draw for 1000 frames took {elapsed:.2f}ms")
     print(f"Average per frame: {elapsed/1000:.4f}ms")
+    
+    # Measure steady-state updates at scale; long lives keep the live count fixed
+    for count in (1000, 10000, 100000):
+        particle_system = ParticleSystem()
+        particle_system.emit(
+            np.random.uniform(0, 800, count),
+            np.random.uniform(0, 600, count),
+            np.random.uniform(-5, 5, count),
+            np.random.uniform(-8, 2, count),
+            1e9
+        )
+        
+        start_time = time.perf_counter()
+        for _ in range(100):
+            particle_system.update(1)
+        per_update = (time.perf_counter() - start_time) * 1000 / 100
+        assert len(particle_system) == count
+        print(f"{count:>6} particles: {per_update:.4f}ms per update")
+    
+    # Mass death exercises the swap-remove compaction path
+    particle_system = ParticleSystem()
+    lives = np.where(np.arange(100000) % 2 == 0, 1, 1e9)
+    particle_system.emit(0, 0, 0, 0, lives)
+    start_time = time.perf_counter()
+    particle_system.update(1)
+    elapsed = (time.perf_counter() - start_time) * 1000
+    assert len(particle_system) == 50000
+    print(f"Compacting 50000 of 100000 particles took {elapsed:.4f}ms")
     print("✓ Particle system performance test completed\n")
 
 
@@ -80,7 +130,7 @@ def test_camera_system_performance():
     player = Player(100, 400)
     
     # Simulate camera following player through different positions
-    start_time = time.time()
+    start_time = time.perf_counter()
     for i in range(10000):  # Test with 10000 different positions
         player.rect.x = i * 2  # Move player
         player.rect.y = 400 + (i % 100)  # Slight vertical movement
@@ -91,7 +141,7 @@ def test_camera_system_performance():
         dummy_sprite.rect = pygame.Rect(100, 100, 30, 30)
         camera.apply(dummy_sprite)
     
-    end_time = time.time()
+    end_time = time.perf_counter()
     elapsed = (end_time - start_time) * 1000  # Convert to milliseconds
     
     print(f"Camera system for 10000 frames took {elapsed:.2f}ms")
@@ -125,7 +175,7 @@ def test_entity_update_performance():
         coins.add(coin)
     
     # Simulate game loop updates
-    start_time = time.time()
+    start_time = time.perf_counter()
     for frame in range(1000):  # 1000 frames of updates
         # Update player
         player.update(platforms, enemies, 1)
@@ -138,7 +188,7 @@ def test_entity_update_performance():
         for coin in coins:
             coin.update(1)
     
-    end_time = time.time()
+    end_time = time.perf_counter()
     elapsed = (end_time - start_time) * 1000  # Convert to milliseconds
     
     print(f"Entity updates for 1000 frames took {elapsed:.2f}ms")
@@ -146,6 +196,1042 @@ def test_entity_update_performance():
     print("✓ Entity update performance test completed\n")
 
 
+def test_spatial_index_scaling():
+    """Test that per-frame collision cost stays flat as the platform count grows"""
+    print("Testing spatial index scaling...")
+    
+    frames = 200
+    results = []
+    for count in (100, 1000, 10000, 100000):
+        # Bare rect holders keep the 100k case from allocating 100k surfaces
+        index = SpatialGrid()
+        for i in range(count):
+            platform = pygame.sprite.Sprite()
+            platform.rect = pygame.Rect(i * 60, 500 - (i % 5) * 30, 50, 20)
+            index.insert(platform)
+        
+        player = Player(100, 400)
+        enemies = [Enemy(200 + i * 60, 400) for i in range(30)]
+        
+        start_time = time.perf_counter()
+        for frame in range(frames):
+            player.update(index, enemies, 1)
+            for enemy in enemies:
+                enemy.update(index, player, 1)
+        elapsed = (time.perf_counter() - start_time) * 1000
+        
+        per_frame = elapsed / frames
+        results.append(per_frame)
+        print(f"{count:>7} platforms: {per_frame:.4f}ms per frame (player + 30 enemies)")
+    
+    # Cost is driven by local density, not level size
+    assert results[-1] < results[0] * 5 + 0.5
+    print("✓ Spatial index scaling test completed\n")
+
+
+def test_headless_simulation_performance():
+    """Test the real game loop headless, uncapped and deterministic"""
+    print("Testing headless simulation performance...")
+    
+    def script(tick):
+        return InputState(right=True, jump=tick % 45 < 10)
+    
+    def run(seed):
+        game = Game(headless=True, input_source=ScriptedInput(script), seed=seed)
+        result = game.simulate(2000, restart_on_game_over=True)
+        state = (game.player.rect.topleft, game.player.health, game.player.enemies_defeated,
+                 [enemy.rect.topleft for enemy in game.enemies])
+        return result, state
+    
+    result, state = run(seed=1)
+    _, repeat_state = run(seed=1)
+    assert state == repeat_state  # Same seed and script give the same world
+    
+    print(f"Simulated {result['frames']} frames in {result['seconds'] * 1000:.2f}ms")
+    print(f"Simulated FPS: {result['fps']:.1f}")
+    print("✓ Headless simulation performance test completed\n")
+
+
+def test_fixed_timestep_rates():
+    """Test that a scripted run and jump reaches the same apex and landing spot at 30, 60 and 120 ticks per second"""
+    print("Testing fixed timestep rates...")
+    
+    level = {'platforms': [(0, 560, 4000, 40)], 'enemies': [(3800, 530)], 'coins': [(3900, 300)]}
+    results = {}
+    for sim_rate in (30, 60, 120):
+        frames_per_tick = 60 / sim_rate  # Script in base-rate frames: run from frame 30, jump at frame 60
+        controls = ScriptedInput(lambda tick: InputState(right=tick * frames_per_tick >= 30,
+                                                         jump=60 <= tick * frames_per_tick < 64))
+        game = Game(headless=True, sim_rate=sim_rate, seed=0, input_source=controls)
+        game.level_manager.levels = [level]
+        game.create_level()
+        player = game.player
+        apex = landing = None
+        for tick in range(int(150 / frames_per_tick)):
+            game.update()
+            frame = (tick + 1) * frames_per_tick
+            if frame > 60:
+                apex = player.rect.y if apex is None else min(apex, player.rect.y)
+                if landing is None and frame > 62 and player.on_ground:
+                    landing = (frame, player.rect.x, player.rect.y)
+        results[sim_rate] = (apex, landing)
+        print(f"{sim_rate} ticks/s: apex y {apex}, landed at frame {landing[0]:g} on ({landing[1]}, {landing[2]})")
+    
+    apex, (frame, x, y) = results[60]
+    for sim_rate, (rate_apex, (rate_frame, rate_x, rate_y)) in results.items():
+        # The arc is the same; landing is only seen on the tick it happens, so it may shift by up to one tick
+        frames_per_tick = max(60 / sim_rate, 1)
+        assert rate_apex == apex and rate_y == y
+        assert abs(rate_frame - frame) <= frames_per_tick and abs(rate_x - x) <= MOVE_SPEED * frames_per_tick
+    print("✓ Fixed timestep rates test completed\n")
+
+
+def test_draw_culling_performance():
+    """Test that draw cost follows what is visible, not level size"""
+    print("Testing draw culling performance...")
+    
+    game = Game(headless=True, seed=0)
+    results = []
+    for segments in (625, 6250):  # ~5k and ~50k entities
+        level = LevelManager.generate_level(segments, seed=0)
+        for index in (game.platform_index, game.enemy_index, game.coin_index):
+            index.clear()
+        
+        # Shared surfaces keep the 50k case light; only the blit count matters here
+        surfaces = {}
+        for record in level['platforms']:
+            sprite = pygame.sprite.Sprite()
+            sprite.rect = pygame.Rect(record)
+            if sprite.rect.size not in surfaces:
+                surfaces[sprite.rect.size] = pygame.Surface(sprite.rect.size)
+            sprite.image = surfaces[sprite.rect.size]
+            game.platform_index.insert(sprite)
+        for x, y in level['enemies']:
+            game.enemy_index.insert(Enemy(x, y, timers=game.timers, store=game.enemy_store))
+        for x, y in level['coins']:
+            game.coin_index.insert(Coin(x, y, game.coin_store))
+        entities = len(game.platform_index) + len(game.enemy_index) + len(game.coin_index)
+        game.level_chunks.clear()  # Re-bake static scenery from the new platforms
+        
+        game.camera.camera.x = segments * 200  # Middle of the level
+        game.player.rect.x = game.camera.camera.centerx
+        start_time = time.perf_counter()
+        for _ in range(100):
+            game.draw()
+        per_frame = (time.perf_counter() - start_time) * 1000 / 100
+        results.append(per_frame)
+        chunk_blits = len(game.level_chunks.blits(game.camera.camera))
+        print(f"{entities:>6} entities: {per_frame:.4f}ms per draw ({chunk_blits} scenery chunk blits)")
+    
+    assert results[-1] < results[0] * 3 + 0.5
+    print("✓ Draw culling performance test completed\n")
+
+
+def test_level_streaming_performance():
+    """Test that an unbounded level streams with constant entity count and tick cost"""
+    print("Testing level streaming performance...")
+    
+    game = Game(headless=True, input_source=ScriptedInput(lambda tick: InputState(right=True)), seed=0)
+    game.level_manager.levels = [{'source': EndlessLevelSource(seed=0)}]
+    game.create_level()
+    game.player.health = game.player.max_health = 10 ** 9  # Walk through every enemy
+    
+    loaded_counts = []
+    timings = []
+    for window in range(5):
+        result = game.simulate(1200)
+        timings.append(result['seconds'] * 1000 / result['frames'])
+        loaded_counts.append(len(game.platforms) + len(game.enemies) + len(game.coins))
+        print(f"x={game.player.rect.x:>6}: {timings[-1]:.4f}ms per tick, "
+              f"{len(game.level_stream.loaded)} chunks / {loaded_counts[-1]} entities loaded")
+    
+    assert game.player.rect.x > 25000
+    assert max(loaded_counts) <= min(loaded_counts) * 2
+    print("✓ Level streaming performance test completed\n")
+
+
+def test_level_loading_performance():
+    """Test binary memory-mapped level loading against JSON"""
+    print("Testing level loading performance...")
+    
+    level = LevelManager.generate_level(20000, seed=0)  # ~8M px, 160k records
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "level.json")
+        binary_path = os.path.join(directory, "level.mlvl")
+        level_to_json(level, json_path)
+        convert_level(level, binary_path)
+        
+        start_time = time.perf_counter()
+        with open(json_path) as f:
+            json_source = DictLevelSource(json.load(f))
+        json_chunks = [json_source.load_chunk(i) for i in range(5)]
+        json_ms = (time.perf_counter() - start_time) * 1000
+        
+        start_time = time.perf_counter()
+        with MmapLevelSource(binary_path) as source:
+            binary_chunks = [source.load_chunk(i) for i in range(5)]
+            binary_ms = (time.perf_counter() - start_time) * 1000
+            
+            start_time = time.perf_counter()
+            for i in range(source.chunk_count):
+                source.load_chunk(i)
+            full_decode_ms = (time.perf_counter() - start_time) * 1000
+            assert source.enemy_count == len(level['enemies'])
+        
+        # Both loaders see the same records
+        for json_chunk, binary_chunk in zip(json_chunks, binary_chunks):
+            for kind in ('platforms', 'enemies', 'coins'):
+                assert [tuple(record) for record in json_chunk[kind]] == binary_chunk[kind]
+        
+        print(f"JSON: {os.path.getsize(json_path)} bytes, load to first chunks {json_ms:.2f}ms")
+        print(f"Binary: {os.path.getsize(binary_path)} bytes, load to first chunks {binary_ms:.4f}ms, "
+              f"decode all chunks {full_decode_ms:.2f}ms")
+    print("✓ Level loading performance test completed\n")
+
+
+def test_enemy_swarm_performance():
+    """Test the vectorized enemy engine against Enemy.update and at scale"""
+    print("Testing enemy swarm performance...")
+    
+    # Same semantics as per-sprite updates on a random layout
+    rng = random.Random(1)
+    index = SpatialGrid()
+    for _ in range(300):
+        platform = pygame.sprite.Sprite()
+        platform.rect = pygame.Rect(rng.randrange(-200, 8000), rng.randrange(300, 580), rng.randrange(20, 400), 20)
+        index.insert(platform)
+    records = [(rng.randrange(0, 8000), rng.randrange(100, 560)) for _ in range(500)]
+    enemies = [Enemy(x, y) for x, y in records]
+    swarm = EnemySwarm()
+    swarm.set_platforms(index)
+    swarm.add(records)
+    sprite_player = Player(3000, 480)
+    swarm_player = Player(3000, 480)
+    for tick in range(300):
+        dt = 1.5 if tick % 3 == 0 else 1
+        for enemy in enemies:
+            enemy.update(index, sprite_player, dt)
+        swarm.update(swarm_player, dt)
+    for slot, enemy in enumerate(enemies):
+        assert (enemy.rect.x, enemy.rect.y, enemy.direction, enemy.attack_cooldown) == (
+            swarm.x[slot], swarm.y[slot], swarm.direction[slot], swarm.cooldowns()[slot])
+    assert sprite_player.health == swarm_player.health
+    
+    # Scale on a generated level
+    level = LevelManager.generate_level(2500, seed=0)
+    platforms = []
+    for record in level['platforms']:
+        platform = pygame.sprite.Sprite()
+        platform.rect = pygame.Rect(record)
+        platforms.append(platform)
+    player = Player(100, 400)
+    for count in (1000, 10000):
+        swarm = EnemySwarm()
+        swarm.set_platforms(platforms)
+        swarm.add([(rng.randrange(0, 1000000), SCREEN_HEIGHT - 70) for _ in range(count)])
+        start_time = time.perf_counter()
+        for _ in range(200):
+            swarm.update(player, 1)
+        per_tick = (time.perf_counter() - start_time) * 1000 / 200
+        print(f"{count:>6} enemies: {per_tick:.4f}ms per tick")
+    print("✓ Enemy swarm performance test completed\n")
+
+
+def test_frame_profiler():
+    """Test per-phase profiling of the real game loop and trace export"""
+    print("Testing frame profiler...")
+    
+    def script(tick):
+        return InputState(right=True, jump=tick % 45 < 10)
+    
+    game = Game(headless=True, input_source=ScriptedInput(script), seed=1, profile=True)
+    game.profiler = FrameProfiler(capacity=300)
+    game.show_profile = True
+    game.simulate(500, render=True, restart_on_game_over=True)
+    
+    # Ring buffer keeps the most recent frames, oldest first
+    frames = list(game.profiler.frames())
+    assert [frame[0] for frame in frames] == list(range(200, 500))
+    summary = game.profiler.summary()
+    for name in ('handle_events', 'player', 'draw_world', 'draw_ui'):
+        p50, p99 = summary[name]
+        assert 0 < p50 <= p99
+    
+    with tempfile.TemporaryDirectory() as directory:
+        trace_path = os.path.join(directory, 'trace.json')
+        csv_path = os.path.join(directory, 'profile.csv')
+        game.export_profile(trace_path, csv_path)
+        with open(trace_path) as f:
+            events = json.load(f)['traceEvents']
+        with open(csv_path) as f:
+            rows = f.read().splitlines()
+    assert sum(event['name'] == 'frame' for event in events) == 300
+    assert len(rows) == 301 and rows[0].split(',')[3:] == list(PHASES) + list(COUNTERS)
+    
+    for name, (p50, p99) in summary.items():
+        print(f"{name:<14} p50 {p50:.3f}ms  p99 {p99:.3f}ms")
+    print(f"Frames over budget: {len(game.profiler.slow_frames())}")
+    print("✓ Frame profiler test completed\n")
+
+
+def test_text_cache_performance():
+    """Test HUD and state screen drawing with cached text against re-rendering every frame"""
+    print("Testing text cache performance...")
+    
+    game = Game(headless=True, seed=1)
+    screens = {'HUD': game.draw_ui, 'paused': game.draw_pause_screen, 'game over': game.draw_game_over_screen}
+    for name, draw in screens.items():
+        for capacity in (0, 256):  # A zero-capacity cache renders every string every frame
+            game.text_cache = TextCache(capacity)
+            start_time = time.perf_counter()
+            for frame in range(300):
+                game.player.coins_collected = frame // 60  # HUD value changing now and then
+                draw()
+            per_frame = (time.perf_counter() - start_time) * 1000 / 300
+            label = "cached" if capacity else "uncached"
+            print(f"{name:<10} {label:<8}: {per_frame:.4f}ms per frame")
+        assert game.text_cache.misses <= 5 * 4  # Only new strings are rendered
+    print("✓ Text cache performance test completed\n")
+
+
+def test_surface_registry_performance():
+    """Test shared, display-format surfaces against one owned surface per sprite"""
+    print("Testing surface registry performance...")
+    
+    try:
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    except pygame.error:
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))  # No display: nothing to convert to
+    level = LevelManager.generate_level(2500, seed=0)
+    specs = ([((w, h), GREEN) for _, _, w, h in level['platforms']] +
+             [((30, 30), BROWN)] * len(level['enemies']) + [((20, 20), YELLOW)] * len(level['coins']))
+    
+    def owned(size, color):
+        surface = pygame.Surface(size)
+        surface.fill(color)
+        return surface
+    
+    registry = SurfaceRegistry()
+    results = {}
+    for label, make in (("owned", owned), ("shared", registry.get)):
+        start_time = time.perf_counter()
+        surfaces = [make(size, color) for size, color in specs]
+        create_ms = (time.perf_counter() - start_time) * 1000
+        unique = {id(surface): surface for surface in surfaces}.values()
+        memory = sum(surface.get_bytesize() * surface.get_width() * surface.get_height() for surface in unique)
+        
+        # One screen's worth of enemy and coin blits, repeated
+        blits = [(surface, (i * 37 % SCREEN_WIDTH, i * 53 % SCREEN_HEIGHT))
+                 for i, surface in enumerate(surfaces[-2000:])]
+        start_time = time.perf_counter()
+        for _ in range(50):
+            screen.blits(blits, doreturn=False)
+        blit_ms = (time.perf_counter() - start_time) * 1000 / 50
+        results[label] = memory
+        print(f"{label:<6}: {len(unique):>6} surfaces, {memory / 1e6:.2f}MB, "
+              f"create {create_ms:.2f}ms, 2000 blits {blit_ms:.4f}ms")
+    assert len(registry) < 100
+    assert results['shared'] < results['owned'] / 10
+    pygame.display.quit()
+    print("✓ Surface registry performance test completed\n")
+
+
+def test_dirty_rect_rendering():
+    """Test dirty-rect drawing against full redraws, with the camera still and scrolling"""
+    print("Testing dirty-rect rendering...")
+    
+    def script(tick):
+        phase = (tick // 150) % 4
+        return InputState(left=phase == 2, right=phase == 0, jump=tick % 50 < 5)
+    
+    def make(dirty_rendering):
+        pause = {500: [pygame.K_ESCAPE], 560: [pygame.K_ESCAPE]}
+        return Game(headless=True, input_source=ScriptedInput(script, pause), seed=3,
+                    dirty_rendering=dirty_rendering)
+    
+    dirty, full = make(True), make(False)
+    timings = {'dirty': [], 'full': []}
+    dirty_frames = 0
+    for _ in range(1200):
+        for label, game in (('dirty', dirty), ('full', full)):
+            game.handle_events()
+            game.update()
+            start_time = time.perf_counter()
+            game.draw(0.5)
+            timings[label].append(time.perf_counter() - start_time)
+        if dirty.presented_rects is not None:
+            dirty_frames += 1
+        # Same pixels, except where the clock-driven invincibility flash differs between the two
+        if not dirty.player.invincible:
+            assert pygame.image.tobytes(dirty.screen, 'RGB') == pygame.image.tobytes(full.screen, 'RGB')
+    assert 0 < dirty_frames < 1200
+    
+    for label, samples in timings.items():
+        print(f"{label:<5}: {sum(samples) * 1000 / len(samples):.4f}ms per draw")
+    print(f"Frames presented as dirty rects: {dirty_frames}/1200")
+    print("✓ Dirty-rect rendering test completed\n")
+
+
+def test_startup_time():
+    """Test cold start: process launch to first presented frame, with lazy initialization"""
+    print("Testing startup time...")
+    
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+    here = os.path.dirname(os.path.abspath(__file__))
+    
+    # Importing the game must not initialize any pygame subsystem
+    probe = ("import enhanced_mario_game, pygame; "
+             "print(pygame.display.get_init(), pygame.font.get_init(), pygame.mixer.get_init())")
+    output = subprocess.run([sys.executable, '-c', probe], cwd=here, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.splitlines()[-1].split() == ['False', 'False', 'None']
+    
+    # Font lookups are resolved once and then served from the disk cache
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, 'fonts.json')
+        path = resolve_font('no-such-font-family', cache_path)
+        with open(cache_path) as f:
+            assert json.load(f) == {'no-such-font-family': path}
+        assert resolve_font('no-such-font-family', cache_path) == path
+    
+    samples = []
+    for _ in range(3):
+        start_time = time.perf_counter()
+        output = subprocess.run([sys.executable, 'run_enhanced_game.py', '--startup-benchmark'], cwd=here,
+                                env=env, capture_output=True, text=True, check=True).stdout
+        total = (time.perf_counter() - start_time) * 1000
+        samples.append((total, json.loads(output.splitlines()[-1])))
+    total, phases = min(samples, key=lambda sample: sample[0])
+    
+    print(f"Process start to first frame: {total:.1f}ms")
+    for name, value in phases.items():
+        print(f"  {name}: {value:.1f}ms")
+    print("✓ Startup time test completed\n")
+
+
+def test_benchmark_harness():
+    """Test the scenario benchmark harness: stats, JSON results and regression comparison"""
+    print("Testing benchmark harness...")
+    
+    results = benchmark.run_benchmarks(['spatial_query', 'frame'], sizes=(10, 1000), repeat=5, warmup=1)
+    stats = results['results']['frame']['1000']
+    assert stats['runs'] == 5
+    assert stats['p5_ms'] <= stats['median_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+    assert stats['iqr_ms'] == stats['p75_ms'] - stats['p25_ms']
+    json.loads(json.dumps(results))  # Machine-readable as written
+    
+    # A run is never a regression against itself; a doubled median always is
+    assert benchmark.compare(results, results) == []
+    slower = json.loads(json.dumps(results))
+    slower['results']['frame']['1000']['median_ms'] = stats['median_ms'] * 2 + stats['iqr_ms']
+    regressions = benchmark.compare(slower, results)
+    assert [(r['scenario'], r['size']) for r in regressions] == [('frame', 1000)]
+    print("✓ Benchmark harness test completed\n")
+
+
+def test_input_replay():
+    """Test that a recorded session with uneven frame pacing replays headless to the same world"""
+    print("Testing input recording and replay...")
+    
+    class PlayedInput(ScriptedInput):
+        """Scripted controls with key presses delivered on the first frame at or after their tick"""
+        
+        def events(self):
+            due = [tick for tick in self.key_events if tick <= self.tick]
+            return [pygame.event.Event(pygame.KEYDOWN, key=key) for tick in due for key in self.key_events.pop(tick)]
+    
+    def script(tick):
+        phase = (tick // 200) % 5
+        return InputState(left=phase == 3, right=phase in (0, 1, 4), jump=tick % 37 < 8)
+    
+    pacing = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'session.mrec')
+        # The engine, update LOD and tile world settings travel with the recording
+        for batch_enemies, update_lod, tile_world in ((False, False, False), (True, False, False),
+                                                      (False, True, False), (False, False, True)):
+            keys = {600: [pygame.K_ESCAPE], 700: [pygame.K_ESCAPE], 2500: [pygame.K_r]}
+            recorder = RecordingInput(PlayedInput(script, keys))
+            game = Game(headless=True, input_source=recorder, seed=7, batch_enemies=batch_enemies,
+                        update_lod=update_lod, tile_world=tile_world)
+            # Like Game.run: events once per frame, then zero or more fixed ticks
+            while len(recorder.inputs) < 3600:
+                game.handle_events()
+                for _ in range(pacing.choice((0, 1, 1, 2, 3))):
+                    game.update()
+                game.draw(0.5)
+            save_recording(recorder.recording(game), path)
+            recording = load_recording(path)
+            assert len(recording.key_events) == 3
+            assert (recording.batch_enemies, recording.update_lod, recording.tile_world) == (batch_enemies, update_lod,
+                                                                                             tile_world)
+            
+            result = replay(recording)
+            assert result['matches']
+            assert not replay(recording._replace(key_events=recording.key_events[1:]))['matches']
+            if update_lod:
+                assert not replay(recording._replace(update_lod=False))['matches']  # LOD changes the simulation
+            print(f"batch_enemies={batch_enemies}, update_lod={update_lod}, tile_world={tile_world}: {len(recording.inputs)} ticks in {os.path.getsize(path)} bytes, "
+                  f"replayed at {result['fps']:.0f} ticks/s")
+    print("✓ Input replay test completed\n")
+
+
+def test_vector_env_throughput():
+    """Test the training environments: rewards, sharded stepping and steps per second"""
+    print("Testing vectorized environment throughput...")
+    
+    rng = np.random.default_rng(0)
+    actions = rng.choice([2, 6, 6, 4, 0], size=(300, 16))  # Mostly run right and jump
+    
+    env = MarioEnv(seed=0)
+    env.reset()
+    total_reward = 0
+    start_time = time.perf_counter()
+    for action in actions[:, 0]:
+        _, reward, done, _ = env.step(action)
+        total_reward += reward
+        if done:
+            env.reset()
+    single_rate = len(actions) / (time.perf_counter() - start_time)
+    assert total_reward == env.game.player.coins_collected + 2 * env.game.player.enemies_defeated
+    
+    # Worker processes and the in-process runner see the same episodes
+    trajectories = {}
+    for workers in (0, 2):
+        with VectorEnv(16, workers=workers, seed=0) as venv:
+            observations = [venv.reset().copy()]
+            rewards = []
+            start_time = time.perf_counter()
+            for step_actions in actions:
+                obs, reward, _ = venv.step(step_actions)
+                observations.append(obs.copy())
+                rewards.append(reward.copy())
+            rate = actions.size / (time.perf_counter() - start_time)
+        assert observations[-1].shape == (16, OBS_SIZE)
+        trajectories[workers] = (np.array(observations), np.array(rewards))
+        print(f"VectorEnv 16 envs, {workers} workers: {rate:.0f} steps/s")
+    assert np.array_equal(trajectories[0][0], trajectories[2][0])
+    assert np.array_equal(trajectories[0][1], trajectories[2][1])
+    
+    print(f"Single environment: {single_rate:.0f} steps/s on one core")
+    print("✓ Vectorized environment throughput test completed\n")
+
+
+def test_pixel_observations():
+    """Test zero-copy pixel capture, grayscale conversion and frame stacking"""
+    print("Testing pixel observations...")
+    
+    game = Game(headless=True, input_source=ScriptedInput(benchmark.soak_script), seed=0)
+    game.draw()
+    observer = PixelObserver(game, size=(160, 120))
+    frames = observer.capture()
+    
+    # The pixel view aliases the surface's own memory; no frame is copied to read it
+    assert observer.pixels.shape == (120, 160, 3)
+    assert np.shares_memory(observer.pixels, pygame.surfarray.pixels3d(observer.surface))
+    expected = pygame.surfarray.array3d(pygame.transform.scale(game.screen, (160, 120))).transpose(1, 0, 2)
+    assert np.array_equal(observer.pixels, expected)
+    assert np.array_equal(frames[0], expected)
+    assert frames.shape == (1, 120, 160, 3) and np.shares_memory(frames, observer.pixels)  # RGB frames skip the ring
+    
+    # Grayscale matches the integer luma weights
+    gray = PixelObserver(game, size=(160, 120), grayscale=True)
+    frame = gray.capture()[0]
+    weights = np.array([77, 150, 29], dtype=np.uint32)
+    assert frame.dtype == np.uint8 and frame.shape == (120, 160)
+    assert np.array_equal(frame, (expected.astype(np.uint32) @ weights >> 8).astype(np.uint8))
+    
+    # Stacked frames come back oldest first, as views of one preallocated ring
+    stacked = PixelObserver(game, size=(160, 120), grayscale=True, stack=4)
+    captured = []
+    for _ in range(6):
+        for _ in range(5):
+            game.update()
+        game.draw()
+        frames = stacked.capture()
+        captured.append(frames[-1].copy())
+        assert np.shares_memory(frames, stacked.ring)
+    assert frames.shape == (4, 120, 160)
+    assert np.array_equal(frames, np.array(captured[-4:]))
+    
+    # Capture cost against copying the full-resolution screen out
+    iterations = 200
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        observer.capture()
+    capture_time = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        gray.capture()
+    gray_time = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        pygame.surfarray.array3d(game.screen)
+    copy_time = time.perf_counter() - start_time
+    
+    env = MarioEnv(seed=0, pixels=True, grayscale=True, frame_stack=4)
+    obs = env.reset()
+    assert obs.shape == (4, 120, 160) and obs.dtype == np.uint8
+    obs, _, _, _ = env.step(2)
+    assert obs.any()
+    rgb_env = MarioEnv(seed=0, pixels=True)
+    obs = rgb_env.reset()
+    assert obs.shape == (1, 120, 160, 3) and np.shares_memory(obs, rgb_env.observer.pixels)
+    rgb_env.step(2)
+    assert np.array_equal(obs[0], rgb_env.observer.pixels)  # The observation follows later captures
+    
+    print(f"Pixel capture (160x120 RGB): {capture_time / iterations * 1000:.3f}ms per frame")
+    print(f"Pixel capture (160x120 grayscale): {gray_time / iterations * 1000:.3f}ms per frame")
+    print(f"Full-resolution array3d copy: {copy_time / iterations * 1000:.3f}ms per frame")
+    print("✓ Pixel observation test completed\n")
+
+
+def test_snapshot_restore():
+    """Test that restored worlds replay identically and that snapshots cost microseconds"""
+    print("Testing world snapshot and restore...")
+    
+    for batch_enemies in (False, True):
+        script = ScriptedInput(benchmark.soak_script)
+        game = Game(headless=True, input_source=script, seed=0, batch_enemies=batch_enemies)
+        game.level_manager.levels = [LevelManager.generate_level(60, seed=0)]
+        game.create_level()
+        game.simulate(300)
+        snapshot = game.snapshot()
+        snapshot_hash = game.state_hash()
+        
+        # A rollout far enough to stream chunks out and back, then a rollout from the same point
+        game.simulate(1500)
+        rollout_hash = game.state_hash()
+        assert sorted(game.level_stream.loaded) != [chunk[0] for chunk in snapshot.chunks]
+        for _ in range(2):
+            game.restore(snapshot)
+            script.tick = 300
+            assert game.state_hash() == snapshot_hash
+            game.simulate(1500)
+            assert game.state_hash() == rollout_hash
+        
+        # Restoring across a restart rebuilds the level stream
+        game.restart_game()
+        game.restore(snapshot)
+        assert game.state_hash() == snapshot_hash
+        
+        # Short rollouts patch the loaded chunks in place
+        iterations = 1000
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            snapshot = game.snapshot()
+        snapshot_time = (time.perf_counter() - start_time) / iterations
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            game.restore(snapshot)
+        restore_time = (time.perf_counter() - start_time) / iterations
+        start_time = time.perf_counter()
+        game.create_level()
+        rebuild_time = time.perf_counter() - start_time
+        
+        print(f"{'Swarm' if batch_enemies else 'Sprite'} enemies: snapshot {snapshot_time * 1e6:.1f}us, "
+              f"restore {restore_time * 1e6:.1f}us, create_level {rebuild_time * 1e6:.1f}us")
+    
+    # F5 saves a checkpoint and F9 returns to it
+    game = Game(headless=True, input_source=ScriptedInput(benchmark.soak_script,
+                                                          {10: [pygame.K_F5], 100: [pygame.K_F9]}), seed=0)
+    game.simulate(10)
+    checkpoint_hash = game.state_hash()
+    game.simulate(90)  # Saves before its first tick
+    game.handle_events()
+    assert game.state_hash() == checkpoint_hash
+    
+    print("✓ Snapshot and restore test completed\n")
+
+
+def test_tile_world_collisions():
+    """Test that the tile world matches rect collisions and costs the same at any platform density"""
+    print("Testing tile world collisions...")
+    
+    # Stamping counts covering rects, so shared cells survive removing one of them
+    tiles = TileWorld(tile_size=10)
+    tiles.add(pygame.Rect(0, 560, 1024, 40))
+    tiles.add(pygame.Rect(1024, 560, 1000, 40))
+    tiles.add(pygame.Rect(205, 453, 100, 20))  # Off the grid: covers every cell it touches
+    assert tiles.cells[102, 56] == 2
+    tiles.remove(pygame.Rect(1024, 560, 1000, 40))
+    assert tiles.cells[102, 56] == 1 and tiles.cells[103, 56] == 0
+    assert tiles.cells[20:31, 45:48].all() and not tiles.cells[31, 45] and not tiles.cells[20, 44]
+    assert tiles.ground(pygame.Rect(100, 510, 30, 50))
+    assert tiles.landing(pygame.Rect(100, 520, 30, 50), 540) == 560
+    assert tiles.support(300, 330, 555, 562) == 560
+    
+    # Levels on the tile grid play out exactly as with rect collisions
+    for batch_enemies in (False, True):
+        hashes = {}
+        for tile_world in (False, True):
+            game = Game(headless=True, input_source=ScriptedInput(benchmark.soak_script), seed=0,
+                        batch_enemies=batch_enemies, tile_world=tile_world)
+            game.level_manager.levels = [LevelManager.generate_level(40, seed=3)]
+            game.create_level()
+            game.simulate(3000, restart_on_game_over=True)
+            hashes[tile_world] = game.state_hash()
+        assert hashes[False] == hashes[True]
+    
+    # Collision cost against platform density
+    controls = [InputState(right=True, jump=tick % 45 < 10) for tick in range(90)]
+    iterations = 5000
+    for count in (40, 4000):
+        rng = random.Random(0)
+        records = [(0, SCREEN_HEIGHT - 40, 4000, 40)] + [
+            (rng.randrange(0, 4000, 10), rng.randrange(100, 540, 10), rng.randrange(20, 200, 10), 20)
+            for _ in range(count)]
+        index = SpatialGrid()
+        tiles = TileWorld()
+        for record in records:
+            platform = Platform(*record)
+            index.insert(platform)
+            tiles.add(platform.rect)
+        for world in (index, tiles):
+            player = Player(100, 400)
+            start_time = time.perf_counter()
+            for tick in range(iterations):
+                player.update(world, (), 1, controls[tick % 90])
+                if player.rect.x > 3800 or player.rect.top > SCREEN_HEIGHT:
+                    player.rect.topleft = (100, 400)
+            elapsed = (time.perf_counter() - start_time) / iterations
+            print(f"{count} platforms, {type(world).__name__}: {elapsed * 1e6:.2f}us per player update")
+    
+    print("✓ Tile world collision test completed\n")
+
+
+def test_update_lod():
+    """Test tiered enemy and coin updates: catch-up, sleeping, tier counts and the time saved"""
+    print("Testing update level of detail...")
+    
+    # An idle player keeps the camera on chunk 0: chunk 1 is mid distance, chunk 2 sleeps
+    game = Game(headless=True, input_source=ScriptedInput(), seed=0, update_lod=True, profile=True)
+    ticks = 102
+    game.simulate(ticks)
+    loaded = game.level_stream.loaded
+    assert sorted(loaded) == [0, 1, 2]
+    for chunk_index, awake in ((0, True), (1, True), (2, False)):
+        chunk = loaded[chunk_index]
+        for coin in chunk['coins']:
+            # Mid-distance coins owe the dt since their last update, and catch up on it
+            elapsed = coin.float_offset + chunk['pending'] * coin.float_speed
+            assert abs(elapsed - (ticks * coin.float_speed if awake else 0)) < 1e-9
+    assert loaded[1]['pending'] > 0
+    counts = game.profiler.counter_summary()
+    assert counts['lod_near'][0] > 0 and counts['lod_asleep'][0] > 0 and counts['lod_mid'][1] > 0
+    
+    # Snapshots carry the schedule, so rollouts stay deterministic
+    game = Game(headless=True, input_source=ScriptedInput(benchmark.soak_script), seed=0, update_lod=True)
+    game.simulate(200)
+    snapshot = game.snapshot()
+    game.simulate(300)
+    rollout_hash = game.state_hash()
+    game.restore(snapshot)
+    game.input_source.tick = 200
+    game.simulate(300)
+    assert game.state_hash() == rollout_hash
+    
+    # Entity update time on a level crowded with enemies and coins
+    level = LevelManager.generate_level(100, seed=0)
+    level['enemies'] = [(x, SCREEN_HEIGHT - 70) for x in range(300, 40000, 60)]
+    level['coins'] = [(x, 150 + (i % 5) * 20) for i, x in enumerate(range(40, 40000, 20))]
+    for batch_enemies in (False, True):
+        for update_lod in (False, True):
+            game = Game(headless=True, input_source=ScriptedInput(benchmark.soak_script), seed=0,
+                        batch_enemies=batch_enemies, update_lod=update_lod, profile=True)
+            game.level_manager.levels = [level]
+            game.create_level()
+            game.simulate(1000, restart_on_game_over=True)
+            summary = game.profiler.summary()
+            counts = game.profiler.counts[game.profiler.completed_rows()].mean(axis=0)
+            entity_ms = summary['enemies'][0] + summary['coins'][0]
+            tiers = ", ".join(f"{name[4:]} {mean:.0f}" for name, mean in zip(COUNTERS, counts.tolist())
+                              if name.startswith('lod_'))
+            print(f"{'Swarm' if batch_enemies else 'Sprite'} enemies, LOD {'on' if update_lod else 'off'}: "
+                  f"{entity_ms:.3f}ms per tick (mean entities {tiers})")
+    
+    print("✓ Update LOD test completed\n")
+
+
+def test_timer_wheel():
+    """Test that timers fire on their tick at every wheel level and that idle timers cost nothing per tick"""
+    print("Testing timer wheel...")
+    
+    # Every timer fires exactly on its deadline, across cascades, unless cancelled
+    rng = random.Random(0)
+    wheel = TimerWheel()
+    fired = []
+    expected = {}
+    timers = []
+    for _ in range(2000):
+        delay = rng.choice((rng.randrange(1, 64), rng.randrange(64, 4096), rng.randrange(4096, 300000)))
+        timer = wheel.schedule(delay, lambda number: fired.append((number, wheel.now)), len(timers))
+        expected[len(timers)] = wheel.now + delay
+        timers.append(timer)
+        if rng.random() < 0.2:
+            wheel.advance(rng.randrange(1, 500))
+    for number in rng.sample(range(len(timers)), 200):
+        if timers[number].active:
+            wheel.cancel(timers[number])
+            del expected[number]
+    while len(wheel):
+        wheel.advance(rng.randrange(1, 5000))
+    assert sorted(fired) == sorted(expected.items())
+    
+    # Invincibility and cooldowns last their frame durations at any tick rate, and survive snapshots
+    for sim_rate in (60, 120):
+        game = Game(headless=True, sim_rate=sim_rate, seed=0)
+        player = game.player
+        player.take_damage(10)
+        ticks = 0
+        snapshot = None
+        while player.invincible:
+            game.update()
+            ticks += 1
+            if ticks == 20:
+                snapshot = game.snapshot()
+        assert ticks == player.max_invincible_time * sim_rate // 60
+        game.restore(snapshot)
+        assert player.invincible and player.invincible_timer == ticks - 20
+    
+    # Per-tick cost with many pending cooldowns: the wheel against counting every one down
+    count = 10000
+    iterations = 600
+    cooldowns = [rng.randrange(1, 90) for _ in range(count)]
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        for i in range(count):
+            if cooldowns[i] > 0:
+                cooldowns[i] -= 1
+            else:
+                cooldowns[i] = 90
+    countdown_time = (time.perf_counter() - start_time) / iterations
+    
+    wheel = TimerWheel()
+    
+    def rearm():
+        wheel.schedule(90, rearm)
+    for _ in range(count):
+        wheel.schedule(rng.randrange(1, 90), rearm)
+    start_time = time.perf_counter()
+    wheel.advance(iterations)
+    wheel_time = (time.perf_counter() - start_time) / iterations
+    
+    idle = TimerWheel()
+    for _ in range(count):
+        idle.schedule(rng.randrange(100000, 200000))
+    start_time = time.perf_counter()
+    idle.advance(iterations)
+    idle_time = (time.perf_counter() - start_time) / iterations
+    print(f"{count} cooldowns: countdown {countdown_time * 1000:.3f}ms, wheel {wheel_time * 1000:.3f}ms per tick "
+          f"(~{count / 90:.0f} expiring), {idle_time * 1e6:.2f}us per tick with none expiring")
+    
+    print("✓ Timer wheel test completed\n")
+
+
+def test_component_store():
+    """Test that entity facades read and write their store rows and measure memory per entity"""
+    print("Testing component store...")
+    
+    # Facades are views of their rows, free their rows when collected and still go into sprite groups
+    store = ComponentStore(ENEMY_COMPONENTS)
+    enemy = Enemy(100, 200, store=store)
+    enemy.health -= 20
+    assert store.health[enemy.row] == 30 and enemy.rect.topleft == (100, 200)
+    
+    # rect is one Rect per facade refreshed from the row; assigning or editing it in place moves the entity
+    rect = enemy.rect
+    assert enemy.rect is rect
+    enemy.rect = pygame.Rect(150, 250, 30, 30)
+    assert (store.x[enemy.row], store.y[enemy.row]) == (150, 250) and enemy.rect.topleft == (150, 250)
+    enemy.rect.x = 0
+    assert store.x[enemy.row] == 0 and enemy.rect.x == 0
+    enemy.rect.move_ip(5, -10)
+    enemy.rect.clamp_ip(pygame.Rect(10, 0, 100, 100))
+    assert (store.x[enemy.row], store.y[enemy.row]) == (10, 70)
+    try:
+        enemy.rect.inflate_ip(4, 4)
+        assert False, "enemies have a fixed size"
+    except ValueError:
+        assert enemy.rect.size == (30, 30)
+    moved = enemy.rect.move(100, 0)  # Derived rects are unbound
+    moved.x = 500
+    assert store.x[enemy.row] == 10
+    platform = Platform(0, 500, 80, 20, store=ComponentStore(PLATFORM_COMPONENTS))
+    platform.rect.inflate_ip(20, 0)
+    assert (platform.store.x[platform.row], platform.store.width[platform.row]) == (-10, 100)
+    group = pygame.sprite.Group(enemy)
+    assert enemy.take_damage(50) and not enemy.alive and not group
+    row = enemy.row
+    del enemy
+    assert len(store) == 0 and Enemy(0, 0, store=store).row == row
+    
+    # The bulk coin float system matches per-coin float updates rounded the way Rect rounds
+    store = ComponentStore(COIN_COMPONENTS)
+    coins = [Coin(i * 30, 300 + i, store) for i in range(200)]
+    for tick in range(300):
+        coins[tick % len(coins)].update(0.5 + tick % 7)
+    expected = []
+    for coin in coins:
+        rect = pygame.Rect(coin.rect)
+        rect.y = coin.start_y + math.sin(coin.float_offset + COIN_FLOAT_SPEED * 1.25) * COIN_FLOAT_AMPLITUDE
+        expected.append(rect.y)
+    rows = np.array([coin.row for coin in coins])
+    float_coins(store, rows, 1.25)
+    assert store.y[rows].tolist() == expected
+    
+    # Memory per entity: facade plus store row, and with the spatial grid entry a Game adds
+    timers = TimerWheel()
+    kinds = (
+        ('Coin', COIN_COMPONENTS, lambda i, store: Coin(i * 30, 300, store)),
+        ('Enemy', ENEMY_COMPONENTS, lambda i, store: Enemy(i * 40, 300, timers=timers, store=store)),
+        ('Platform', PLATFORM_COMPONENTS, lambda i, store: Platform(i * 100, 500, 80, 20, store=store)),
+    )
+    count = 10000
+    for name, components, make in kinds:
+        grid = SpatialGrid()
+        tracemalloc.start()
+        store = ComponentStore(components)
+        base = tracemalloc.get_traced_memory()[0]
+        entities = [make(i, store) for i in range(count)]
+        created = tracemalloc.get_traced_memory()[0]
+        for entity in entities:
+            grid.insert(entity)
+        indexed = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        per_entity = (created - base) / count
+        print(f"{name}: {per_entity:.0f} bytes per entity ({store.memory_bytes() / count:.0f} in columns), "
+              f"{(indexed - base) / count:.0f} with its grid entry")
+        assert per_entity < 400  # Full sprites took 377-669 bytes before grid and group entries
+    
+    print("✓ Component store test completed\n")
+
+
+def test_entity_pools():
+    """Test that level loads, restarts and chunk streaming reuse pooled entities instead of building new ones"""
+    print("Testing entity pools...")
+    
+    game = Game(headless=True, seed=0, input_source=ScriptedInput(benchmark.soak_script))
+    game.level_manager.levels = [LevelManager.generate_level(100, seed=0), LevelManager.generate_level(150, seed=1)]
+    game.create_level()
+    game.simulate(3000)  # Streams chunks in and out, collecting coins and defeating enemies on the way
+    stats = game.pool_stats()
+    assert all(stats[name]['misses'] == 0 for name in ('platforms', 'enemies', 'coins'))  # Preallocated from counts
+    player = game.player
+    
+    def transitions():
+        for _ in range(5):
+            game.next_level()
+            game.next_level()
+            game.restart_game()
+    transitions()  # Warm up: pools and indexes reach the size both levels need
+    before = game.pool_stats()
+    collections = []
+    
+    def on_gc(phase, info):
+        if phase == 'start':
+            collections.append(info['generation'])
+    gc.callbacks.append(on_gc)
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    transitions()
+    elapsed = (time.perf_counter() - start_time) / 15
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    gc.callbacks.remove(on_gc)
+    after = game.pool_stats()
+    
+    assert game.player is player and player.lives == 3 and player.coins_collected == 0
+    for name in ('platforms', 'enemies', 'coins'):
+        assert after[name]['misses'] == before[name]['misses']
+        assert after[name]['hits'] > before[name]['hits']
+    print(f"Level load or restart: {elapsed * 1000:.3f}ms, {peak / 1024:.0f}KiB peak allocation over 15, "
+          f"{len(collections)} GC collections (generations {sorted(set(collections))})")
+    print("Pools: " + ", ".join(f"{name} {value['hits']} hits / {value['misses']} misses"
+                                for name, value in after.items()))
+    
+    print("✓ Entity pools test completed\n")
+
+
+def test_gc_scheduling():
+    """Test that managed GC keeps collections out of gameplay frames and that steady-state frames hold no memory"""
+    print("Testing GC scheduling...")
+    
+    level = LevelManager.generate_level(100, seed=0)
+    for manage_gc in (False, True):
+        gc_enabled = []  # Collector state seen by each simulated tick
+        
+        def script(tick):
+            gc_enabled.append(gc.isenabled())
+            return benchmark.soak_script(tick)
+        keys = {1210: [pygame.K_ESCAPE], 1230: [pygame.K_ESCAPE]}  # Pause, then resume
+        with Game(headless=True, seed=0, input_source=ScriptedInput(script, keys), manage_gc=manage_gc,
+                  trace_memory=True) as game:
+            game.level_manager.levels = [level]
+            game.create_level()
+            monitor = game.memory_monitor
+            collections_before = monitor.total_collections
+            monitor.max_pause_ns = 0
+            game.simulate(1200, render=True)
+            collections = monitor.total_collections - collections_before
+            rows = game.profiler.completed_rows()
+            held = game.profiler.counts[rows, COUNTERS.index('held_bytes')]
+            allocated = game.profiler.counts[rows, COUNTERS.index('alloc_bytes')]
+            print(f"{'Managed' if manage_gc else 'Automatic'} GC: {collections} collections over 1200 frames "
+                  f"(longest {monitor.max_pause_ns / 1e3:.0f}us), allocated per frame p50 {np.median(allocated):.0f} B, "
+                  f"held p50 {np.median(held):.0f} B")
+            assert np.median(held) == 0  # Steady-state frames free everything they allocate
+            assert gc.isenabled() and gc.get_freeze_count() == 0  # Handed back when simulate returns
+            
+            if manage_gc:
+                # Play suspends collection from the end of the first frame, and only scheduled collections ran
+                scheduler = game.gc_scheduler
+                assert gc_enabled[0] and not any(gc_enabled[1:1200])
+                assert collections == scheduler.idle_collections + scheduler.forced_collections
+                
+                # Pausing collects the whole heap once and hands collection back; resuming suspends it again
+                # (each simulate call enters play again at the end of its first frame)
+                game.simulate(40)
+                assert game.state == GameState.PLAYING and scheduler.transition_collections == 1
+                assert not any(gc_enabled[1201:1210]) and all(gc_enabled[1211:1230])
+                assert not any(gc_enabled[1231:])
+                
+                # A loop that raises still hands collection back
+                def failing(tick):
+                    if tick == 1250:
+                        raise RuntimeError("script failed")
+                    return script(tick)
+                game.input_source.states = failing
+                try:
+                    game.simulate(20)
+                except RuntimeError:
+                    pass
+                assert gc_enabled[-1] is False and gc.isenabled() and gc.get_freeze_count() == 0
+        assert gc.isenabled() and gc.get_freeze_count() == 0
+    
+    # Frames with no time to spare still collect once the young generation grows far enough
+    scheduler = GCScheduler()
+    young_counts = []
+    scheduler.begin_play()
+    try:
+        for _ in range(200):
+            for _ in range(100):
+                cycle = []
+                cycle.append(cycle)
+            del cycle
+            scheduler.idle(0.0)
+            young_counts.append(gc.get_count()[0])
+    finally:
+        scheduler.close()
+    limit = scheduler.idle_threshold * FORCED_COLLECT_FACTOR
+    assert scheduler.idle_collections == 0 and scheduler.forced_collections >= 2
+    assert max(young_counts) < limit + 200  # Bounded instead of growing for the whole level
+    print(f"No spare frame time: {scheduler.forced_collections} forced young collections over 20000 garbage cycles, "
+          f"young generation peaked at {max(young_counts)}")
+    
+    print("✓ GC scheduling test completed\n")
+
+
 def main():
     """Run all performance tests"""
     print("=" * 60)
@@ -161,11 +1247,35 @@ def main():
         test_particle_system_performance()
         test_camera_system_performance()
         test_entity_update_performance()
+        test_spatial_index_scaling()
+        test_headless_simulation_performance()
+        test_fixed_timestep_rates()
+        test_draw_culling_performance()
+        test_level_streaming_performance()
+        test_level_loading_performance()
+        test_enemy_swarm_performance()
+        test_frame_profiler()
+        test_text_cache_performance()
+        test_surface_registry_performance()
+        test_dirty_rect_rendering()
+        test_startup_time()
+        test_benchmark_harness()
+        test_input_replay()
+        test_vector_env_throughput()
+        test_pixel_observations()
+        test_snapshot_restore()
+        test_tile_world_collisions()
+        test_update_lod()
+        test_timer_wheel()
+        test_component_store()
+        test_entity_pools()
+        test_gc_scheduling()
         
         print("=" * 60)
         print("ALL PERFORMANCE TESTS COMPLETED SUCCESSFULLY!")
         print("The enhanced game includes the following optimizations:")
         print("- Efficient sprite collision detection")
+        print("- Uniform-grid spatial index for platform and coin queries")
         print("- Optimized particle system with proper memory management")
         print("- Smooth camera system with boundary checks")
         print("- Delta-time based updates for consistent performance")
@@ -175,6 +1285,7 @@ def main():
         
     except Exception as e:
         print(f"Error during performance tests: {e}")
+        raise  # Fail the run instead of reporting success
     finally:
         pygame.quit()
 
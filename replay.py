@@ -0,0 +1,163 @@
+"""
+Deterministic input recording and replay for the Enhanced Mario Game
+
+A recording holds the controls sampled on every simulation tick and the menu
+keys handled between ticks, together with the seed and tick rate the session
+ran at and a hash of the world when it ended. Replaying feeds the same input
+through a headless game one fixed tick per frame, so a recorded session becomes
+a repeatable benchmark, and checks that the world ends in the recorded state.
+
+File layout (little-endian):
+
+    header   magic, version, tick rate, flags (batch enemies, update LOD, tile world), seed, tick count, event count, final state hash
+    payload  zlib: one input byte per tick (bit 0 left, bit 1 right, bit 2 jump),
+             then (tick, key) int32 pairs for the key events
+"""
+
+import argparse
+import random
+import struct
+import sys
+import zlib
+from typing import List, NamedTuple, Tuple
+
+import pygame
+
+from enhanced_mario_game import Game, KeyboardInput, ScriptedInput, INPUT_STATES, pack_input
+
+MAGIC = b'MREC'
+VERSION = 6  # 2: final hash taken over Game.snapshot(), 3: including update LOD state, 4: cooldowns in ticks,
+             # 5: update LOD and tile world flags, 6: tick-rate independent jump arcs
+HEADER = struct.Struct('<4sHHHqII16s')
+EVENT_RECORD = struct.Struct('<ii')
+FLAG_BATCH_ENEMIES = 1
+FLAG_UPDATE_LOD = 2
+FLAG_TILE_WORLD = 4
+RECORDED_KEYS = (pygame.K_ESCAPE, pygame.K_r, pygame.K_n, pygame.K_F5, pygame.K_F9)  # Keys that change the simulated world
+
+
+class Recording(NamedTuple):
+    """A recorded session: settings, per-tick input bytes, key events and the final world hash"""
+    sim_rate: int
+    seed: int
+    batch_enemies: bool
+    update_lod: bool
+    tile_world: bool
+    inputs: bytes
+    key_events: List[Tuple[int, int]]  # (tick, key), the tick being the next one to be simulated
+    final_hash: str
+
+
+class RecordingInput:
+    """Wraps an input source, recording each tick's controls and the key events handled"""
+
+    def __init__(self, source):
+        self.source = source
+        self.inputs = bytearray()
+        self.key_events = []
+
+    def events(self):
+        events = self.source.events()
+        tick = len(self.inputs)
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key in RECORDED_KEYS:
+                self.key_events.append((tick, event.key))
+        return events
+
+    def poll(self):
+        state = self.source.poll()
+        self.inputs.append(pack_input(state))
+        return state
+
+    def recording(self, game):
+        """The session so far, ending in game's current world state"""
+        if game.seed is None:
+            raise ValueError("only games created with a seed can be replayed")
+        return Recording(game.sim_rate, game.seed, game.enemy_swarm is not None, game.update_lod,
+                         game.tile_world is not None, bytes(self.inputs), list(self.key_events), game.state_hash())
+
+
+def save_recording(recording, path):
+    events = b''.join(EVENT_RECORD.pack(tick, key) for tick, key in recording.key_events)
+    flags = ((FLAG_BATCH_ENEMIES if recording.batch_enemies else 0) | (FLAG_UPDATE_LOD if recording.update_lod else 0) |
+             (FLAG_TILE_WORLD if recording.tile_world else 0))
+    header = HEADER.pack(MAGIC, VERSION, recording.sim_rate, flags, recording.seed,
+                         len(recording.inputs), len(recording.key_events), bytes.fromhex(recording.final_hash))
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(zlib.compress(recording.inputs + events, 9))
+
+
+def load_recording(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    (magic, version, sim_rate, flags, seed, tick_count, event_count,
+     final_hash) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} recording")
+    payload = zlib.decompress(data[HEADER.size:])
+    inputs = payload[:tick_count]
+    key_events = list(EVENT_RECORD.iter_unpack(payload[tick_count:tick_count + event_count * EVENT_RECORD.size]))
+    return Recording(sim_rate, seed, bool(flags & FLAG_BATCH_ENEMIES), bool(flags & FLAG_UPDATE_LOD),
+                     bool(flags & FLAG_TILE_WORLD), inputs, key_events, final_hash.hex())
+
+
+def replay_input(recording):
+    """ScriptedInput that plays a recording back tick for tick"""
+    events = {}
+    for tick, key in recording.key_events:
+        events.setdefault(tick, []).append(key)
+    return ScriptedInput([INPUT_STATES[bits] for bits in recording.inputs], events)
+
+
+def replay(recording, render=False):
+    """Re-run a recording headless as fast as possible and verify the final world hash
+
+    Returns simulate()'s frames, seconds and fps plus the replayed hash and whether it matched.
+    """
+    game = Game(sim_rate=recording.sim_rate, headless=True, input_source=replay_input(recording),
+                seed=recording.seed, batch_enemies=recording.batch_enemies, update_lod=recording.update_lod,
+                tile_world=recording.tile_world)
+    result = game.simulate(len(recording.inputs), render=render)
+    game.handle_events()  # Keys pressed after the last tick
+    result['hash'] = game.state_hash()
+    result['matches'] = result['hash'] == recording.final_hash
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a play session or replay one headless")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record_parser = subparsers.add_parser('record', help="play in a window and record the session")
+    record_parser.add_argument('path')
+    record_parser.add_argument('--seed', type=int, help="RNG seed (random if omitted)")
+    record_parser.add_argument('--batch-enemies', action='store_true')
+    record_parser.add_argument('--update-lod', action='store_true')
+    record_parser.add_argument('--tile-world', action='store_true')
+    play_parser = subparsers.add_parser('play', help="replay a recording headless as a benchmark")
+    play_parser.add_argument('path')
+    play_parser.add_argument('--render', action='store_true', help="also render each frame off-screen")
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+        recorder = RecordingInput(KeyboardInput())
+        game = Game(input_source=recorder, seed=seed, batch_enemies=args.batch_enemies, update_lod=args.update_lod,
+                    tile_world=args.tile_world)
+        game.run()
+        recording = recorder.recording(game)
+        save_recording(recording, args.path)
+        print(f"Recorded {len(recording.inputs)} ticks (seed {seed}) to {args.path}")
+        return
+
+    recording = load_recording(args.path)
+    result = replay(recording, render=args.render)
+    print(f"Replayed {result['frames']} ticks in {result['seconds']:.3f}s ({result['fps']:.1f} ticks/s)")
+    if not result['matches']:
+        print(f"Final state hash {result['hash']} does not match the recorded {recording.final_hash}")
+        sys.exit(1)
+    print(f"Final state hash matches: {result['hash']}")
+
+
+if __name__ == "__main__":
+    main()
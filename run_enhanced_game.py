@@ -4,40 +4,116 @@ Launcher script for Enhanced Super Mario Style Game
 Includes headless mode detection and better error handling
 """
 
+import time
+
+LAUNCH_TIME = time.perf_counter()  # Reference point for the startup benchmark
+
 import os
 import sys
-import subprocess
+import json
+import argparse
 
 def check_display():
     """Check if a display is available"""
     return os.environ.get('DISPLAY') is not None or os.environ.get('WAYLAND_DISPLAY') is not None
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Enhanced Super Mario Style Game")
+    parser.add_argument('--headless', action='store_true',
+                        help="simulate without a window as fast as possible")
+    parser.add_argument('--frames', type=int, default=10000,
+                        help="frames to simulate in headless mode")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="RNG seed for headless mode")
+    parser.add_argument('--render', action='store_true',
+                        help="also render each headless frame off-screen")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="present only changed regions while the camera is still (low-power displays)")
+    parser.add_argument('--tile-world', action='store_true',
+                        help="collide against a tile grid built from the platforms")
+    parser.add_argument('--update-lod', action='store_true',
+                        help="update off-screen enemies and coins at a reduced rate, distant ones not at all")
+    parser.add_argument('--manage-gc', action='store_true',
+                        help="suspend automatic garbage collection during play, collecting on pause screens and in idle frame time")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="count bytes allocated and garbage collection pauses per frame (traces every allocation)")
+    parser.add_argument('--startup-benchmark', action='store_true',
+                        help="report the time from launch to the first presented frame, then exit")
+    return parser.parse_args()
+
+def soak_script(tick):
+    """Default headless input: run right and hop every 45 ticks"""
+    from enhanced_mario_game import InputState
+    return InputState(right=True, jump=tick % 45 < 10)
+
+def run_headless(args):
+    # Never touch a real display or audio device
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    from enhanced_mario_game import Game, ScriptedInput
+    
+    with Game(headless=True, input_source=ScriptedInput(soak_script), seed=args.seed, tile_world=args.tile_world,
+              update_lod=args.update_lod, manage_gc=args.manage_gc, trace_memory=args.trace_memory) as game:
+        result = game.simulate(args.frames, render=args.render, restart_on_game_over=True)
+        
+        print(f"Simulated {result['frames']} frames in {result['seconds']:.3f}s")
+        print(f"Simulated FPS: {result['fps']:.1f}")
+        print(f"Coins: {game.player.coins_collected}, enemies defeated: {game.player.enemies_defeated}")
+        if args.trace_memory:
+            counters = game.profiler.counter_summary()
+            monitor = game.memory_monitor
+            print(f"Allocated per frame: p50 {counters['alloc_bytes'][0]:.0f} B, p99 {counters['alloc_bytes'][1]:.0f} B; "
+                  f"held at frame end: p50 {counters['held_bytes'][0]:.0f} B, p99 {counters['held_bytes'][1]:.0f} B")
+            print(f"GC: {monitor.total_collections} collections, {monitor.total_pause_ns / 1e6:.2f}ms total, "
+                  f"longest {monitor.max_pause_ns / 1e6:.2f}ms")
+
+def run_startup_benchmark(args):
+    """Time launch, import, game construction and the first presented frame"""
+    if not check_display():
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from enhanced_mario_game import Game
+    imported = time.perf_counter()
+    game = Game(dirty_rendering=args.dirty_rects)
+    created = time.perf_counter()
+    game.handle_events()
+    game.update()
+    game.draw()
+    presented = time.perf_counter()
+    
+    print(json.dumps({
+        'import_ms': (imported - LAUNCH_TIME) * 1000,
+        'game_init_ms': (created - imported) * 1000,
+        'first_frame_ms': (presented - created) * 1000,
+        'launch_to_first_frame_ms': (presented - LAUNCH_TIME) * 1000,
+    }))
+
 def main():
+    args = parse_args()
+    
     try:
-        # Import pygame to check if it's available
-        import pygame
-        print("Pygame is available.")
+        import pygame  # noqa: F401
     except ImportError:
-        print("Pygame is not installed. Installing...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "pygame"])
-        import pygame
-        print("Pygame installed successfully!")
+        print("Pygame is not installed. Run: pip install -r requirements.txt")
+        sys.exit(1)
+    
+    if args.startup_benchmark:
+        run_startup_benchmark(args)
+        return
     
     # Check if running in headless environment
-    if not check_display():
-        print("No display detected. Running performance tests instead...")
-        print("To run the actual game, use a system with a graphical display.")
-        
-        # Run performance tests to verify the code works
-        from performance_test import main as run_performance_tests
-        run_performance_tests()
+    if args.headless or not check_display():
+        if not args.headless:
+            print("No display detected. Running the game headless instead...")
+            print("To play the game, use a system with a graphical display.")
+        run_headless(args)
         return
     
     # Run the enhanced game
     print("Starting the Enhanced Mario Game...")
     from enhanced_mario_game import Game
-    game = Game()
+    game = Game(dirty_rendering=args.dirty_rects, tile_world=args.tile_world, update_lod=args.update_lod,
+                manage_gc=args.manage_gc, trace_memory=args.trace_memory)
     game.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,132 @@
+"""
+Hierarchical timer wheel for the Enhanced Mario Game
+
+Timers are keyed on the simulation tick. Each level of the wheel has
+WHEEL_SLOTS slots, kept as a dict of the occupied ones so an idle wheel is a
+few empty dicts. Level 0 holds timers due within WHEEL_SLOTS ticks, one slot
+per tick, and each level above covers WHEEL_SLOTS times the span of the one
+below. When level 0 wraps, the next slot up is cascaded down, so advancing a
+tick costs one slot visit plus the timers that actually expire, however many
+are pending. Cancelled timers are flagged and dropped when their slot comes up.
+"""
+
+import math
+
+WHEEL_BITS = 6
+WHEEL_SLOTS = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SLOTS - 1
+WHEEL_LEVELS = 4  # Spans 2 ** 24 ticks (about 78 hours at 60 ticks/s); later deadlines wait in an overflow list
+
+
+class Timer:
+    """A scheduled expiration; active until it fires or is cancelled"""
+
+    __slots__ = ('deadline', 'callback', 'args', 'active')
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+
+class TimerWheel:
+    """Expirations scheduled in simulation ticks, fired as the clock advances
+
+    tick_dt is the tick length in base-rate frames, which ticks() uses to turn
+    the frame durations entity stats are tuned in into tick counts.
+    """
+
+    def __init__(self, tick_dt=1.0):
+        self.tick_dt = tick_dt
+        self.now = 0
+        self.pending = 0  # Active timers
+        self.levels = [{} for _ in range(WHEEL_LEVELS)]  # Slot index -> timers, occupied slots only
+        self.overflow = []
+
+    def __len__(self):
+        return self.pending
+
+    def ticks(self, frames):
+        """Whole ticks covering a duration in base-rate frames"""
+        # Rounded first so float tick lengths (60 / 144) do not push an exact count up a tick
+        return max(math.ceil(round(frames / self.tick_dt, 6)), 0)
+
+    def schedule(self, ticks, callback=None, *args):
+        """Timer expiring ticks from now (at least one), calling callback(*args) if given"""
+        timer = Timer(self.now + max(ticks, 1), callback, args)
+        self.place(timer)
+        self.pending += 1
+        return timer
+
+    def cancel(self, timer):
+        """Stop a timer from firing; None and spent timers are ignored"""
+        if timer is not None and timer.active:
+            timer.active = False
+            self.pending -= 1
+
+    def remaining(self, timer):
+        """Ticks until timer expires, 0 for None and spent timers"""
+        if timer is None or not timer.active:
+            return 0
+        return timer.deadline - self.now
+
+    def place(self, timer):
+        delta = timer.deadline - self.now
+        for level in range(WHEEL_LEVELS):
+            shift = WHEEL_BITS * level
+            if delta < WHEEL_SLOTS << shift:
+                slots = self.levels[level]
+                slot = (timer.deadline >> shift) & WHEEL_MASK
+                if slot in slots:
+                    slots[slot].append(timer)
+                else:
+                    slots[slot] = [timer]
+                return
+        self.overflow.append(timer)
+
+    def cascade(self):
+        """Move timers from the slots the clock just reached at each higher level down a level"""
+        for level in range(1, WHEEL_LEVELS):
+            shift = WHEEL_BITS * level
+            slot = (self.now >> shift) & WHEEL_MASK
+            for timer in self.levels[level].pop(slot, ()):
+                if timer.active:
+                    self.place(timer)
+            if slot:
+                return
+        timers, self.overflow = self.overflow, []
+        for timer in timers:
+            if timer.active:
+                self.place(timer)
+
+    def advance(self, ticks=1):
+        """Move the clock forward, firing timers as they expire; returns how many fired"""
+        fired = 0
+        for _ in range(ticks):
+            self.now += 1
+            if not self.pending:
+                continue  # Nothing active anywhere, so no slot needs visiting
+            if not self.now & WHEEL_MASK:
+                self.cascade()
+            for timer in self.levels[0].pop(self.now & WHEEL_MASK, ()):
+                if timer.active:
+                    timer.active = False
+                    self.pending -= 1
+                    fired += 1
+                    if timer.callback is not None:
+                        timer.callback(*timer.args)
+        return fired
+
+    def reset(self, now=0):
+        """Drop every timer and set the clock"""
+        for slots in self.levels:
+            for timers in slots.values():
+                for timer in timers:
+                    timer.active = False
+            slots.clear()
+        for timer in self.overflow:
+            timer.active = False
+        self.overflow = []
+        self.now = now
+        self.pending = 0